@@ -0,0 +1,505 @@
+"""
+pattern_records를 round 순서로 재생하며 예측기들을 워크 포워드 방식으로 평가하는 CLI입니다.
+
+각 레코드에서 예측기는 그 이전 레코드만으로 만든 상태로 예측하고, 채점한 뒤에 그 레코드를 상태에 더합니다.
+DataFrame을 시점마다 다시 자르지 않고 개수 상태를 한 행씩 더하고(이동 구간이면 빼고) 갱신하므로
+재생 비용은 레코드 수에 비례하며, 예측기별 재생은 프로세스 풀에서 동시에 실행합니다.
+
+예측기 (앱의 예측 함수와 같은 규칙):
+    frequency     pattern1 → result1  (predict_next_pattern, 최근 --window개 레코드 빈도표)
+    frequency_p2  pattern2 → result2  (predict_next_pattern의 패턴2 조회)
+    pattern2      (prev_pattern1, prev_pattern2) → pattern1  (predict_next_pattern2)
+    similar       pattern1 → result1  (find_similar_patterns: 길이와 a 개수가 같은 패턴)
+    markov        직전 result1 흐름 → result1  (가변 차수 마르코프, 전체 이력)
+    ml            특성 → result1  (증분 빈도 모델, 전체 이력)
+    forest        특성 → result1  (RandomForest, --refit-every마다 최근 --train-window개로 재학습)
+    baseline      지금까지 가장 많이 나온 result1
+
+지표: 적중률(예측한 레코드 중), 예측 비율, log-loss, Brier 점수, 신뢰도 구간별 보정(ECE)
+
+사용법:
+    python backtest.py
+    python backtest.py --db pattern_analysis_v2.db --window 150 --predictors frequency similar ml
+    python backtest.py --calibration --json backtest.json
+"""
+import argparse
+import json
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import mul
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from feature_store import materialize_features
+from model_training import FOREST_FEATURES, FREQUENCY_FEATURES
+from online_model import FrequencyClassifier
+from pattern_frequency import predict_from_table, update_outcome_table
+from sequence_model import MAX_ORDER, CountTrie
+from storage import DB_PATH, close_connections, get_connection, transaction
+
+# 앱(load_pattern_transitions)이 예측에 쓰는 최근 레코드 수
+DEFAULT_WINDOW = 150
+FOREST_REFIT_EVERY = 50000
+FOREST_TRAIN_WINDOW = 50000
+FOREST_MIN_TRAIN = 100
+CALIBRATION_BINS = 10
+EPS = 1e-15
+
+RESULTS = ('a', 'b')
+
+
+def _two_way(best, confidence):
+    """예측값과 신뢰도만 주는 예측기의 분포 (나머지 확률은 반대 값)"""
+    other = 'b' if best == 'a' else 'a'
+    distribution = {best: confidence}
+    if other != best:
+        distribution[other] = 1 - confidence
+    return distribution
+
+
+class Evaluator(ABC):
+    """
+    워크 포워드 평가기: predict(i)는 i번째 레코드 이전 상태로 (예측값, {값: 확률}) 또는 None을,
+    update(i)는 i번째 레코드를 상태에 더합니다. 데이터는 열 이름 → 값 목록으로 받습니다.
+    """
+
+    target = 'result1'
+    columns = ()
+    features = ()
+
+    def __init__(self, data, **options):
+        self.data = data
+
+    @abstractmethod
+    def predict(self, i):
+        pass
+
+    def update(self, i):
+        pass
+
+
+class WindowedEvaluator(Evaluator):
+    """최근 window개 레코드만 상태에 유지합니다 (window=0이면 전체 이력)."""
+
+    def __init__(self, data, window=DEFAULT_WINDOW, **options):
+        super().__init__(data)
+        self.window = window
+        self._recent = deque()
+
+    def update(self, i):
+        self._add(i, 1)
+        if self.window:
+            self._recent.append(i)
+            if len(self._recent) > self.window:
+                self._add(self._recent.popleft(), -1)
+
+    @abstractmethod
+    def _add(self, i, count):
+        pass
+
+
+class FrequencyEvaluator(WindowedEvaluator):
+    columns = ('pattern1', 'result1', 'pattern2', 'result2')
+    query = 'pattern1'
+
+    def __init__(self, data, **options):
+        super().__init__(data, **options)
+        self.table = {}
+        self.keys = data[self.query]
+        self.rows = list(zip(*(data[column] for column in self.columns)))
+
+    def _add(self, i, count):
+        update_outcome_table(self.table, *self.rows[i], count)
+
+    def predict(self, i):
+        prediction = predict_from_table(self.table, self.keys[i])
+        if prediction is None:
+            return None
+        return prediction['next_pattern'], _two_way(prediction['next_pattern'], prediction['confidence'])
+
+
+class FrequencyP2Evaluator(FrequencyEvaluator):
+    target = 'result2'
+    query = 'pattern2'
+
+
+class ValueCounts:
+    """
+    키별 행 수와 값별 개수를 유지합니다. 가장 많은 값은 pandas value_counts와 같이
+    동률이면 구간 안에서 먼저 나온 값을 고릅니다 (값마다 구간 안의 레코드 위치를 보관).
+    """
+
+    def __init__(self):
+        self.items = {}   # 키 → [행 수, {값: 레코드 위치 deque}]
+
+    def add(self, key, value, i):
+        item = self.items.setdefault(key, [0, {}])
+        item[0] += 1
+        if value is not None:
+            item[1].setdefault(value, deque()).append(i)
+
+    def remove(self, key, value):
+        """가장 오래된 레코드를 뺍니다 (구간에서 빠지는 순서 = 추가한 순서)."""
+        item = self.items[key]
+        item[0] -= 1
+        if value is not None:
+            positions = item[1][value]
+            positions.popleft()
+            if not positions:
+                del item[1][value]
+
+    def most_common(self, key):
+        """(가장 많은 값, {값: 개수 / 행 수}) - 값이 없으면 None"""
+        item = self.items.get(key)
+        if item is None or not item[1]:
+            return None
+        total, values = item
+        best = min(values, key=lambda value: (-len(values[value]), values[value][0]))
+        return best, {value: len(positions) / total for value, positions in values.items()}
+
+
+class Pattern2Evaluator(WindowedEvaluator):
+    target = 'pattern1'
+    columns = ('prev_pattern1', 'prev_pattern2', 'pattern1')
+
+    def __init__(self, data, **options):
+        super().__init__(data, **options)
+        self.keys = list(zip(data['prev_pattern1'], data['prev_pattern2']))
+        self.labels = data['pattern1']
+        self.counts = ValueCounts()   # (prev_pattern1, prev_pattern2) → pattern1
+
+    def _add(self, i, count):
+        if count > 0:
+            self.counts.add(self.keys[i], self.labels[i], i)
+        else:
+            self.counts.remove(self.keys[i], self.labels[i])
+
+    def predict(self, i):
+        key = self.keys[i]
+        if not key[0] or not key[1]:
+            return None
+        return self.counts.most_common(key)
+
+
+class SimilarEvaluator(WindowedEvaluator):
+    columns = ('pattern1', 'result1')
+
+    def __init__(self, data, **options):
+        super().__init__(data, **options)
+        self.keys = [(len(p), p.count('a')) if isinstance(p, str) else None for p in data['pattern1']]
+        self.results = data['result1']
+        self.counts = ValueCounts()   # (길이, a 개수) → result1
+
+    def _add(self, i, count):
+        if self.keys[i] is None:
+            return
+        if count > 0:
+            self.counts.add(self.keys[i], self.results[i], i)
+        else:
+            self.counts.remove(self.keys[i], self.results[i])
+
+    def predict(self, i):
+        return self.counts.most_common(self.keys[i])
+
+
+class MarkovEvaluator(Evaluator):
+    columns = ('result1',)
+
+    def __init__(self, data, min_support=5, **options):
+        super().__init__(data)
+        self.results = data['result1']
+        self.trie = CountTrie(MAX_ORDER)
+        self.history = deque(maxlen=MAX_ORDER)
+        self.min_support = min_support
+
+    def predict(self, i):
+        prediction = self.trie.predict(list(self.history), self.min_support)
+        if prediction is None:
+            return None
+        return prediction['next_pattern'], prediction['distribution']
+
+    def update(self, i):
+        result = self.results[i]
+        if result in RESULTS:
+            self.trie.add(list(self.history), result)
+            self.history.append(result)
+
+
+class BaselineEvaluator(Evaluator):
+    columns = ('result1',)
+
+    def __init__(self, data, **options):
+        super().__init__(data)
+        self.results = data['result1']
+        self.counts = {}
+        self.total = 0
+
+    def predict(self, i):
+        if not self.total:
+            return None
+        best = max(sorted(self.counts), key=self.counts.get)
+        return best, {result: count / self.total for result, count in self.counts.items()}
+
+    def update(self, i):
+        result = self.results[i]
+        if result in RESULTS:
+            self.counts[result] = self.counts.get(result, 0) + 1
+            self.total += 1
+
+
+class FrequencyModelEvaluator(Evaluator):
+    """앱의 증분 학습 빈도 모델 (FrequencyClassifier)을 한 행씩 학습시키며 평가"""
+
+    columns = ('result1',)
+    features = tuple(FREQUENCY_FEATURES)
+
+    def __init__(self, data, **options):
+        super().__init__(data)
+        self.rows = list(zip(*(data[feature] for feature in self.features)))
+        self.labels = data['result1']
+        self.model = FrequencyClassifier()
+
+    def predict(self, i):
+        if not self.model.n_samples or self.rows[i][0] is None:
+            return None
+        distribution = self.model.distribution(self.rows[i])
+        return max(sorted(distribution), key=distribution.get), distribution
+
+    def update(self, i):
+        if self.rows[i][0] is not None:
+            self.model.add(self.rows[i], self.labels[i])
+
+
+class ForestEvaluator(Evaluator):
+    """
+    RandomForest를 refit_every개 레코드마다 직전 train_window개 레코드로 다시 학습하고,
+    다음 구간 전체를 한 번의 predict_proba로 예측합니다 (구간 안에서는 모델을 고정).
+    """
+
+    columns = ('result1',)
+    features = tuple(FOREST_FEATURES)
+
+    def __init__(self, data, refit_every=FOREST_REFIT_EVERY, train_window=FOREST_TRAIN_WINDOW,
+                 n_estimators=100, **options):
+        super().__init__(data)
+        self.rows = list(zip(*(data[feature] for feature in self.features)))
+        self.labels = data['result1']
+        self.refit_every = refit_every
+        self.train_window = train_window
+        self.n_estimators = n_estimators
+        self.next_refit = FOREST_MIN_TRAIN
+        self.predictions = {}
+
+    def _refit(self, i):
+        train = [j for j in range(max(0, i - self.train_window), i) if self.rows[j][0] is not None]
+        end = min(len(self.rows), i + self.refit_every)
+        self.next_refit = end
+        self.predictions = {}
+        if not train:
+            return
+        model = RandomForestClassifier(n_estimators=self.n_estimators, random_state=42)
+        model.fit(np.array([self.rows[j] for j in train], dtype=float), [self.labels[j] for j in train])
+        chunk = [j for j in range(i, end) if self.rows[j][0] is not None]
+        if not chunk:
+            return
+        proba = model.predict_proba(np.array([self.rows[j] for j in chunk], dtype=float))
+        for j, row in zip(chunk, proba):
+            distribution = dict(zip(model.classes_.tolist(), row.tolist()))
+            self.predictions[j] = (max(sorted(distribution), key=distribution.get), distribution)
+
+    def predict(self, i):
+        if i >= self.next_refit:
+            self._refit(i)
+        return self.predictions.get(i)
+
+
+EVALUATORS = {
+    'frequency': FrequencyEvaluator,
+    'frequency_p2': FrequencyP2Evaluator,
+    'pattern2': Pattern2Evaluator,
+    'similar': SimilarEvaluator,
+    'markov': MarkovEvaluator,
+    'ml': FrequencyModelEvaluator,
+    'forest': ForestEvaluator,
+    'baseline': BaselineEvaluator,
+}
+
+
+class Score:
+    """
+    예측마다 (적중 여부, 실제 값의 확률, 예측값의 확률, 확률 제곱합)만 기록하고,
+    적중률 / log-loss / Brier 점수 / 신뢰도 구간별 보정은 마지막에 numpy로 한 번에 계산합니다.
+    """
+
+    def __init__(self, bins=CALIBRATION_BINS):
+        self.bins = bins
+        self.rows = 0
+        self.hits = []
+        self.actual_probability = []
+        self.confidence = []
+        self.squares = []
+
+    def add(self, prediction, actual):
+        self.rows += 1
+        if prediction is None:
+            return
+        predicted, distribution = prediction
+        probabilities = list(distribution.values())
+        self.hits.append(predicted == actual)
+        self.actual_probability.append(distribution.get(actual, 0.0))
+        self.confidence.append(distribution.get(predicted, 0.0))
+        self.squares.append(sum(map(mul, probabilities, probabilities)))
+
+    def summary(self):
+        predicted = len(self.hits)
+        result = {
+            'rows': self.rows,
+            'coverage': predicted / self.rows if self.rows else 0.0,
+            'hit_rate': None, 'log_loss': None, 'brier': None, 'ece': None,
+            'calibration': [],
+        }
+        if not predicted:
+            return result
+
+        hits = np.array(self.hits, dtype=float)
+        actual_probability = np.array(self.actual_probability)
+        confidence = np.array(self.confidence)
+        # Brier = Σ(p - 정답)² = Σp² - 2·p(실제) + 1
+        brier = np.array(self.squares) - 2 * actual_probability + 1
+        bins = np.minimum((confidence * self.bins).astype(int), self.bins - 1)
+        counts = np.bincount(bins, minlength=self.bins)
+        confidence_sums = np.bincount(bins, weights=confidence, minlength=self.bins)
+        hit_sums = np.bincount(bins, weights=hits, minlength=self.bins)
+
+        calibration = []
+        for b in np.flatnonzero(counts):
+            calibration.append({
+                'bin': f'{b / self.bins:.1f}-{(b + 1) / self.bins:.1f}',
+                'count': int(counts[b]),
+                'confidence': float(confidence_sums[b] / counts[b]),
+                'accuracy': float(hit_sums[b] / counts[b]),
+            })
+        result.update(
+            hit_rate=float(hits.mean()),
+            log_loss=float(-np.log(np.clip(actual_probability, EPS, 1 - EPS)).mean()),
+            brier=float(brier.mean()),
+            ece=float(np.abs(hit_sums - confidence_sums).sum() / predicted),
+            calibration=calibration,
+        )
+        return result
+
+
+RECORDS_QUERY = '''
+    SELECT {columns}
+    FROM pattern_records
+    LEFT JOIN pattern_features USING (round)
+    ORDER BY round
+'''
+
+
+def load_columns(conn, columns, features=()):
+    """pattern_records 열과 pattern_features 특성 열을 round 순서의 값 목록으로 읽습니다."""
+    selected = [f'pattern_records.{column}' for column in columns] + [f'pattern_features.{feature}' for feature in features]
+    rows = conn.execute(RECORDS_QUERY.format(columns=', '.join(selected))).fetchall()
+    names = list(columns) + list(features)
+    values = list(zip(*rows)) if rows else [() for _ in names]
+    return dict(zip(names, (list(column) for column in values)))
+
+
+def replay(evaluator_class, data, **options):
+    """평가기 하나로 전체 레코드를 재생하고 채점합니다."""
+    evaluator = evaluator_class(data, **options)
+    targets = data[evaluator.target]
+    score = Score()
+    for i, actual in enumerate(targets):
+        # 비어 있는 결과(패턴이 짧아 다음 값이 없는 레코드)는 채점하지 않고 상태에만 더함
+        if actual:
+            score.add(evaluator.predict(i), actual)
+        evaluator.update(i)
+    return score.summary()
+
+
+def _run_predictor(task):
+    """워커 프로세스: 필요한 열만 읽어 예측기 하나를 재생합니다."""
+    db_path, name, options = task
+    start = time.perf_counter()
+    evaluator_class = EVALUATORS[name]
+    columns = list(dict.fromkeys((evaluator_class.target,) + evaluator_class.columns))
+    try:
+        data = load_columns(get_connection(db_path), columns, evaluator_class.features)
+    finally:
+        close_connections()
+    result = replay(evaluator_class, data, **options)
+    result.update(predictor=name, target=evaluator_class.target, seconds=time.perf_counter() - start)
+    return result
+
+
+def run_backtest(db_path=DB_PATH, names=None, workers=None, **options):
+    """
+    예측기들을 프로세스 풀에서 동시에 재생합니다.
+
+    Args:
+        names (list): 평가할 예측기 이름 (기본값: 전체)
+        workers (int): 프로세스 수 (기본값: CPU 코어 수)
+        options: 평가기 옵션 (window, refit_every, train_window, n_estimators, min_support)
+
+    Returns:
+        list: 예측기별 결과 dict (predictor, target, rows, coverage, hit_rate, log_loss, brier, ece,
+              calibration, seconds)
+    """
+    names = list(names or EVALUATORS)
+    # 특성 저장소가 레코드보다 뒤처져 있으면 먼저 채움
+    with transaction(db_path) as conn:
+        materialize_features(conn)
+    close_connections()
+
+    tasks = [(db_path, name, options) for name in names]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_predictor, tasks))
+
+
+def _format(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='pattern_records를 재생해 예측기들을 워크 포워드로 평가합니다.')
+    parser.add_argument('--db', default=DB_PATH, help=f'평가할 SQLite DB (기본값: {DB_PATH})')
+    parser.add_argument('--predictors', nargs='+', choices=list(EVALUATORS), default=None,
+                        help='평가할 예측기 (기본값: 전체)')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help=f'빈도 예측기가 쓰는 최근 레코드 수, 0이면 전체 이력 (기본값: {DEFAULT_WINDOW})')
+    parser.add_argument('--refit-every', type=int, default=FOREST_REFIT_EVERY, help='RandomForest 재학습 간격 (레코드)')
+    parser.add_argument('--train-window', type=int, default=FOREST_TRAIN_WINDOW, help='RandomForest 학습 레코드 수')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--calibration', action='store_true', help='신뢰도 구간별 보정표 출력')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일')
+    args = parser.parse_args(argv)
+
+    results = run_backtest(args.db, args.predictors, args.workers, window=args.window,
+                           refit_every=args.refit_every, train_window=args.train_window)
+
+    print(f"{'예측기':<14}{'대상':<10}{'레코드':>9}{'예측 비율':>10}{'적중률':>8}"
+          f"{'log-loss':>10}{'Brier':>8}{'ECE':>8}{'시간(s)':>9}")
+    for result in results:
+        print(f"{result['predictor']:<14}{result['target']:<10}{result['rows']:>9}"
+              f"{result['coverage']:>10.1%}{_format(result['hit_rate'], '.1%'):>8}"
+              f"{_format(result['log_loss'], '.3f'):>10}{_format(result['brier'], '.3f'):>8}"
+              f"{_format(result['ece'], '.3f'):>8}{result['seconds']:>9.2f}")
+        if args.calibration:
+            for row in result['calibration']:
+                print(f"    신뢰도 {row['bin']}  {row['count']:>8}건  평균 신뢰도 {row['confidence']:.1%}"
+                      f"  실제 적중률 {row['accuracy']:.1%}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
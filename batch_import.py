@@ -0,0 +1,199 @@
+"""
+보관된 bead road SVG 캡처를 한꺼번에 분석해 pattern_analysis_v2.db에 저장하는 CLI입니다.
+
+parser_v2의 "Parse SVG" → "패턴 저장" 흐름(SVG 파싱 → T 변환 → 구간 추출 → 그룹 분류)을
+파일마다 프로세스 풀에서 실행하고, 결과를 파일 시각 순서대로 일괄 삽입합니다.
+
+사용법:
+    python batch_import.py captures/
+    python batch_import.py captures.tar.gz --db pattern_analysis_v2.db --workers 8
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import tarfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from bead_grid import BeadGrid, convert_tie_values
+from bead_road import iter_bead_road_cells
+from feature_store import materialize_features
+from pattern_lookup import get_pattern_index
+from pattern_records import TransitionState, format_timestamp, insert_rows
+from storage import DB_PATH, close_connections, transaction
+from zone_extraction import extract_zones
+
+FILE_PATTERN = '*.svg'
+COMMIT_EVERY = 500
+
+
+def analyze_svg(svg_code):
+    """
+    SVG 코드 하나를 parser_v2와 같은 순서로 분석합니다.
+
+    Returns:
+        tuple: (구간 결과 리스트 [(group_range, pattern_123, pattern_1234)], 전체 그룹 앞 2개 값)
+    """
+    grid = convert_tie_values(BeadGrid.from_cells(iter_bead_road_cells(svg_code)))
+    zones = extract_zones(grid, get_pattern_index().groups)
+
+    results = []
+    all_first_two = ''
+    for zone in zones:
+        if zone['pattern_123'] or zone['pattern_1234']:
+            group_range = f"{zone['start_x'] + 1}-{zone['end_x'] + 1}"
+            results.append((group_range, zone['pattern_123'], zone['pattern_1234']))
+        all_first_two += zone['pattern_123'][:2]
+    return results, all_first_two
+
+
+def _process_task(task):
+    """워커 프로세스: (이름, 시각, 경로 또는 내용)을 받아 분석 결과를 반환합니다."""
+    name, mtime, source = task
+    try:
+        if isinstance(source, bytes):
+            svg_code = source.decode('utf-8', errors='replace')
+        else:
+            with open(source, 'r', encoding='utf-8', errors='replace') as f:
+                svg_code = f.read()
+        results, all_first_two = analyze_svg(svg_code)
+        return name, mtime, results, all_first_two, None
+    except Exception as e:
+        return name, mtime, [], '', str(e)
+
+
+def collect_tasks(source, file_pattern=FILE_PATTERN):
+    """
+    디렉터리 또는 tar 파일에서 SVG 작업 목록을 만듭니다. 파일 시각 → 이름 순으로 정렬합니다.
+
+    Returns:
+        list: (이름, mtime, 경로 또는 bytes) 튜플 리스트
+    """
+    tasks = []
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for file_name in fnmatch.filter(files, file_pattern):
+                path = os.path.join(root, file_name)
+                tasks.append((path, os.path.getmtime(path), path))
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as tar:
+            for member in tar:
+                if member.isfile() and fnmatch.fnmatch(os.path.basename(member.name), file_pattern):
+                    tasks.append((member.name, member.mtime, tar.extractfile(member).read()))
+    else:
+        raise ValueError(f"디렉터리 또는 tar 파일이 아닙니다: {source}")
+
+    tasks.sort(key=lambda task: (task[1], task[0]))
+    return tasks
+
+
+class _ImportWriter:
+    """
+    분석 결과를 모아 두었다가 커밋 시점마다 한 트랜잭션(BEGIN IMMEDIATE)으로 저장합니다.
+
+    가져오는 동안 앱에서도 레코드를 저장할 수 있으므로, 트랜잭션 안에서 MAX(round)가
+    이 가져오기가 마지막으로 쓴 round와 다르면 TransitionState를 DB에서 다시 읽은 뒤
+    행을 만듭니다 (직전 패턴과 전이 카운트가 앱이 저장한 레코드 뒤로 이어지도록).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.state = None
+        self.last_round = None
+        self.pending = []  # (timestamp, group_range, pattern_123, pattern_1234)
+        self.group_rows = []
+
+    def add(self, timestamp, results, all_first_two):
+        for group_range, pattern_123, pattern_1234 in results:
+            self.pending.append((timestamp, group_range, pattern_123, pattern_1234))
+        if all_first_two:
+            self.group_rows.append((timestamp, all_first_two))
+
+    def commit(self):
+        """
+        모아 둔 결과를 저장합니다.
+
+        Returns:
+            tuple: (저장한 패턴 기록 수, 저장한 그룹 시퀀스 수)
+        """
+        with transaction(self.db_path) as conn:
+            last_round = conn.execute('SELECT MAX(round) FROM pattern_records').fetchone()[0]
+            if self.state is None or last_round != self.last_round:
+                self.state = TransitionState.load(conn)
+            try:
+                pattern_rows = [self.state.build_row(*row) for row in self.pending]
+                insert_rows(conn, pattern_rows, self.group_rows)
+                self.state.flush(conn)
+                materialize_features(conn)
+                self.last_round = conn.execute('SELECT MAX(round) FROM pattern_records').fetchone()[0]
+            except BaseException:
+                # 롤백되면 메모리 상태도 믿을 수 없으므로 다음 커밋 때 다시 읽음
+                self.state = None
+                raise
+        counts = len(pattern_rows), len(self.group_rows)
+        self.pending, self.group_rows = [], []
+        return counts
+
+
+def run_import(source, db_path=DB_PATH, workers=None, file_pattern=FILE_PATTERN,
+               commit_every=COMMIT_EVERY, use_file_time=True):
+    """
+    SVG 캡처들을 병렬로 분석해 pattern_records / group_sequences에 일괄 저장합니다.
+
+    Returns:
+        dict: files, records, sequences, errors 개수
+    """
+    tasks = collect_tasks(source, file_pattern)
+    summary = {'files': len(tasks), 'records': 0, 'sequences': 0, 'errors': 0}
+    if not tasks:
+        return summary
+
+    writer = _ImportWriter(db_path)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+        # map은 입력 순서를 유지하므로 전이 관계가 파일 시각 순서대로 계산됨
+        for done, (name, mtime, results, all_first_two, error) in enumerate(
+                executor.map(_process_task, tasks, chunksize=chunksize), 1):
+            if error:
+                summary['errors'] += 1
+                print(f"[오류] {name}: {error}", file=sys.stderr)
+                continue
+
+            timestamp = format_timestamp(datetime.fromtimestamp(mtime) if use_file_time else None)
+            writer.add(timestamp, results, all_first_two)
+
+            if done % commit_every == 0:
+                records, sequences = writer.commit()
+                summary['records'] += records
+                summary['sequences'] += sequences
+
+    records, sequences = writer.commit()
+    summary['records'] += records
+    summary['sequences'] += sequences
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='보관된 bead road SVG 캡처를 일괄 분석해 DB에 저장합니다.')
+    parser.add_argument('source', help='SVG 파일 디렉터리 또는 tar(.tar/.tar.gz) 파일')
+    parser.add_argument('--db', default=DB_PATH, help=f'저장할 SQLite DB (기본값: {DB_PATH})')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--pattern', default=FILE_PATTERN, help=f'처리할 파일 이름 패턴 (기본값: {FILE_PATTERN})')
+    parser.add_argument('--commit-every', type=int, default=COMMIT_EVERY, help='몇 개 파일마다 커밋할지')
+    parser.add_argument('--now', action='store_true', help='파일 시각 대신 현재 시각으로 저장')
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_import(args.source, args.db, args.workers, args.pattern,
+                             args.commit_every, use_file_time=not args.now)
+    finally:
+        close_connections()
+    print(f"파일 {summary['files']}개 처리: 패턴 기록 {summary['records']}개, "
+          f"그룹 시퀀스 {summary['sequences']}개 저장, 오류 {summary['errors']}개")
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import numpy as np
+
+# 기본 테이블 크기
+TABLE_WIDTH = 15
+TABLE_HEIGHT = 6
+
+# 셀 코드 (uint8)
+CODE_EMPTY = 0
+CODE_BANKER = 1
+CODE_PLAYER = 2
+CODE_TIE = 3
+
+CELL_CODES = {'': CODE_EMPTY, 'b': CODE_BANKER, 'p': CODE_PLAYER, 't': CODE_TIE}
+CODE_CELLS = ('', 'b', 'p', 't')
+
+
+class BeadGrid:
+    """
+    Bead road 그리드를 열 우선(column-major) uint8 배열로 보관합니다.
+
+    cells[x, y] 가 x열 y행의 셀 코드이며, 열과 연속된 열 구간(zone)은
+    같은 메모리를 공유하는 뷰로 꺼낼 수 있습니다.
+    """
+
+    __slots__ = ('cells',)
+
+    def __init__(self, width=TABLE_WIDTH, height=TABLE_HEIGHT, cells=None):
+        if cells is None:
+            cells = np.zeros((width, height), dtype=np.uint8)
+        self.cells = cells
+
+    @classmethod
+    def from_cells(cls, cells, width=TABLE_WIDTH, height=TABLE_HEIGHT):
+        """
+        (x, y, 결과 문자) 목록으로 그리드를 만듭니다. 범위 밖 좌표와 B/P/T 이외의 값은 무시합니다.
+
+        Args:
+            cells (iterable): (x, y, 결과 문자) 튜플들 (예: (0, 2, 'B'))
+        """
+        grid = cls(width, height)
+        for x, y, result in cells:
+            if 0 <= x < width and 0 <= y < height:
+                grid.cells[x, y] = CELL_CODES.get(result.lower(), CODE_EMPTY)
+        return grid
+
+    @classmethod
+    def from_columns(cls, columns):
+        """grid[x][y] 형태의 문자열 리스트로 그리드를 만듭니다."""
+        codes = [[CELL_CODES.get(cell, CODE_EMPTY) for cell in column] for column in columns]
+        return cls(cells=np.array(codes, dtype=np.uint8))
+
+    @property
+    def width(self):
+        return self.cells.shape[0]
+
+    @property
+    def height(self):
+        return self.cells.shape[1]
+
+    def code(self, x, y):
+        """x열 y행의 셀 코드를 반환합니다."""
+        return int(self.cells[x, y])
+
+    def cell(self, x, y):
+        """x열 y행의 셀 값을 반환합니다 ('', 'b', 'p', 't')."""
+        return CODE_CELLS[self.cells[x, y]]
+
+    def set_cell(self, x, y, value):
+        """x열 y행에 셀 값('', 'b', 'p', 't') 또는 셀 코드를 기록합니다."""
+        self.cells[x, y] = CELL_CODES[value] if isinstance(value, str) else value
+
+    def column(self, x):
+        """x열의 셀 코드 뷰 (복사 없음)"""
+        return self.cells[x]
+
+    def zone(self, start_x, end_x):
+        """start_x ~ end_x-1 열을 공유하는 BeadGrid 뷰 (복사 없음)"""
+        return BeadGrid(cells=self.cells[start_x:end_x])
+
+    def has_results(self):
+        """B/P/T 셀이 하나라도 있으면 True"""
+        return bool(self.cells.any())
+
+    def copy(self):
+        return BeadGrid(cells=self.cells.copy())
+
+    def to_columns(self):
+        """grid[x][y] 형태의 문자열 리스트로 변환합니다."""
+        return [[CODE_CELLS[code] for code in column] for column in self.cells.tolist()]
+
+    def __eq__(self, other):
+        return isinstance(other, BeadGrid) and np.array_equal(self.cells, other.cells)
+
+    def __repr__(self):
+        return f"BeadGrid(width={self.width}, height={self.height})"
+
+
+def convert_tie_values(grid):
+    """
+    T 값을 규칙에 따라 변환합니다.
+    """
+    converted_grid = grid.copy()  # 그리드 복사 (uint8 배열 한 번)
+    cells = converted_grid.cells
+    
+    # 1열 규칙 적용
+    for y in range(grid.height):
+        if cells[0, y] == CODE_TIE:
+            if y == 0:  # 1행 1열
+                cells[0, y] = cells[0, 1]  # 2행 1열의 값으로 변환
+            else:  # 1열 나머지 행
+                cells[0, y] = cells[0, y-1]  # 이전 행의 값으로 변환
+    
+    # 나머지 열 규칙 적용
+    for x in range(1, grid.width):
+        for y in range(grid.height):
+            if cells[x, y] == CODE_TIE:
+                if y == 0:  # 각 열의 첫 번째 행
+                    cells[x, y] = cells[x-1, y]  # 이전 열 첫 번째 값으로 변환
+                else:  # 나머지 행
+                    # 왼쪽, 왼쪽 위, 위 값 카운트
+                    values = {
+                        int(cells[x-1, y]): 1,  # 왼쪽
+                        int(cells[x-1, y-1]): 1,  # 왼쪽 위
+                        int(cells[x, y-1]): 1  # 위
+                    }
+                    # 가장 많은 값으로 변환
+                    max_value = max(values.items(), key=lambda x: x[1])[0]
+                    cells[x, y] = max_value
+    
+    return converted_grid
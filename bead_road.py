@@ -0,0 +1,136 @@
+from html.parser import HTMLParser
+
+# 좌표 노드 식별자
+COORDINATE_TAG = 'svg'
+COORDINATE_TYPE = 'coordinates'
+TEXT_TAG = 'text'
+
+# 스트리밍 파서에 한 번에 넣는 문자 수
+CHUNK_SIZE = 64 * 1024
+
+
+class _TextNode:
+    """<text> 하위 트리의 노드 (BeautifulSoup의 .string 규칙 재현용)"""
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.children = []
+
+    @property
+    def string(self):
+        if len(self.children) != 1:
+            return None
+        child = self.children[0]
+        return child if isinstance(child, str) else child.string
+
+
+class _CoordinateCellParser(HTMLParser):
+    """
+    data-type="coordinates" 인 svg 노드의 data-x/data-y와 첫 번째 <text> 값만 뽑아내는
+    이벤트 기반 파서입니다. 문서 트리는 만들지 않습니다.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.cells = []
+        self._svg_stack = []      # 열린 svg 노드: 좌표 노드면 [x, y, 대기 여부], 아니면 None
+        self._text_stack = []     # 수집 중인 <text> 하위 트리
+        self._text_owners = []    # 현재 <text>의 값을 기다리는 좌표 노드들
+
+    def handle_starttag(self, tag, attrs):
+        if self._text_stack:
+            node = _TextNode(tag)
+            self._text_stack[-1].children.append(node)
+            self._text_stack.append(node)
+            return
+
+        if tag == COORDINATE_TAG:
+            attrs = dict(attrs)
+            if attrs.get('data-type') == COORDINATE_TYPE:
+                x = int(float(attrs.get('data-x', 0)))
+                y = int(float(attrs.get('data-y', 0)))
+                self._svg_stack.append([x, y, True])
+            else:
+                self._svg_stack.append(None)
+        elif tag == TEXT_TAG:
+            owners = [coord for coord in self._svg_stack if coord and coord[2]]
+            if owners:
+                self._text_owners = owners
+                self._text_stack.append(_TextNode(tag))
+
+    def handle_endtag(self, tag):
+        if self._text_stack:
+            for depth in range(len(self._text_stack) - 1, -1, -1):
+                if self._text_stack[depth].tag == tag:
+                    break
+            else:
+                # <text>가 닫히지 않은 채 바깥 태그가 닫히면 암묵적으로 종료
+                depth = 0
+            if depth == 0:
+                self._finish_text(self._text_stack[0])
+                if tag == TEXT_TAG:
+                    return
+            else:
+                del self._text_stack[depth:]
+                return
+
+        if tag == COORDINATE_TAG and self._svg_stack:
+            self._svg_stack.pop()
+
+    def handle_data(self, data):
+        if self._text_stack:
+            self._text_stack[-1].children.append(data)
+
+    def _finish_text(self, root):
+        self._text_stack = []
+        value = root.string
+        for coord in self._text_owners:
+            coord[2] = False
+            if value:
+                self.cells.append((coord[0], coord[1], value.strip()))
+        self._text_owners = []
+
+
+def iter_bead_road_cells(svg_source, chunk_size=CHUNK_SIZE):
+    """
+    SVG 코드를 조각 단위로 토크나이저에 넣으면서 좌표 셀을 순서대로 내보냅니다.
+
+    Args:
+        svg_source (str or iterable): SVG 코드 문자열 또는 문자열 조각들의 iterable
+        chunk_size (int): 문자열 입력을 나눠 넣을 크기
+
+    Yields:
+        tuple: (x, y, 결과 문자) 예: (0, 2, 'B')
+    """
+    if isinstance(svg_source, str):
+        svg_code = svg_source
+        chunks = (svg_code[i:i + chunk_size] for i in range(0, len(svg_code), chunk_size))
+    else:
+        chunks = svg_source
+
+    parser = _CoordinateCellParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.cells:
+            yield from parser.cells
+            parser.cells = []
+    parser.close()
+    yield from parser.cells
+
+
+def iter_bead_road_cells_soup(svg_code):
+    """
+    BeautifulSoup 트리를 만들어 좌표 셀을 추출하는 기존 방식입니다 (비교/검증용).
+
+    Yields:
+        tuple: (x, y, 결과 문자)
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(svg_code, 'html.parser')
+    for coord in soup.find_all(COORDINATE_TAG, attrs={'data-type': COORDINATE_TYPE}):
+        x = int(float(coord.get('data-x', 0)))
+        y = int(float(coord.get('data-y', 0)))
+        text_elem = coord.find(TEXT_TAG)
+        if text_elem and text_elem.string:
+            yield x, y, text_elem.string.strip()
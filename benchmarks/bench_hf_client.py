@@ -0,0 +1,82 @@
+"""
+Hugging Face API 클라이언트 벤치마크: 로컬 대역 서버(hf_standin)로 예측 테이블의 12개 패턴 요청을 비교합니다.
+
+- sequential: 기존 방식 (세션 없이 requests.post를 패턴마다 순서대로 호출)
+- pooled:     InferenceClient (연결 풀 + 동시 요청, 캐시 없음)
+- cached:     InferenceClient + 응답 캐시 (두 번째 렌더링부터)
+
+사용법:
+    python benchmarks/bench_hf_client.py [--latency 0.2] [--fail-rate 0.1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hf_client import CANDIDATE_LABELS, DEFAULT_MODEL, InferenceClient, ResponseCache, parse_prediction
+from hf_standin import start_standin
+from pattern_frequency import PATTERN1_KEYS, PATTERN2_KEYS
+
+PATTERNS = list(PATTERN1_KEYS) + list(PATTERN2_KEYS)
+TOKEN = 'bench-token'
+
+
+def sequential(url):
+    results = []
+    for pattern in PATTERNS:
+        response = requests.post(url, headers={'Authorization': f'Bearer {TOKEN}'},
+                                 json={'inputs': pattern, 'parameters': {'candidate_labels': list(CANDIDATE_LABELS)}})
+        results.append(response.json() if response.status_code == 200 else None)
+    return results
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.2, help='대역 서버의 요청당 지연 (초)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='대역 서버의 503 응답 비율 (재시도 확인용)')
+    args = parser.parse_args()
+
+    server = start_standin(latency=args.latency, fail_rate=args.fail_rate)
+    url = f'{server.base_url}/{DEFAULT_MODEL}'
+    with tempfile.TemporaryDirectory() as tmp:
+        pooled = InferenceClient(TOKEN, base_url=server.base_url, backoff=0.05)
+        cached = InferenceClient(TOKEN, base_url=server.base_url, backoff=0.05,
+                                 cache=ResponseCache(os.path.join(tmp, 'cache.db')))
+
+        seq_time, seq_results = timed(lambda: sequential(url))
+        pool_time, pool_results = timed(lambda: pooled.classify_many(PATTERNS))
+        cached.classify_many(PATTERNS)
+        requests_before = server.stats['requests']
+        cache_time, cache_results = timed(lambda: cached.classify_many(PATTERNS))
+
+        for expected, *others in zip(seq_results, pool_results, cache_results):
+            if expected is None:
+                continue
+            assert all(parse_prediction(other) == parse_prediction(expected) for other in others), \
+                '클라이언트 결과가 기존 방식과 다릅니다'
+        failed = sum(not isinstance(result, dict) for result in pool_results)
+
+        print(f"{len(PATTERNS)} patterns, latency {args.latency * 1000:.0f} ms, fail rate {args.fail_rate:.0%}")
+        print(f"  sequential {seq_time * 1000:8.1f} ms")
+        print(f"  pooled     {pool_time * 1000:8.1f} ms  x{seq_time / pool_time:.1f}  "
+              f"(최대 동시 요청 {server.stats['max_in_flight']}, 실패 {failed})")
+        print(f"  cached     {cache_time * 1000:8.1f} ms  "
+              f"(추가 요청 {server.stats['requests'] - requests_before})")
+        pooled.close()
+        cached.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
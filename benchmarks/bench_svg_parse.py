@@ -0,0 +1,73 @@
+"""
+Bead road SVG 파싱 벤치마크: BeautifulSoup 트리 방식과 스트리밍 방식을 비교합니다.
+
+사용법:
+    python benchmarks/bench_svg_parse.py [--tables 50] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bead_road import iter_bead_road_cells, iter_bead_road_cells_soup
+
+TABLE_WIDTH = 15
+TABLE_HEIGHT = 6
+
+
+def make_table_svg(rng, decorations=40):
+    """좌표 노드 90개와 장식용 노드가 섞인 테이블 SVG 하나를 만듭니다."""
+    parts = ['<svg xmlns="http://www.w3.org/2000/svg" width="600" height="240">']
+    for i in range(decorations):
+        parts.append(f'<g class="grid-line"><rect x="{i * 4}" y="0" width="1" height="240" fill="#ddd"/></g>')
+    for x in range(TABLE_WIDTH):
+        for y in range(TABLE_HEIGHT):
+            result = rng.choice('BPT')
+            parts.append(
+                f'<svg data-type="coordinates" data-x="{x}.0" data-y="{y}" x="{x * 40}" y="{y * 40}">'
+                f'<g><circle cx="20" cy="20" r="18" fill="none" stroke="#333"/>'
+                f'<text x="20" y="26" text-anchor="middle"> {result} </text></g></svg>'
+            )
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def build_grid(cells):
+    grid = [['' for _ in range(TABLE_HEIGHT)] for _ in range(TABLE_WIDTH)]
+    for x, y, result in cells:
+        if 0 <= x < TABLE_WIDTH and 0 <= y < TABLE_HEIGHT:
+            grid[x][y] = result.lower()
+    return grid
+
+
+def best_of(func, svg_code, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        grid = build_grid(func(svg_code))
+        best = min(best, time.perf_counter() - start)
+    return best, grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tables', type=int, default=50, help='한 입력에 이어 붙일 테이블 수')
+    parser.add_argument('--repeat', type=int, default=5, help='측정 반복 횟수 (최솟값 사용)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for tables in sorted({1, max(1, args.tables // 5), args.tables}):
+        svg_code = ''.join(make_table_svg(rng) for _ in range(tables))
+        soup_time, soup_grid = best_of(iter_bead_road_cells_soup, svg_code, args.repeat)
+        stream_time, stream_grid = best_of(iter_bead_road_cells, svg_code, args.repeat)
+        assert soup_grid == stream_grid, '스트리밍 결과가 BeautifulSoup 결과와 다릅니다'
+        print(f"{tables:4d} tables  {len(svg_code) / 1024:8.1f} KB  "
+              f"soup {soup_time * 1000:8.2f} ms  stream {stream_time * 1000:8.2f} ms  "
+              f"x{soup_time / stream_time:.1f}")
+
+
+if __name__ == '__main__':
+    main()
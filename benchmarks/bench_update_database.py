@@ -0,0 +1,148 @@
+"""
+"DB 업데이트" 통계 재계산 벤치마크: 기존 상관 서브쿼리 UPDATE와 pattern1_counts 집계 방식을 비교합니다.
+
+합성 pattern_records DB를 만든 뒤 update_database()가 실행하는 통계 재계산에 걸리는 시간을
+첫 실행 / 한 번 저장(레코드 --save-rows개) 후 / 변경 없이 반복 실행으로 나눠 잽니다.
+실제 사용에서 중요한 값은 저장 후 재계산(after save)이며, 최근 150개 레코드 조회(read)도 함께 잽니다.
+상관 서브쿼리는 O(n²)이라 --legacy-rows 이하의 DB에서만 측정하고 결과가 같은지 확인합니다.
+
+사용법:
+    python benchmarks/bench_update_database.py [--rows 1000000] [--legacy-rows 5000] [--save-rows 14]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pattern_records import (TransitionState, init_schema, insert_rows, rebuild_transition_counts,
+                             recount_pattern1_transitions, save_analysis_batch)
+
+LEGACY_UPDATE = '''
+    UPDATE pattern_records
+    SET transition_count = (
+        SELECT COUNT(*)
+        FROM pattern_records pr2
+        WHERE pr2.pattern1 = pattern_records.pattern1
+    )
+'''
+
+
+def random_group(rng, length):
+    return ''.join(rng.choice('ab') for _ in range(length))
+
+
+def make_db(path, rows, rng):
+    """합성 레코드 rows개를 가진 DB를 만듭니다."""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    init_schema(conn)
+    state = TransitionState()
+    batch = 50000
+    for start in range(0, rows, batch):
+        pattern_rows = [
+            state.build_row('2501010000', '1-3', random_group(rng, 3), random_group(rng, 4))
+            for _ in range(min(batch, rows - start))
+        ]
+        insert_rows(conn, pattern_rows, [])
+    state.flush(conn)
+    conn.commit()
+    return conn
+
+
+def save_records(conn, rows, rng):
+    """"패턴 저장" 버튼 한 번에 해당하는 레코드를 저장합니다."""
+    results = [{'group_range': f'{i + 1}-{i + 3}', 'pattern_123': random_group(rng, 3),
+                'pattern_1234': random_group(rng, 4)} for i in range(rows)]
+    with conn:
+        save_analysis_batch(conn, '2501010100', results)
+
+
+def timed(conn, func):
+    start = time.perf_counter()
+    with conn:
+        func(conn)
+    return time.perf_counter() - start
+
+
+def read_recent(conn):
+    """load_pattern_transitions와 같은 최근 150개 레코드 조회"""
+    conn.execute('''
+        SELECT pattern1, current_transition_count FROM pattern_records_counted
+        ORDER BY timestamp DESC LIMIT 150
+    ''').fetchall()
+
+
+def legacy_update(conn):
+    conn.execute(LEGACY_UPDATE)
+    rebuild_transition_counts(conn)
+
+
+# 기존 방식은 행에 다시 쓴 값을, 집계 방식은 pattern_records_counted 뷰가 돌려주는 값을 비교
+LEGACY_RECORDS = 'SELECT round, transition_count FROM pattern_records ORDER BY round'
+COUNTED_RECORDS = 'SELECT round, current_transition_count FROM pattern_records_counted ORDER BY round'
+
+
+def snapshot(conn, records_query):
+    records = conn.execute(records_query).fetchall()
+    counts = conn.execute('SELECT * FROM transition_counts ORDER BY transition_type').fetchall()
+    return records, counts
+
+
+def check_against_legacy(conn, path):
+    """같은 DB 사본에 기존 UPDATE를 실행해 결과가 같은지 확인하고 실행 시간을 반환합니다."""
+    legacy_path = path + '.legacy'
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    shutil.copyfile(path, legacy_path)
+    legacy_conn = sqlite3.connect(legacy_path)
+    legacy_time = timed(legacy_conn, legacy_update)
+    expected = snapshot(legacy_conn, LEGACY_RECORDS)
+    legacy_conn.close()
+    os.remove(legacy_path)
+
+    timed(conn, recount_pattern1_transitions)
+    assert snapshot(conn, COUNTED_RECORDS) == expected, '집계 방식 결과가 상관 서브쿼리 결과와 다릅니다'
+    return legacy_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000, help='합성 DB 레코드 수')
+    parser.add_argument('--legacy-rows', type=int, default=5000, help='상관 서브쿼리를 측정할 최대 레코드 수')
+    parser.add_argument('--save-rows', type=int, default=14, help='저장 한 번에 추가되는 레코드 수')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sorted({min(args.legacy_rows, args.rows), args.rows}):
+            path = os.path.join(tmp, f'bench_{rows}.db')
+            conn = make_db(path, rows, rng)
+            line = f"{rows:9d} rows  "
+
+            if rows <= args.legacy_rows:
+                legacy_time = check_against_legacy(conn, path)
+                save_records(conn, args.save_rows, rng)
+                check_against_legacy(conn, path)
+                conn.close()
+                os.remove(path)
+                conn = make_db(path, rows, rng)
+                line += f"legacy {legacy_time * 1000:9.1f} ms  "
+
+            first_time = timed(conn, recount_pattern1_transitions)
+            save_records(conn, args.save_rows, rng)
+            after_save_time = timed(conn, recount_pattern1_transitions)
+            repeat_time = timed(conn, recount_pattern1_transitions)
+            read_time = timed(conn, read_recent)
+            conn.close()
+            print(line + f"after save {after_save_time * 1000:8.1f} ms  first {first_time * 1000:8.1f} ms  "
+                         f"repeat {repeat_time * 1000:6.1f} ms  read {read_time * 1000:6.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import threading
+
+
+class CacheStats:
+    """
+    캐시 조회/미스 횟수를 이름별로 셉니다.
+
+    Streamlit은 메인 스크립트를 재실행할 때마다 다시 실행하므로, 재실행과 세션 사이에서
+    값이 유지되도록 별도 모듈의 인스턴스(CACHE_STATS)에 보관합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lookups = {}
+        self._misses = {}
+
+    def lookup(self, name):
+        """캐시 조회 1회 (캐시 함수를 부르기 전에 호출)"""
+        with self._lock:
+            self._lookups[name] = self._lookups.get(name, 0) + 1
+
+    def miss(self, name):
+        """캐시 미스 1회 (캐시 함수 본문, 즉 실제 계산 시에만 호출)"""
+        with self._lock:
+            self._misses[name] = self._misses.get(name, 0) + 1
+
+    def snapshot(self):
+        """
+        Returns:
+            list: [{'캐시', '조회', '히트', '미스', '히트율'}, ...]
+        """
+        with self._lock:
+            rows = []
+            for name, lookups in sorted(self._lookups.items()):
+                misses = min(self._misses.get(name, 0), lookups)
+                rows.append({
+                    '캐시': name,
+                    '조회': lookups,
+                    '히트': lookups - misses,
+                    '미스': misses,
+                    '히트율': f"{(lookups - misses) / lookups:.1%}" if lookups else '-',
+                })
+            return rows
+
+    def reset(self):
+        with self._lock:
+            self._lookups.clear()
+            self._misses.clear()
+
+
+CACHE_STATS = CacheStats()
@@ -0,0 +1,150 @@
+import pandas as pd
+
+from pattern_characteristics import GROUP_STATS, group_pattern_stats
+
+# pattern_records에서 옮겨 온 기본 특성 (기존 학습 특성과 같은 순서)
+BASE_FEATURES = ['pattern1_banker_count', 'pattern1_player_count',
+                 'pattern1_transitions', 'pattern2_banker_count',
+                 'pattern2_player_count', 'pattern2_transitions']
+
+# 직전 1~3개 레코드의 result1 (a=1, b=0, 없음=-1)
+LAG_FEATURES = ['result1_lag1', 'result1_lag2', 'result1_lag3']
+
+# 직전 N개 레코드 중 result1이 'a'인 비율
+RATIO_WINDOWS = (10, 30)
+RATIO_FEATURES = [f'result1_a_ratio_{window}' for window in RATIO_WINDOWS]
+
+FEATURE_COLUMNS = BASE_FEATURES + LAG_FEATURES + RATIO_FEATURES
+
+# 새 레코드의 지연/롤링 특성을 계산하는 데 필요한 이전 레코드 수
+HISTORY_ROWS = max(len(LAG_FEATURES), *RATIO_WINDOWS)
+
+RESULT_CODES = {'a': 1, 'b': 0}
+
+SOURCE_QUERY = '''
+    SELECT round, pattern1, result1, pattern2
+    FROM pattern_records
+    WHERE round > ?
+    ORDER BY round
+'''
+
+HISTORY_QUERY = '''
+    SELECT round, result1
+    FROM pattern_records
+    WHERE round <= ?
+    ORDER BY round DESC
+    LIMIT ?
+'''
+
+INSERT_FEATURES = f'''
+    INSERT OR REPLACE INTO pattern_features
+    (round, result1, {', '.join(FEATURE_COLUMNS)})
+    VALUES ({', '.join('?' * (len(FEATURE_COLUMNS) + 2))})
+'''
+
+TRAINING_QUERY = '''
+    SELECT round, result1, {columns}
+    FROM pattern_features
+    WHERE round > ?
+    ORDER BY round
+'''
+
+
+# 그룹 패턴별 (a 개수, b 개수, 전환 횟수) 조회 테이블
+_GROUP_STATS_FRAME = pd.DataFrame(list(GROUP_STATS.values()), index=list(GROUP_STATS),
+                                  columns=['banker', 'player', 'transitions'])
+
+
+def _pattern_stats(patterns):
+    """그룹 패턴 열의 (a 개수, b 개수, 전환 횟수)를 미리 계산한 테이블에서 한 번에 조회합니다."""
+    patterns = patterns.fillna('')
+    stats = _GROUP_STATS_FRAME.reindex(patterns.to_numpy())
+    unknown = stats['banker'].isna().to_numpy()
+    if unknown.any():
+        # 테이블 밖의 패턴 (a/b 외 문자, 긴 패턴)만 직접 계산
+        stats.iloc[unknown] = [group_pattern_stats(pattern) for pattern in patterns[unknown]]
+    stats = stats.astype(int)
+    return stats['banker'], stats['player'], stats['transitions']
+
+
+def build_features(history, records):
+    """
+    새 레코드의 특성 행을 pandas 열 연산으로 만듭니다.
+
+    Args:
+        history (pd.DataFrame): 새 레코드 직전의 레코드 (round 오름차순, result1 컬럼)
+        records (pd.DataFrame): 새 레코드 (round 오름차순, round/pattern1/result1/pattern2 컬럼)
+
+    Returns:
+        pd.DataFrame: round, result1, FEATURE_COLUMNS 컬럼
+    """
+    frame = pd.DataFrame({'round': records['round'].to_numpy(),
+                          'result1': records['result1'].to_numpy()})
+    for prefix in ('pattern1', 'pattern2'):
+        banker, player, transitions = _pattern_stats(records[prefix])
+        frame[f'{prefix}_banker_count'] = banker.to_numpy()
+        frame[f'{prefix}_player_count'] = player.to_numpy()
+        frame[f'{prefix}_transitions'] = transitions.to_numpy()
+
+    # 이전 레코드와 이어 붙인 result1 코드열에서 shift/rolling으로 계산한 뒤 새 레코드 부분만 사용
+    offset = len(history)
+    codes = pd.concat([history['result1'], records['result1']], ignore_index=True)
+    codes = codes.map(RESULT_CODES).fillna(-1).astype(int)
+    for lag, column in enumerate(LAG_FEATURES, start=1):
+        frame[column] = codes.shift(lag).fillna(-1).astype(int).to_numpy()[offset:]
+
+    is_a = (codes == 1).astype(float).shift(1)
+    known = (codes >= 0).astype(float).shift(1)
+    for window, column in zip(RATIO_WINDOWS, RATIO_FEATURES):
+        ratio = is_a.rolling(window, min_periods=1).sum() / known.rolling(window, min_periods=1).sum()
+        frame[column] = ratio.fillna(0.5).to_numpy()[offset:]
+    return frame
+
+
+def materialize_features(conn):
+    """
+    pattern_features에 아직 없는 레코드(마지막 round 이후)의 특성만 계산해 저장합니다.
+    레코드 저장과 같은 트랜잭션에서 호출하며, 커밋은 호출자가 합니다.
+
+    Returns:
+        int: 새로 저장한 특성 행 수
+    """
+    last_round = conn.execute('SELECT MAX(round) FROM pattern_features').fetchone()[0] or 0
+    records_max = conn.execute('SELECT MAX(round) FROM pattern_records').fetchone()[0] or 0
+    if records_max < last_round:
+        # 레코드가 초기화되었으면 처음부터 다시 만듦
+        conn.execute('DELETE FROM pattern_features')
+        last_round = 0
+
+    records = pd.read_sql_query(SOURCE_QUERY, conn, params=(last_round,))
+    if records.empty:
+        return 0
+    history = pd.read_sql_query(HISTORY_QUERY, conn, params=(last_round, HISTORY_ROWS)).iloc[::-1]
+
+    frame = build_features(history, records)
+    conn.executemany(INSERT_FEATURES, frame.astype(object).itertuples(index=False, name=None))
+    return len(frame)
+
+
+def delete_orphan_features(conn):
+    """삭제된 레코드의 특성 행을 지웁니다. 커밋은 호출자가 합니다."""
+    return conn.execute('''
+        DELETE FROM pattern_features
+        WHERE round NOT IN (SELECT round FROM pattern_records)
+    ''').rowcount
+
+
+def load_feature_matrix(conn, features, since_round=0):
+    """
+    저장된 특성 행을 학습용 행렬로 읽습니다 (행 단위 Python 계산 없음).
+
+    Args:
+        features (list): 사용할 특성 컬럼 (FEATURE_COLUMNS 중)
+        since_round (int): 이 round 이후의 행만 사용
+
+    Returns:
+        tuple: (X, y, 마지막 round)
+    """
+    df = pd.read_sql_query(TRAINING_QUERY.format(columns=', '.join(features)), conn, params=(since_round,))
+    last_round = int(df['round'].max()) if not df.empty else since_round
+    return df[features].to_numpy(), df['result1'].to_numpy(), last_round
@@ -0,0 +1,219 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cache_stats import CACHE_STATS
+
+# 기본 엔드포인트 (HF_API_BASE_URL 환경 변수로 로컬 대역 서버 등으로 바꿀 수 있음)
+DEFAULT_BASE_URL = 'https://api-inference.huggingface.co/models'
+DEFAULT_MODEL = 'facebook/bart-large-mnli'
+CANDIDATE_LABELS = ('next_a', 'next_b')
+
+# (연결, 읽기) 타임아웃 초
+DEFAULT_TIMEOUT = (3.05, 15)
+# 연결 오류 / 429 / 5xx 재시도 횟수와 지수 백오프 계수 (0.5, 1, 2초 ...)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# 동시 요청 수 (= 연결 풀 크기)
+MAX_WORKERS = 8
+
+CACHE_PATH = 'hf_response_cache.db'
+
+
+class HFClientError(Exception):
+    """API 호출 실패 (HTTP 오류, 시간 초과, 연결 오류)"""
+
+
+class ResponseCache:
+    """
+    (model, inputs, labels)별 API 응답을 SQLite 파일에 보관합니다.
+    zero-shot 분류 결과는 같은 입력이면 같으므로 기본적으로 만료되지 않습니다 (max_age로 제한 가능).
+    """
+
+    def __init__(self, path=CACHE_PATH, max_age=None):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS hf_responses (
+                    model TEXT,
+                    inputs TEXT,
+                    labels TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model, inputs, labels)
+                )
+            ''')
+
+    def get(self, model, inputs, labels):
+        """저장된 응답 (없거나 만료되었으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response, created_at FROM hf_responses WHERE model = ? AND inputs = ? AND labels = ?',
+                (model, inputs, json.dumps(list(labels)))
+            ).fetchone()
+        if row is None or (self.max_age is not None and time.time() - row[1] > self.max_age):
+            return None
+        return json.loads(row[0])
+
+    def put(self, model, inputs, labels, response):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO hf_responses VALUES (?, ?, ?, ?, ?)',
+                (model, inputs, json.dumps(list(labels)), json.dumps(response), time.time())
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM hf_responses')
+
+
+class InferenceClient:
+    """
+    Hugging Face zero-shot 분류 API 클라이언트입니다.
+
+    - requests.Session 하나의 연결 풀을 재사용 (요청마다 TLS 연결을 새로 맺지 않음)
+    - 요청마다 타임아웃, 연결 오류/429/5xx는 지수 백오프로 재시도 (Retry-After 헤더 준수)
+    - classify_many는 캐시에 없는 입력만 스레드 풀로 동시에 보냄
+    """
+
+    def __init__(self, token, model=DEFAULT_MODEL, base_url=None, timeout=DEFAULT_TIMEOUT,
+                 retries=MAX_RETRIES, backoff=BACKOFF_FACTOR, max_workers=MAX_WORKERS, cache=None):
+        self.model = model
+        self.url = f"{(base_url or os.environ.get('HF_API_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')}/{model}"
+        self.timeout = timeout
+        self.cache = cache
+
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                      allowed_methods=frozenset(['POST']), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hf-inference')
+
+    def _post(self, inputs, labels):
+        payload = {'inputs': inputs, 'parameters': {'candidate_labels': list(labels)}}
+        try:
+            response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise HFClientError(f"API 요청 실패: {e}") from e
+        if response.status_code != 200:
+            raise HFClientError(f"API 오류: {response.status_code} - {response.text}")
+        try:
+            return response.json()
+        except ValueError as e:
+            # 200이지만 JSON이 아닌 응답 (프록시/HTML 오류 페이지 등)
+            raise HFClientError(f"API 응답을 해석할 수 없습니다: {response.text[:200]}") from e
+
+    def classify(self, inputs, labels=CANDIDATE_LABELS):
+        """입력 하나를 분류합니다. 실패하면 HFClientError."""
+        result = self.classify_many([inputs], labels)[0]
+        if isinstance(result, HFClientError):
+            raise result
+        return result
+
+    def classify_many(self, inputs_list, labels=CANDIDATE_LABELS):
+        """
+        여러 입력을 분류합니다. 캐시에 있는 입력은 요청하지 않고, 나머지는 동시에 요청합니다.
+
+        Returns:
+            list: inputs_list 순서의 API 응답 dict 또는 HFClientError
+        """
+        results = [None] * len(inputs_list)
+        pending = []
+        for i, inputs in enumerate(inputs_list):
+            CACHE_STATS.lookup('hf_api')
+            cached = self.cache.get(self.model, inputs, labels) if self.cache is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                CACHE_STATS.miss('hf_api')
+                pending.append(i)
+
+        futures = {i: self._executor.submit(self._post, inputs_list[i], labels) for i in pending}
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except HFClientError as e:
+                results[i] = e
+                continue
+            # 형식이 맞는 응답만 캐시 (모델 로딩 중 안내 등은 저장하지 않음)
+            if self.cache is not None and isinstance(results[i], dict) and 'scores' in results[i]:
+                self.cache.put(self.model, inputs_list[i], labels, results[i])
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+def parse_prediction(result):
+    """
+    zero-shot 분류 응답을 예측 결과로 변환합니다. 형식이 다르면 ValueError.
+
+    Returns:
+        dict: next_pattern, confidence, method, model_name, raw_predictions
+    """
+    if not (isinstance(result, dict) and 'scores' in result and 'labels' in result):
+        raise ValueError(f"예상치 못한 API 응답 형식: {result}")
+
+    # 최고 확률의 예측값 선택
+    max_score_idx = result['scores'].index(max(result['scores']))
+    predicted_value = 'a' if result['labels'][max_score_idx] == 'next_a' else 'b'
+    confidence = result['scores'][max_score_idx]
+
+    # 신뢰도가 50% 미만이면 반대 패턴 선택
+    if confidence < 0.5:
+        predicted_value = 'b' if predicted_value == 'a' else 'a'
+        confidence = 1 - confidence
+
+    return {
+        'next_pattern': predicted_value,
+        'confidence': confidence,
+        'method': 'Hugging Face API',
+        'model_name': 'BART Large MNLI',
+        'raw_predictions': {
+            'next_a': result['scores'][result['labels'].index('next_a')],
+            'next_b': result['scores'][result['labels'].index('next_b')]
+        }
+    }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_inference_client(token, model=DEFAULT_MODEL, base_url=None, cache_path=CACHE_PATH):
+    """
+    프로세스 전체에서 공유하는 InferenceClient를 반환합니다 (토큰/모델/엔드포인트별 하나).
+
+    Args:
+        token (str): Hugging Face API 토큰
+        model (str): 모델 이름
+        base_url (str): 모델 엔드포인트 기본 URL (기본값: HF_API_BASE_URL 환경 변수 또는 공식 API)
+        cache_path (str): 응답 캐시 파일 (None이면 캐시하지 않음)
+
+    Returns:
+        InferenceClient: 연결 풀과 응답 캐시를 재사용하는 클라이언트
+    """
+    key = (token, model, base_url or os.environ.get('HF_API_BASE_URL'), cache_path)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                cache = ResponseCache(cache_path) if cache_path else None
+                client = _clients[key] = InferenceClient(token, model, base_url, cache=cache)
+    return client
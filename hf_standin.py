@@ -0,0 +1,129 @@
+"""
+Hugging Face zero-shot 분류 엔드포인트를 흉내 내는 로컬 HTTP 서버입니다.
+네트워크 없이 hf_client의 지연 시간, 동시성, 재시도를 확인할 때 사용합니다.
+
+사용법:
+    python hf_standin.py [--port 8765] [--latency 0.3] [--fail-rate 0.1]
+    HF_API_BASE_URL=http://127.0.0.1:8765/models streamlit run pattern_prediction.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8765
+
+
+def zero_shot_scores(inputs, labels):
+    """입력/레이블 해시로 만든 결정적인 점수 (합계 1, 내림차순 정렬은 호출자가 함)"""
+    weights = [int(hashlib.sha256(f'{inputs}|{label}'.encode()).hexdigest()[:8], 16) + 1 for label in labels]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive (클라이언트 연결 풀 재사용 확인용)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        with server.stats_lock:
+            server.stats['requests'] += 1
+            server.stats['in_flight'] += 1
+            server.stats['max_in_flight'] = max(server.stats['max_in_flight'], server.stats['in_flight'])
+        try:
+            if not self.path.startswith('/models/'):
+                return self._send_json(404, {'error': f'Not Found: {self.path}'})
+            if not self.headers.get('Authorization', '').startswith('Bearer '):
+                return self._send_json(401, {'error': 'Authorization header is correct, but the token seems invalid'})
+            try:
+                payload = json.loads(body)
+                inputs = payload['inputs']
+                labels = list(payload['parameters']['candidate_labels'])
+            except (ValueError, KeyError, TypeError):
+                return self._send_json(400, {'error': 'invalid payload'})
+
+            time.sleep(server.latency)
+            if server.fail_rate and server.rng.random() < server.fail_rate:
+                return self._send_json(503, {'error': 'Model is currently loading', 'estimated_time': 1.0})
+
+            ranked = sorted(zip(zero_shot_scores(inputs, labels), labels), reverse=True)
+            self._send_json(200, {
+                'sequence': inputs,
+                'labels': [label for _, label in ranked],
+                'scores': [score for score, _ in ranked],
+            })
+        finally:
+            with server.stats_lock:
+                server.stats['in_flight'] -= 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StandinServer(ThreadingHTTPServer):
+    """요청마다 스레드 하나로 처리하며, 요청 수와 최대 동시 요청 수를 stats에 기록합니다."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.3, fail_rate=0.0, seed=0, verbose=False):
+        super().__init__(address, StandinHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.verbose = verbose
+        self.stats = {'requests': 0, 'in_flight': 0, 'max_in_flight': 0}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/models'
+
+
+def start_standin(port=0, latency=0.3, fail_rate=0.0):
+    """
+    대역 서버를 백그라운드 스레드에서 시작합니다 (port=0이면 빈 포트 사용).
+
+    Returns:
+        StandinServer: base_url을 InferenceClient에 넘기고, 끝나면 shutdown() 호출
+    """
+    server = StandinServer(('127.0.0.1', port), latency, fail_rate)
+    threading.Thread(target=server.serve_forever, name='hf-standin', daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Hugging Face zero-shot 분류 API 로컬 대역 서버')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'포트 (기본값: {DEFAULT_PORT})')
+    parser.add_argument('--latency', type=float, default=0.3, help='요청당 응답 지연 (초)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='503(모델 로딩 중)으로 응답할 비율')
+    parser.add_argument('--verbose', action='store_true', help='요청 로그 출력')
+    args = parser.parse_args(argv)
+
+    server = StandinServer(('127.0.0.1', args.port), args.latency, args.fail_rate, verbose=args.verbose)
+    print(f'대역 서버 실행 중: {server.base_url} (HF_API_BASE_URL로 지정)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
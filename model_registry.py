@@ -0,0 +1,85 @@
+import os
+import threading
+
+import joblib
+
+from cache_stats import CACHE_STATS
+from model_training import MODEL_PATH
+
+
+class ModelRegistry:
+    """
+    저장된 (model, le, features) 파일을 프로세스당 한 번만 읽어 메모리에 보관합니다.
+    파일의 mtime/크기가 바뀐 경우(새 모델로 교체된 경우)에만 다시 읽습니다.
+
+    mmap_mode='r'을 주면 joblib이 모델 안의 numpy 배열(트리 노드 등)을 메모리 매핑으로 읽습니다.
+    모델 파일은 os.replace로 교체되므로 매핑된 이전 파일은 그대로 유효합니다.
+    """
+
+    def __init__(self, path=MODEL_PATH, mmap_mode=None):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.model = None
+        self.label_encoder = None
+        self.features = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        파일이 변경되었으면 모델을 다시 읽습니다.
+
+        Returns:
+            bool: 사용할 수 있는 모델이 있으면 True (파일이 없으면 False)
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return self.model is not None
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self.version:
+            return True
+        with self._lock:
+            if version == self.version:
+                return True
+            CACHE_STATS.miss('model')
+            model, label_encoder, features = joblib.load(self.path, mmap_mode=self.mmap_mode)
+            self.model, self.label_encoder, self.features = model, label_encoder, features
+            self.version = version
+        return True
+
+    def get(self):
+        """
+        최신 모델을 반환합니다.
+
+        Returns:
+            tuple: (model, le, features) - 모델 파일이 없으면 None
+        """
+        CACHE_STATS.lookup('model')
+        if not self.refresh():
+            return None
+        with self._lock:
+            return self.model, self.label_encoder, self.features
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_model_registry(path=MODEL_PATH, mmap_mode=None):
+    """
+    프로세스 전체에서 공유하는 ModelRegistry를 반환합니다.
+
+    Args:
+        path (str): 모델 파일 경로
+        mmap_mode (str): joblib.load의 mmap_mode (예: 'r', 기본값: 메모리로 읽기)
+
+    Returns:
+        ModelRegistry: 모델 레지스트리 (get()으로 최신 모델 조회)
+    """
+    key = (path, mmap_mode)
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.setdefault(key, ModelRegistry(path, mmap_mode))
+    return registry
@@ -0,0 +1,208 @@
+import os
+import tempfile
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from feature_store import BASE_FEATURES, FEATURE_COLUMNS, LAG_FEATURES, load_feature_matrix, materialize_features
+from online_model import FrequencyClassifier
+from pattern_records import records_version
+
+MODEL_PATH = 'pattern_prediction_model.joblib'
+
+# 모델별 학습 특성 (pattern_features 컬럼)
+# 빈도 모델은 조합별 개수를 세므로 정수 특성만, RandomForest는 롤링 비율까지 사용
+FREQUENCY_FEATURES = BASE_FEATURES + LAG_FEATURES
+FOREST_FEATURES = list(FEATURE_COLUMNS)
+FEATURES = FREQUENCY_FEATURES
+
+# (pattern1, pattern2) 조건별 최신 레코드의 특성 행 하나 (UNION ALL로 이어 붙여 한 번에 조회)
+LATEST_FEATURES_ARM = '''
+    SELECT * FROM (
+        SELECT ? AS idx, {features}
+        FROM pattern_records
+        JOIN pattern_features USING (round)
+        WHERE {where}
+        ORDER BY pattern_records.timestamp DESC
+        LIMIT 1
+    )
+'''
+
+
+def load_training_data(conn, since_round=0, features=FEATURES):
+    """
+    ML 모델 학습을 위한 데이터를 특성 저장소(pattern_features)에서 읽습니다.
+
+    Args:
+        since_round (int): 이 round 이후에 저장된 행만 사용 (증분 학습 워터마크, 0이면 전체)
+        features (list): 사용할 특성 컬럼
+
+    Returns:
+        tuple: (X, y, features, 마지막 round)
+    """
+    X, y, last_round = load_feature_matrix(conn, features, since_round)
+    return X, y, list(features), last_round
+
+
+def save_model(artifact, model_path=MODEL_PATH):
+    """
+    같은 디렉터리의 임시 파일에 쓴 뒤 os.replace로 교체합니다.
+    읽는 쪽은 항상 이전 모델 또는 새 모델 파일 전체만 보게 됩니다.
+    """
+    directory = os.path.dirname(os.path.abspath(model_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.model-', suffix='.joblib.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            joblib.dump(artifact, f)
+        os.replace(tmp_path, model_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_incremental_model(model_path=MODEL_PATH):
+    """
+    증분 학습을 이어 갈 저장된 빈도 모델을 읽습니다.
+
+    Returns:
+        FrequencyClassifier or None: 이어서 학습할 모델, 저장된 모델이 현재 특성의 RandomForest면 None
+            (RandomForest는 빈도 모델로 덮어쓰지 않고 전체 학습으로 갱신)
+
+    Raises:
+        ValueError: 파일을 읽을 수 없거나 (model, le, features) 형식이 아니거나 특성 구성이 맞지 않는 경우
+    """
+    try:
+        saved_model, _, saved_features = joblib.load(model_path)
+        saved_features = list(saved_features)
+    except Exception as e:
+        # 다른 sklearn 버전으로 저장된 모델, 손상된 파일, 다른 형식의 튜플 등
+        raise ValueError(f"저장된 모델을 읽을 수 없습니다: {e}") from e
+
+    if isinstance(saved_model, FrequencyClassifier) and saved_features == FREQUENCY_FEATURES:
+        return saved_model
+    if not isinstance(saved_model, FrequencyClassifier) and saved_features == FOREST_FEATURES:
+        # 전체 학습으로 만든 RandomForest
+        return None
+    raise ValueError(f"저장된 모델의 특성 구성이 현재와 다릅니다: {saved_features}")
+
+
+def train_model(conn, model_path=MODEL_PATH, incremental=True):
+    """
+    ML 모델을 학습시켜 저장합니다. Streamlit 호출 없이 동작하므로 백그라운드 스레드에서도 사용할 수 있습니다.
+
+    Args:
+        incremental (bool): True면 저장된 빈도 모델에 마지막 학습 round 이후의 행만 추가 학습,
+            False면 전체 데이터로 RandomForest를 처음부터 학습.
+            저장된 모델이 RandomForest이거나, 읽을 수 없거나 호환되지 않으면 전체 학습으로 대신합니다
+            (반환된 model의 종류로 실제 학습 방식을 알 수 있음).
+
+    Returns:
+        tuple: (model, le, features, 학습에 사용한 행 수) - 학습할 데이터가 없으면 model이 None
+    """
+    # 특성 저장소가 레코드보다 뒤처져 있으면(저장소 도입 전 레코드 등) 먼저 채움
+    with conn:
+        materialize_features(conn)
+
+    model = None
+    if incremental and os.path.exists(model_path):
+        try:
+            model = load_incremental_model(model_path)
+        except ValueError:
+            model = None
+        if model is None:
+            # 저장된 RandomForest는 빈도 모델로 덮어쓰지 않고, 이어서 학습할 수 없는 모델과 함께 전체 학습으로 갱신
+            incremental = False
+
+    # DB가 초기화되었거나(round는 AUTOINCREMENT라 초기화 후에도 계속 증가) 앞쪽 레코드가 삭제되어
+    # 첫 round가 바뀌었으면, 또는 워터마크보다 큰 round가 없어졌으면 처음부터 학습
+    first_round, last_round = records_version(conn)[:2]
+    since_round = model.trained_round if model is not None else 0
+    if model is not None and (getattr(model, 'first_round', None) != first_round
+                              or (last_round or 0) < since_round):
+        model, since_round = None, 0
+
+    X, y, features, last_round = load_training_data(
+        conn, since_round, FREQUENCY_FEATURES if incremental else FOREST_FEATURES)
+
+    if incremental:
+        if model is None:
+            if len(y) == 0:
+                return None, None, None, 0
+            model = FrequencyClassifier()
+            model.first_round = first_round
+        elif len(y) == 0:
+            # 새 행이 없으면 모델이 그대로이므로 파일을 다시 쓰지 않음
+            return model, LabelEncoder().fit(model.classes_), features, 0
+        # 새 행만 추가 학습
+        model.partial_fit(X, y)
+        model.trained_round = last_round
+        le = LabelEncoder().fit(model.classes_)
+    else:
+        if len(y) == 0:
+            return None, None, None, 0
+        # 레이블 인코딩
+        le = LabelEncoder()
+        y_encoded = le.fit_transform(y)
+
+        # 모델 학습
+        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        model.fit(X, y_encoded)
+
+    save_model((model, le, features), model_path)
+    return model, le, features, len(y)
+
+
+def describe_model(model):
+    """예측 결과에 표시할 모델 설명"""
+    return 'ML Model (빈도 모델, 증분 학습)' if isinstance(model, FrequencyClassifier) else 'ML Model (RandomForest)'
+
+
+def load_latest_features(conn, pairs, features=FEATURES):
+    """
+    (pattern1, pattern2) 쌍마다 가장 최근 레코드의 특성을 한 번의 쿼리로 가져옵니다.
+
+    Args:
+        pairs (list): [(pattern1, pattern2), ...] - None인 값은 조건에서 제외
+        features (list): 가져올 특성 컬럼 (모델과 함께 저장된 목록)
+
+    Returns:
+        dict: 쌍 인덱스 → 특성 튜플 (레코드가 없는 쌍은 빠짐)
+    """
+    arms, params = [], []
+    for idx, (pattern1, pattern2) in enumerate(pairs):
+        conditions = ['pattern1 = ?' if pattern1 is not None else None,
+                      'pattern2 = ?' if pattern2 is not None else None]
+        where = ' AND '.join(c for c in conditions if c) or '1'
+        columns = ', '.join(f'pattern_features.{feature}' for feature in features)
+        arms.append(LATEST_FEATURES_ARM.format(features=columns, where=where))
+        params.append(idx)
+        params.extend(value for value in (pattern1, pattern2) if value is not None)
+    if not arms:
+        return {}
+    rows = conn.execute(' UNION ALL '.join(arms), params).fetchall()
+    return {row[0]: row[1:] for row in rows}
+
+
+def predict_batch(conn, model, le, features, pairs):
+    """
+    여러 (pattern1, pattern2) 쌍의 다음 결과를 한 번의 특성 조회와 한 번의 predict_proba로 예측합니다.
+
+    Args:
+        features (list): 모델과 함께 저장된 특성 컬럼 목록
+
+    Returns:
+        list: pairs 순서의 (예측값, 신뢰도) - 특성 행이 없는 쌍은 None
+    """
+    rows = load_latest_features(conn, pairs, features)
+    results = [None] * len(pairs)
+    if not rows:
+        return results
+    indexes = sorted(rows)
+    proba = model.predict_proba(np.array([rows[idx] for idx in indexes]))
+    labels = le.inverse_transform(np.argmax(proba, axis=1))
+    for idx, label, confidence in zip(indexes, labels, proba.max(axis=1)):
+        results[idx] = (label, float(confidence))
+    return results
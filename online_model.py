@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class FrequencyClassifier:
+    """
+    특성 조합별 레이블 개수로 다음 결과 확률을 추정하는 증분 학습 분류기입니다.
+
+    학습 특성(a/b 개수, 전환 횟수)은 작은 정수라 조합 수가 적으므로 조합별 개수가 곧 모델입니다.
+    partial_fit은 새 행만 더하면 되므로 재학습 비용이 추가된 데이터 양에 비례합니다.
+    trained_round에 마지막으로 학습한 pattern_records.round(워터마크)를,
+    first_round에 학습을 시작할 때의 첫 round를 보관합니다 (DB 초기화 등으로 바뀌면 처음부터 다시 학습).
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.counts = {}        # 특성 조합 → {레이블: 개수}
+        self.label_counts = {}  # 레이블 → 개수 (처음 보는 조합의 사전 분포)
+        self.trained_round = 0
+        self.first_round = None
+        self.n_samples = 0
+
+    @property
+    def classes_(self):
+        return np.array(sorted(self.label_counts), dtype=object)
+
+    def fit(self, X, y):
+        """기존 개수를 버리고 처음부터 학습합니다."""
+        self.counts = {}
+        self.label_counts = {}
+        self.n_samples = 0
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        """새 행의 개수만 더합니다."""
+        for row, label in zip(np.asarray(X).tolist(), y):
+            self.add(row, label)
+        return self
+
+    def add(self, row, label):
+        """행 하나의 개수를 더합니다."""
+        label_counts = self.counts.setdefault(tuple(row), {})
+        label_counts[label] = label_counts.get(label, 0) + 1
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+        self.n_samples += 1
+
+    def distribution(self, row):
+        """
+        행 하나의 {레이블: 확률}을 반환합니다. 처음 보는 조합은 전체 레이블 분포를 사용하고,
+        alpha만큼 라플라스 평활화를 적용합니다.
+        """
+        label_counts = self.counts.get(tuple(row), self.label_counts)
+        total = sum(label_counts.values()) + self.alpha * len(self.label_counts)
+        return {label: (label_counts.get(label, 0) + self.alpha) / total for label in self.label_counts}
+
+    def predict_proba(self, X):
+        """classes_ 순서의 확률을 반환합니다 (distribution과 같은 계산)."""
+        classes = sorted(self.label_counts)
+        proba = np.zeros((len(X), len(classes)))
+        for i, row in enumerate(np.asarray(X).tolist()):
+            distribution = self.distribution(row)
+            proba[i] = [distribution[label] for label in classes]
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
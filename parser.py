@@ -1,8 +1,12 @@
 import streamlit as st
-from bs4 import BeautifulSoup
 import sqlite3
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
+
+from bead_grid import BeadGrid
+from bead_road import iter_bead_road_cells, iter_bead_road_cells_soup
+from pattern_lookup import get_pattern_index
+from pattern_statistics import query_pattern_statistics, recent_text_timestamp
+from zone_extraction import extract_zones
 
 # Database setup
 def init_db():
@@ -90,21 +94,10 @@ PATTERN_WIDTH = 2
 PATTERN_TOP_ROWS = [0,1,2]
 PATTERN_BOTTOM_ROWS = [3,4,5]
 
-def parse_bead_road_svg(svg_code):
-    soup = BeautifulSoup(svg_code, 'html.parser')
-    grid = [['' for _ in range(TABLE_HEIGHT)] for _ in range(TABLE_WIDTH)]
-    
-    coordinates = soup.find_all('svg', attrs={'data-type': 'coordinates'})
-    for coord in coordinates:
-        x = int(float(coord.get('data-x', 0)))
-        y = int(float(coord.get('data-y', 0)))
-        text_elem = coord.find('text')
-        if text_elem and text_elem.string:
-            result = text_elem.string.strip()
-            if 0 <= x < TABLE_WIDTH and 0 <= y < TABLE_HEIGHT:
-                grid[x][y] = result.lower()
-    
-    return grid
+def parse_bead_road_svg(svg_code, streaming=True):
+    # 스트리밍 모드는 트리를 만들지 않고 좌표 노드만 바로 그리드에 채움
+    cells = iter_bead_road_cells(svg_code) if streaming else iter_bead_road_cells_soup(svg_code)
+    return BeadGrid.from_cells(cells, TABLE_WIDTH, TABLE_HEIGHT)
 
 def display_grid(grid):
     st.markdown("""
@@ -123,7 +116,7 @@ def display_grid(grid):
     for y in range(6):
         html_table.append('<div class="grid-row">')
         for x in range(15):
-            cell = grid[x][y]
+            cell = grid.cell(x, y)
             css_class = 'banker' if cell == 'b' else 'player' if cell == 'p' else 'tie' if cell == 't' else ''
             html_table.append(f'<div class="bead-road-cell {css_class}">{cell.upper() if cell else "&nbsp;"}</div>')
         html_table.append('</div>')
@@ -181,8 +174,8 @@ def display_zones(zones):
     html_zone = ['<div class="zone-container">']
     for y in range(6):
         html_zone.append('<div class="zone-row">')
-        for x in range(len(first_zone['zone_data'])):
-            cell = first_zone['zone_data'][x][y]
+        for x in range(first_zone['zone_data'].width):
+            cell = first_zone['zone_data'].cell(x, y)
             css_class = 'banker' if cell == 'b' else 'player' if cell == 'p' else 'tie' if cell == 't' else ''
             html_zone.append(f'<div class="zone-cell {css_class}">{cell.upper() if cell else "&nbsp;"}</div>')
         html_zone.append('</div>')
@@ -200,7 +193,7 @@ def display_zones(zones):
         for y in pattern['rows']:
             pattern_html.append('<div class="zone-row">')
             for x in pattern['columns']:
-                cell = first_zone['zone_data'][x - first_zone['start_x']][y]
+                cell = first_zone['zone_data'].cell(x - first_zone['start_x'], y)
                 css_class = 'banker' if cell == 'b' else 'player' if cell == 'p' else 'tie' if cell == 't' else ''
                 pattern_html.append(f'<div class="zone-cell {css_class}">{cell.upper() if cell else "&nbsp;"}</div>')
             pattern_html.append('</div>')
@@ -208,17 +201,18 @@ def display_zones(zones):
         st.markdown(''.join(pattern_html), unsafe_allow_html=True)
 
 def divide_grid_into_overlapping_zones(grid, zone_width=3):
-    zones = []
-    for start_x in range(15 - zone_width + 1):
-        end_x = start_x + zone_width
-        zone_data = [[grid[x][y] for y in range(6)] for x in range(start_x, end_x)]
-        if any(cell in {'b', 't', 'p'} for column in zone_data for cell in column):
-            zones.append({
-                'zone_data': zone_data,
-                'start_x': start_x,
-                'end_x': end_x - 1
-            })
-    return zones
+    """
+    그리드를 겹치는 구간으로 나누고 구간별 패턴 코드와 그룹 문자열을 한 번에 계산합니다.
+    
+    Returns:
+        list: 구간 dict 리스트 (zone_data, start_x, end_x, pattern_codes, pattern_123, pattern_1234)
+    """
+    try:
+        groups = get_pattern_index().groups
+    except Exception as e:
+        st.error(f"패턴 그룹 검색 중 오류 발생: {str(e)}")
+        groups = None
+    return extract_zones(grid, groups, zone_width)
 
 def find_pattern_group(pattern_values):
     """
@@ -231,20 +225,8 @@ def find_pattern_group(pattern_values):
         str or None: 패턴의 그룹 값 ('a' 또는 'b'), 없으면 None
     """
     try:
-        with open('pattern.json', 'r') as f:
-            pattern_data = json.load(f)
-        
-        # 입력된 패턴을 소문자로 변환
-        pattern_values = [v.lower() for v in pattern_values if v]  # 빈 문자열 제외
-        
-        # groupA와 groupB의 모든 패턴을 검사
-        for group_name in ['groupA', 'groupB']:
-            patterns = pattern_data['patterns'][group_name]
-            for pattern in patterns:
-                if pattern.get('sequence') == pattern_values:
-                    return pattern.get('group', group_name[5].lower())  # group 값이 없으면 'a' 또는 'b' 반환
-        
-        return None
+        # 컴파일된 64칸 분류 테이블에서 조회 (소스 JSON 변경 시에만 다시 컴파일)
+        return get_pattern_index().group_for(pattern_values)
     except Exception as e:
         st.error(f"패턴 그룹 검색 중 오류 발생: {str(e)}")
         return None
@@ -254,7 +236,7 @@ def get_pattern_values(grid, pattern_positions):
     패턴의 좌표를 사용하여 그리드에서 값을 추출합니다.
     
     Args:
-        grid (list): 전체 그리드 데이터
+        grid (BeadGrid): 전체 그리드 데이터
         pattern_positions (list): 패턴의 좌표 리스트 [(x1,y1), (x2,y2), ...]
     
     Returns:
@@ -262,7 +244,7 @@ def get_pattern_values(grid, pattern_positions):
     """
     values = []
     for x, y in pattern_positions:
-        value = grid[x][y]
+        value = grid.cell(x, y)
         if value:
             values.append(value.upper())
         else:
@@ -286,56 +268,9 @@ def display_pattern_groups(zones):
     
     # 모든 그룹에 대해 패턴 분석
     for zone in zones:
-        patterns = get_pattern_positions()
-        group_patterns = [p for p in patterns if p['columns'][0] >= zone['start_x'] and p['columns'][1] <= zone['end_x']]
-        
-        if len(group_patterns) < 4:  # 최소 4개의 패턴이 필요
-            continue
-            
-        # 패턴 값 추출
-        pattern_values = []
-        for pattern in group_patterns[:4]:  # 처음 4개의 패턴만 사용
-            values = []
-            for x, y in pattern['coordinates']:
-                relative_x = x - zone['start_x']
-                value = zone['zone_data'][relative_x][y]
-                if value:
-                    values.append(value.upper())
-            pattern_values.append(values)
-            
-        # 패턴 123과 1234의 그룹 검색
-        groups_123 = []
-        groups_1234 = []
-        
-        # 패턴 123 검색
-        pattern_123_valid = True
-        if len(pattern_values) >= 3:
-            for i in range(3):
-                if not pattern_values[i]:
-                    pattern_123_valid = False
-                    break
-                group = find_pattern_group(pattern_values[i])
-                if group is None:
-                    pattern_123_valid = False
-                    break
-                groups_123.append(group)
-        
-        # 패턴 1234 검색
-        pattern_1234_valid = True
-        if len(pattern_values) >= 4:
-            for i in range(4):
-                if not pattern_values[i]:
-                    pattern_1234_valid = False
-                    break
-                group = find_pattern_group(pattern_values[i])
-                if group is None:
-                    pattern_1234_valid = False
-                    break
-                groups_1234.append(group)
-        
-        # 결과 문자열 생성
-        pattern_123_text = ''.join(groups_123) if pattern_123_valid and len(groups_123) == 3 else ''
-        pattern_1234_text = ''.join(groups_1234) if pattern_1234_valid and len(groups_1234) == 4 else ''
+        # 구간 분할 시 함께 계산된 그룹 문자열 사용
+        pattern_123_text = zone['pattern_123']
+        pattern_1234_text = zone['pattern_1234']
         
         # 그룹 범위 텍스트
         group_range = f"{zone['start_x'] + 1}-{zone['end_x'] + 1}"
@@ -367,147 +302,14 @@ def display_pattern_groups(zones):
 
 def get_pattern_statistics():
     """
-    DB에서 패턴 통계를 계산합니다.
+    DB에서 패턴 통계를 계산합니다 (쿼리 1회).
     """
     try:
         conn = sqlite3.connect('pattern_analysis.db')
-        c = conn.cursor()
-        
-        # 전체 레코드 수 확인
-        total_records = c.execute('SELECT COUNT(*) FROM pattern_records').fetchone()[0]
-        
-        # 현재 시간 기준 최근 3시간 타임스탬프 계산 (YYMMDDHH 형식)
-        current_time = datetime.now()
-        three_hours_ago = current_time - timedelta(hours=3)
-        recent_timestamp = three_hours_ago.strftime("%y%m%d%H")
-        
-        if total_records <= 100:
-            # 전체 레코드에 대한 통계
-            r1_stats = c.execute('''
-                SELECT pattern1 || result1 as p1r1, COUNT(*) as count
-                FROM pattern_records
-                WHERE result1 != ''
-                GROUP BY p1r1
-                ORDER BY count DESC
-            ''').fetchall()
-            
-            r2_stats = c.execute('''
-                SELECT pattern2 || result2 as p2r2, COUNT(*) as count
-                FROM pattern_records
-                WHERE result2 != ''
-                GROUP BY p2r2
-                ORDER BY count DESC
-            ''').fetchall()
-            
-            sample_size = total_records
-            
-        else:
-            # 최근 3시간 레코드 수 확인
-            recent_count = c.execute(
-                'SELECT COUNT(*) FROM pattern_records WHERE timestamp >= ?',
-                (recent_timestamp,)
-            ).fetchone()[0]
-            
-            # 최근 3시간과 최근 100개 중 큰 수로 결정
-            if recent_count > 100:
-                # 최근 3시간 데이터 사용
-                r1_stats = c.execute('''
-                    SELECT pattern1 || result1 as p1r1, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result1 != '' AND timestamp >= ?
-                    GROUP BY p1r1
-                    ORDER BY count DESC
-                ''', (recent_timestamp,)).fetchall()
-                
-                r2_stats = c.execute('''
-                    SELECT pattern2 || result2 as p2r2, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result2 != '' AND timestamp >= ?
-                    GROUP BY p2r2
-                    ORDER BY count DESC
-                ''', (recent_timestamp,)).fetchall()
-                
-                sample_size = recent_count
-                
-            else:
-                # 최근 100개 데이터 사용
-                r1_stats = c.execute('''
-                    SELECT pattern1 || result1 as p1r1, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result1 != ''
-                    GROUP BY p1r1
-                    ORDER BY count DESC
-                    LIMIT 100
-                ''').fetchall()
-                
-                r2_stats = c.execute('''
-                    SELECT pattern2 || result2 as p2r2, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result2 != ''
-                    GROUP BY p2r2
-                    ORDER BY count DESC
-                    LIMIT 100
-                ''').fetchall()
-                
-                sample_size = 100
-
-        # P1 패턴을 그룹화하고 정렬
-        p1_groups = {
-            'aa': [], 'ab': [], 'ba': [], 'bb': []
-        }
-        
-        # P2 패턴을 그룹화하고 정렬
-        p2_groups = {
-            'bba': [], 'baa': [], 'abb': [], 'aab': [],
-            'aba': [], 'aaa': [], 'bbb': [], 'bab': []
-        }
-        
-        # 각 P1 패턴을 해당 그룹에 할당
-        for pattern, count in r1_stats:
-            if len(pattern) >= 2:
-                group_key = pattern[:2].lower()
-                if group_key in p1_groups:
-                    p1_groups[group_key].append((pattern, count))
-
-        # 각 P2 패턴을 해당 그룹에 할당
-        for pattern, count in r2_stats:
-            if len(pattern) >= 3:
-                group_key = pattern[:3].lower()
-                if group_key in p2_groups:
-                    p2_groups[group_key].append((pattern, count))
-
-        # P1 그룹의 최대 카운트를 계산
-        p1_group_max_counts = {}
-        for group, patterns in p1_groups.items():
-            if patterns:
-                p1_group_max_counts[group] = max(count for _, count in patterns)
-            else:
-                p1_group_max_counts[group] = 0
-
-        # P2 그룹의 최대 카운트를 계산
-        p2_group_max_counts = {}
-        for group, patterns in p2_groups.items():
-            if patterns:
-                p2_group_max_counts[group] = max(count for _, count in patterns)
-            else:
-                p2_group_max_counts[group] = 0
-
-        # 그룹들을 최대 카운트 기준으로 정렬
-        sorted_p1_groups = sorted(p1_groups.items(), 
-                                key=lambda x: p1_group_max_counts[x[0]], 
-                                reverse=True)
-        
-        sorted_p2_groups = sorted(p2_groups.items(),
-                                key=lambda x: p2_group_max_counts[x[0]],
-                                reverse=True)
-
-        conn.close()
-        return {
-            'total_records': total_records,
-            'sample_size': sample_size,
-            'p1_groups': sorted_p1_groups,
-            'p2_groups': sorted_p2_groups
-        }
+        try:
+            return query_pattern_statistics(conn, 'timestamp', recent_text_timestamp())
+        finally:
+            conn.close()
         
     except Exception as e:
         st.error(f"통계 데이터 조회 중 오류 발생: {str(e)}")
@@ -1,49 +1,23 @@
 import streamlit as st
-from bs4 import BeautifulSoup
-import sqlite3
-from datetime import datetime, timedelta
-import json
+import os
 import pandas as pd
 
+from bead_grid import BeadGrid, convert_tie_values
+from bead_road import iter_bead_road_cells, iter_bead_road_cells_soup
+from feature_store import materialize_features
+from pattern_lookup import get_pattern_index
+from pattern_records import format_timestamp, save_analysis_batch
+from pattern_statistics import RollingPatternStatistics
+from storage import get_connection, transaction
+from zone_extraction import extract_zones
+
+# 사이드바 롤링 통계를 매번 SQL 집계와 비교하는 일관성 검사 모드
+STATS_CONSISTENCY_CHECK = os.environ.get('PATTERN_STATS_CHECK') == '1'
+
 # Database setup
 def init_db():
-    conn = sqlite3.connect('pattern_analysis_v2.db')
-    c = conn.cursor()
-    
-    # pattern_records 테이블 생성 (이미 존재하면 생성하지 않음)
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS pattern_records (
-            round INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            group_range TEXT,
-            pattern1 TEXT,
-            result1 TEXT,
-            pattern2 TEXT,
-            result2 TEXT,
-            prev_pattern1 TEXT,
-            prev_pattern2 TEXT,
-            transition_type TEXT,
-            transition_count INTEGER DEFAULT 1,
-            pattern1_banker_count INTEGER,
-            pattern1_player_count INTEGER,
-            pattern2_banker_count INTEGER,
-            pattern2_player_count INTEGER,
-            pattern1_transitions INTEGER,
-            pattern2_transitions INTEGER
-        )
-    ''')
-    
-    # group_sequences 테이블 생성 (이미 존재하면 생성하지 않음)
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS group_sequences (
-            round INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT,
-            tot TEXT
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    # 프로세스 공유 연결을 열면서 pattern_records / group_sequences 테이블 생성 (이미 존재하면 생성하지 않음)
+    get_connection()
 
 # Initialize database when the app starts
 init_db()
@@ -58,85 +32,47 @@ def save_pattern_record(group_range, pattern_123, pattern_1234):
         pattern_123 (str): 패턴 123의 그룹 값 (예: "aab")
         pattern_1234 (str): 패턴 1234의 그룹 값 (예: "aabb")
     """
+    save_pattern_records([{
+        'group_range': group_range,
+        'pattern_123': pattern_123,
+        'pattern_1234': pattern_1234
+    }])
+
+def save_pattern_records(analysis_results, tot_value=None):
+    """
+    여러 구간의 패턴 분석 결과와 그룹 시퀀스를 하나의 트랜잭션으로 저장합니다.
+    
+    Args:
+        analysis_results (list): {'group_range', 'pattern_123', 'pattern_1234'} dict 리스트
+        tot_value (str): 모든 그룹의 앞 2개 값을 연결한 문자열 (없으면 저장하지 않음)
+    
+    Returns:
+        bool: 저장 성공 여부
+    """
     # Format timestamp as YYMMDDHHMM
-    current_time = datetime.now()
-    timestamp = current_time.strftime("%y%m%d%H%M")
+    timestamp = format_timestamp()
     
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        c = conn.cursor()
-        
-        # 이전 패턴 조회
-        prev_record = c.execute('''
-            SELECT pattern1, pattern2 
-            FROM pattern_records 
-            ORDER BY round DESC LIMIT 1
-        ''').fetchone()
-        
-        # 이전 패턴이 있는 경우 전이 관계 계산
-        prev_pattern1 = prev_record[0] if prev_record else None
-        prev_pattern2 = prev_record[1] if prev_record else None
-        transition_type = None
-        transition_count = 1
-        
-        if prev_pattern1 and pattern_123:
-            transition_type = f"{prev_pattern1}->{pattern_123[:2]}"
-            # 동일한 전이 패턴의 이전 기록 확인
-            prev_transition = c.execute('''
-                SELECT transition_count 
-                FROM pattern_records 
-                WHERE transition_type = ? 
-                ORDER BY round DESC LIMIT 1
-            ''', (transition_type,)).fetchone()
-            if prev_transition:
-                transition_count = prev_transition[0] + 1
-        
-        # 패턴 특성 계산
-        def calculate_pattern_stats(pattern):
-            if not pattern:
-                return 0, 0, 0
-            banker_count = pattern.count('a')
-            player_count = pattern.count('b')
-            transitions = sum(1 for i in range(len(pattern)-1) if pattern[i] != pattern[i+1])
-            return banker_count, player_count, transitions
-        
-        # 패턴 123 특성 계산
-        pattern1 = pattern_123[:2] if pattern_123 else ''
-        pattern1_banker_count, pattern1_player_count, pattern1_transitions = calculate_pattern_stats(pattern1)
-        
-        # 패턴 1234 특성 계산
-        pattern2 = pattern_1234[:3] if pattern_1234 else ''
-        pattern2_banker_count, pattern2_player_count, pattern2_transitions = calculate_pattern_stats(pattern2)
-        
-        # 패턴 레코드 저장
-        c.execute('''
-            INSERT INTO pattern_records 
-            (timestamp, group_range, pattern1, result1, pattern2, result2,
-             prev_pattern1, prev_pattern2, transition_type, transition_count,
-             pattern1_banker_count, pattern1_player_count, pattern2_banker_count, pattern2_player_count,
-             pattern1_transitions, pattern2_transitions)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp, group_range, 
-              pattern1, pattern_123[2] if len(pattern_123) >= 3 else '',
-              pattern2, pattern_1234[3] if len(pattern_1234) >= 4 else '',
-              prev_pattern1, prev_pattern2, transition_type, transition_count,
-              pattern1_banker_count, pattern1_player_count, pattern2_banker_count, pattern2_player_count,
-              pattern1_transitions, pattern2_transitions))
-        
-        conn.commit()
+        # 전체 배치를 executemany로 삽입하고 한 번만 커밋 (예외 시 전체 롤백)
+        with transaction() as conn:
+            pattern_rows = save_analysis_batch(conn, timestamp, analysis_results, tot_value)
+            # 학습/추론용 특성을 같은 트랜잭션에서 새 레코드만큼 갱신
+            materialize_features(conn)
+            last_round = conn.execute('SELECT MAX(round) FROM pattern_records').fetchone()[0]
+        # 사이드바 롤링 통계에 저장한 레코드만 추가
+        get_rolling_statistics().add(pattern_rows, last_round)
+        return True
     except Exception as e:
         st.error(f"데이터 저장 중 오류 발생: {str(e)}")
-    finally:
-        conn.close()
+        return False
 
 # Function to display pattern records
 def display_pattern_records():
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
+        conn = get_connection()
         c = conn.cursor()
         # 라운드 내림차순으로 정렬 (최신순)
         records = c.execute('SELECT * FROM pattern_records ORDER BY round DESC LIMIT 10').fetchall()
-        conn.close()
         
         st.markdown("### 패턴 분석 기록")
         if records:
@@ -168,21 +104,10 @@ PATTERN_WIDTH = 2
 PATTERN_TOP_ROWS = [0,1,2]
 PATTERN_BOTTOM_ROWS = [3,4,5]
 
-def parse_bead_road_svg(svg_code):
-    soup = BeautifulSoup(svg_code, 'html.parser')
-    grid = [['' for _ in range(TABLE_HEIGHT)] for _ in range(TABLE_WIDTH)]
-    
-    coordinates = soup.find_all('svg', attrs={'data-type': 'coordinates'})
-    for coord in coordinates:
-        x = int(float(coord.get('data-x', 0)))
-        y = int(float(coord.get('data-y', 0)))
-        text_elem = coord.find('text')
-        if text_elem and text_elem.string:
-            result = text_elem.string.strip()
-            if 0 <= x < TABLE_WIDTH and 0 <= y < TABLE_HEIGHT:
-                grid[x][y] = result.lower()
-    
-    return grid
+def parse_bead_road_svg(svg_code, streaming=True):
+    # 스트리밍 모드는 트리를 만들지 않고 좌표 노드만 바로 그리드에 채움
+    cells = iter_bead_road_cells(svg_code) if streaming else iter_bead_road_cells_soup(svg_code)
+    return BeadGrid.from_cells(cells, TABLE_WIDTH, TABLE_HEIGHT)
 
 def display_grid(grid):
     st.markdown("""
@@ -201,7 +126,7 @@ def display_grid(grid):
     for y in range(6):
         html_table.append('<div class="grid-row">')
         for x in range(15):
-            cell = grid[x][y]
+            cell = grid.cell(x, y)
             css_class = 'banker' if cell == 'b' else 'player' if cell == 'p' else 'tie' if cell == 't' else ''
             html_table.append(f'<div class="bead-road-cell {css_class}">{cell.upper() if cell else "&nbsp;"}</div>')
         html_table.append('</div>')
@@ -259,8 +184,8 @@ def display_zones(zones):
     html_zone = ['<div class="zone-container">']
     for y in range(6):
         html_zone.append('<div class="zone-row">')
-        for x in range(len(first_zone['zone_data'])):
-            cell = first_zone['zone_data'][x][y]
+        for x in range(first_zone['zone_data'].width):
+            cell = first_zone['zone_data'].cell(x, y)
             css_class = 'banker' if cell == 'b' else 'player' if cell == 'p' else 'tie' if cell == 't' else ''
             html_zone.append(f'<div class="zone-cell {css_class}">{cell.upper() if cell else "&nbsp;"}</div>')
         html_zone.append('</div>')
@@ -278,7 +203,7 @@ def display_zones(zones):
         for y in pattern['rows']:
             pattern_html.append('<div class="zone-row">')
             for x in pattern['columns']:
-                cell = first_zone['zone_data'][x - first_zone['start_x']][y]
+                cell = first_zone['zone_data'].cell(x - first_zone['start_x'], y)
                 css_class = 'banker' if cell == 'b' else 'player' if cell == 'p' else 'tie' if cell == 't' else ''
                 pattern_html.append(f'<div class="zone-cell {css_class}">{cell.upper() if cell else "&nbsp;"}</div>')
             pattern_html.append('</div>')
@@ -286,17 +211,18 @@ def display_zones(zones):
         st.markdown(''.join(pattern_html), unsafe_allow_html=True)
 
 def divide_grid_into_overlapping_zones(grid, zone_width=3):
-    zones = []
-    for start_x in range(15 - zone_width + 1):
-        end_x = start_x + zone_width
-        zone_data = [[grid[x][y] for y in range(6)] for x in range(start_x, end_x)]
-        if any(cell in {'b', 't', 'p'} for column in zone_data for cell in column):
-            zones.append({
-                'zone_data': zone_data,
-                'start_x': start_x,
-                'end_x': end_x - 1
-            })
-    return zones
+    """
+    그리드를 겹치는 구간으로 나누고 구간별 패턴 코드와 그룹 문자열을 한 번에 계산합니다.
+    
+    Returns:
+        list: 구간 dict 리스트 (zone_data, start_x, end_x, pattern_codes, pattern_123, pattern_1234)
+    """
+    try:
+        groups = get_pattern_index().groups
+    except Exception as e:
+        st.error(f"패턴 그룹 검색 중 오류 발생: {str(e)}")
+        groups = None
+    return extract_zones(grid, groups, zone_width)
 
 def find_pattern_group(pattern_values):
     """
@@ -309,20 +235,8 @@ def find_pattern_group(pattern_values):
         str or None: 패턴의 그룹 값 ('a' 또는 'b'), 없으면 None
     """
     try:
-        with open('pattern.json', 'r') as f:
-            pattern_data = json.load(f)
-        
-        # 입력된 패턴을 소문자로 변환
-        pattern_values = [v.lower() for v in pattern_values if v]  # 빈 문자열 제외
-        
-        # groupA와 groupB의 모든 패턴을 검사
-        for group_name in ['groupA', 'groupB']:
-            patterns = pattern_data['patterns'][group_name]
-            for pattern in patterns:
-                if pattern.get('sequence') == pattern_values:
-                    return pattern.get('group', group_name[5].lower())  # group 값이 없으면 'a' 또는 'b' 반환
-        
-        return None
+        # 컴파일된 64칸 분류 테이블에서 조회 (소스 JSON 변경 시에만 다시 컴파일)
+        return get_pattern_index().group_for(pattern_values)
     except Exception as e:
         st.error(f"패턴 그룹 검색 중 오류 발생: {str(e)}")
         return None
@@ -332,7 +246,7 @@ def get_pattern_values(grid, pattern_positions):
     패턴의 좌표를 사용하여 그리드에서 값을 추출합니다.
     
     Args:
-        grid (list): 전체 그리드 데이터
+        grid (BeadGrid): 전체 그리드 데이터
         pattern_positions (list): 패턴의 좌표 리스트 [(x1,y1), (x2,y2), ...]
     
     Returns:
@@ -340,7 +254,7 @@ def get_pattern_values(grid, pattern_positions):
     """
     values = []
     for x, y in pattern_positions:
-        value = grid[x][y]
+        value = grid.cell(x, y)
         if value:
             values.append(value.upper())
         else:
@@ -364,32 +278,6 @@ def get_all_groups_first_two_values(zones):
             result += first_two
     return result
 
-def save_group_sequence(tot_value):
-    """
-    그룹 시퀀스를 저장합니다.
-    
-    Args:
-        tot_value (str): 모든 그룹의 앞 2개 값을 연결한 문자열
-    """
-    try:
-        # Format timestamp as YYMMDDHHMM
-        current_time = datetime.now()
-        timestamp = current_time.strftime("%y%m%d%H%M")
-        
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        c = conn.cursor()
-        
-        c.execute('''
-            INSERT INTO group_sequences 
-            (timestamp, tot)
-            VALUES (?, ?)
-        ''', (timestamp, tot_value))
-        
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        st.error(f"그룹 시퀀스 저장 중 오류 발생: {str(e)}")
-
 def display_pattern_groups(zones):
     """
     패턴의 그룹 분석 결과를 별도 섹션에 표시합니다.
@@ -413,56 +301,9 @@ def display_pattern_groups(zones):
     
     # 기존 코드 유지
     for zone in zones:
-        patterns = get_pattern_positions()
-        group_patterns = [p for p in patterns if p['columns'][0] >= zone['start_x'] and p['columns'][1] <= zone['end_x']]
-        
-        if len(group_patterns) < 4:  # 최소 4개의 패턴이 필요
-            continue
-            
-        # 패턴 값 추출
-        pattern_values = []
-        for pattern in group_patterns[:4]:  # 처음 4개의 패턴만 사용
-            values = []
-            for x, y in pattern['coordinates']:
-                relative_x = x - zone['start_x']
-                value = zone['zone_data'][relative_x][y]
-                if value:
-                    values.append(value.upper())
-            pattern_values.append(values)
-            
-        # 패턴 123과 1234의 그룹 검색
-        groups_123 = []
-        groups_1234 = []
-        
-        # 패턴 123 검색
-        pattern_123_valid = True
-        if len(pattern_values) >= 3:
-            for i in range(3):
-                if not pattern_values[i]:
-                    pattern_123_valid = False
-                    break
-                group = find_pattern_group(pattern_values[i])
-                if group is None:
-                    pattern_123_valid = False
-                    break
-                groups_123.append(group)
-        
-        # 패턴 1234 검색
-        pattern_1234_valid = True
-        if len(pattern_values) >= 4:
-            for i in range(4):
-                if not pattern_values[i]:
-                    pattern_1234_valid = False
-                    break
-                group = find_pattern_group(pattern_values[i])
-                if group is None:
-                    pattern_1234_valid = False
-                    break
-                groups_1234.append(group)
-        
-        # 결과 문자열 생성
-        pattern_123_text = ''.join(groups_123) if pattern_123_valid and len(groups_123) == 3 else ''
-        pattern_1234_text = ''.join(groups_1234) if pattern_1234_valid and len(groups_1234) == 4 else ''
+        # 구간 분할 시 함께 계산된 그룹 문자열 사용
+        pattern_123_text = zone['pattern_123']
+        pattern_1234_text = zone['pattern_1234']
         
         # 앞 2개 값 추출
         first_two = get_first_two_group_values(zone)
@@ -488,163 +329,31 @@ def display_pattern_groups(zones):
     # 저장 버튼 배치
     with col2:
         if st.button("패턴 저장"):
-            # 패턴 레코드 저장
-            for result in analysis_results:
-                save_pattern_record(
-                    result['group_range'],
-                    result['pattern_123'],
-                    result['pattern_1234']
-                )
-            
-            # 그룹 시퀀스 저장
-            if all_first_two:
-                save_group_sequence(all_first_two)
-            
-            st.success("패턴이 저장되었습니다!")
+            # 패턴 레코드와 그룹 시퀀스를 한 트랜잭션으로 저장
+            if save_pattern_records(analysis_results, all_first_two):
+                st.success("패턴이 저장되었습니다!")
+
+@st.cache_resource
+def get_rolling_statistics():
+    """프로세스 전체에서 공유하는 사이드바 롤링 통계 (첫 조회 때 DB에서 채움)"""
+    return RollingPatternStatistics()
 
 def get_pattern_statistics():
     """
-    DB에서 패턴 통계를 계산합니다.
+    패턴 통계를 롤링 카운터에서 읽습니다.
+    PATTERN_STATS_CHECK=1 이면 매번 SQL 집계와 비교하고, 다르면 경고 후 SQL 결과를 사용합니다.
     """
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        c = conn.cursor()
+        conn = get_connection()
+        rolling = get_rolling_statistics()
+        if not STATS_CONSISTENCY_CHECK:
+            return rolling.statistics(conn)
         
-        # 전체 레코드 수 확인
-        total_records = c.execute('SELECT COUNT(*) FROM pattern_records').fetchone()[0]
-        
-        # 현재 시간 기준 최근 3시간 타임스탬프 계산 (YYMMDDHH 형식)
-        current_time = datetime.now()
-        three_hours_ago = current_time - timedelta(hours=3)
-        recent_timestamp = three_hours_ago.strftime("%y%m%d%H")
-        
-        if total_records <= 100:
-            # 전체 레코드에 대한 통계
-            r1_stats = c.execute('''
-                SELECT pattern1 || result1 as p1r1, COUNT(*) as count
-                FROM pattern_records
-                WHERE result1 != ''
-                GROUP BY p1r1
-                ORDER BY count DESC
-            ''').fetchall()
-            
-            r2_stats = c.execute('''
-                SELECT pattern2 || result2 as p2r2, COUNT(*) as count
-                FROM pattern_records
-                WHERE result2 != ''
-                GROUP BY p2r2
-                ORDER BY count DESC
-            ''').fetchall()
-            
-            sample_size = total_records
-            
-        else:
-            # 최근 3시간 레코드 수 확인
-            recent_count = c.execute(
-                'SELECT COUNT(*) FROM pattern_records WHERE timestamp >= ?',
-                (recent_timestamp,)
-            ).fetchone()[0]
-            
-            # 최근 3시간과 최근 100개 중 큰 수로 결정
-            if recent_count > 100:
-                # 최근 3시간 데이터 사용
-                r1_stats = c.execute('''
-                    SELECT pattern1 || result1 as p1r1, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result1 != '' AND timestamp >= ?
-                    GROUP BY p1r1
-                    ORDER BY count DESC
-                ''', (recent_timestamp,)).fetchall()
-                
-                r2_stats = c.execute('''
-                    SELECT pattern2 || result2 as p2r2, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result2 != '' AND timestamp >= ?
-                    GROUP BY p2r2
-                    ORDER BY count DESC
-                ''', (recent_timestamp,)).fetchall()
-                
-                sample_size = recent_count
-                
-            else:
-                # 최근 100개 데이터 사용
-                r1_stats = c.execute('''
-                    SELECT pattern1 || result1 as p1r1, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result1 != ''
-                    GROUP BY p1r1
-                    ORDER BY count DESC
-                    LIMIT 100
-                ''').fetchall()
-                
-                r2_stats = c.execute('''
-                    SELECT pattern2 || result2 as p2r2, COUNT(*) as count
-                    FROM pattern_records
-                    WHERE result2 != ''
-                    GROUP BY p2r2
-                    ORDER BY count DESC
-                    LIMIT 100
-                ''').fetchall()
-                
-                sample_size = 100
-
-        # P1 패턴을 그룹화하고 정렬
-        p1_groups = {
-            'aa': [], 'ab': [], 'ba': [], 'bb': []
-        }
-        
-        # P2 패턴을 그룹화하고 정렬
-        p2_groups = {
-            'bba': [], 'baa': [], 'abb': [], 'aab': [],
-            'aba': [], 'aaa': [], 'bbb': [], 'bab': []
-        }
-        
-        # 각 P1 패턴을 해당 그룹에 할당
-        for pattern, count in r1_stats:
-            if len(pattern) >= 2:
-                group_key = pattern[:2].lower()
-                if group_key in p1_groups:
-                    p1_groups[group_key].append((pattern, count))
-
-        # 각 P2 패턴을 해당 그룹에 할당
-        for pattern, count in r2_stats:
-            if len(pattern) >= 3:
-                group_key = pattern[:3].lower()
-                if group_key in p2_groups:
-                    p2_groups[group_key].append((pattern, count))
-
-        # P1 그룹의 최대 카운트를 계산
-        p1_group_max_counts = {}
-        for group, patterns in p1_groups.items():
-            if patterns:
-                p1_group_max_counts[group] = max(count for _, count in patterns)
-            else:
-                p1_group_max_counts[group] = 0
-
-        # P2 그룹의 최대 카운트를 계산
-        p2_group_max_counts = {}
-        for group, patterns in p2_groups.items():
-            if patterns:
-                p2_group_max_counts[group] = max(count for _, count in patterns)
-            else:
-                p2_group_max_counts[group] = 0
-
-        # 그룹들을 최대 카운트 기준으로 정렬
-        sorted_p1_groups = sorted(p1_groups.items(), 
-                                key=lambda x: p1_group_max_counts[x[0]], 
-                                reverse=True)
-        
-        sorted_p2_groups = sorted(p2_groups.items(),
-                                key=lambda x: p2_group_max_counts[x[0]],
-                                reverse=True)
-
-        conn.close()
-        return {
-            'total_records': total_records,
-            'sample_size': sample_size,
-            'p1_groups': sorted_p1_groups,
-            'p2_groups': sorted_p2_groups
-        }
+        consistent, expected = rolling.check(conn)
+        if not consistent:
+            st.warning("롤링 통계가 DB 집계와 달라 DB에서 다시 채웁니다.")
+            rolling.invalidate()
+        return expected
         
     except Exception as e:
         st.error(f"통계 데이터 조회 중 오류 발생: {str(e)}")
@@ -709,55 +418,22 @@ def display_pattern_statistics(stats):
                     st.write(f"{pattern}: {count}회 ({group_percentage:.1f}%)")
             st.write("---")
 
-def convert_tie_values(grid):
-    """
-    T 값을 규칙에 따라 변환합니다.
-    """
-    converted_grid = [row[:] for row in grid]  # 그리드 복사
-    
-    # 1열 규칙 적용
-    for y in range(6):
-        if converted_grid[0][y] == 't':
-            if y == 0:  # 1행 1열
-                converted_grid[0][y] = converted_grid[0][1]  # 2행 1열의 값으로 변환
-            else:  # 1열 나머지 행
-                converted_grid[0][y] = converted_grid[0][y-1]  # 이전 행의 값으로 변환
-    
-    # 나머지 열 규칙 적용
-    for x in range(1, 15):
-        for y in range(6):
-            if converted_grid[x][y] == 't':
-                if y == 0:  # 각 열의 첫 번째 행
-                    converted_grid[x][y] = converted_grid[x-1][y]  # 이전 열 첫 번째 값으로 변환
-                else:  # 나머지 행
-                    # 왼쪽, 왼쪽 위, 위 값 카운트
-                    values = {
-                        converted_grid[x-1][y]: 1,  # 왼쪽
-                        converted_grid[x-1][y-1]: 1,  # 왼쪽 위
-                        converted_grid[x][y-1]: 1  # 위
-                    }
-                    # 가장 많은 값으로 변환
-                    max_value = max(values.items(), key=lambda x: x[1])[0]
-                    converted_grid[x][y] = max_value
-    
-    return converted_grid
-
 def get_group_ratio_trend():
     """
     시간대별 그룹 비율 추이를 계산합니다.
     """
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
+        conn = get_connection()
         c = conn.cursor()
         
         # 시간대별 그룹 카운트 조회
         c.execute('''
             SELECT 
-                substr(timestamp, 1, 8) as date_hour,
+                substr(strftime('%Y%m%d%H', timestamp_epoch, 'unixepoch', 'localtime'), 3) as date_hour,
                 pattern1,
                 COUNT(*) as count
             FROM pattern_records
-            WHERE pattern1 != ''
+            WHERE pattern1 != '' AND timestamp_epoch IS NOT NULL
             GROUP BY date_hour, pattern1
             ORDER BY date_hour
         ''')
@@ -783,7 +459,6 @@ def get_group_ratio_trend():
                 }
                 ratio_series.append(ratios)
         
-        conn.close()
         return ratio_series
         
     except Exception as e:
@@ -811,45 +486,12 @@ def get_first_two_group_values(zone):
     패턴 그룹의 앞 2개 값을 추출합니다.
     
     Args:
-        zone (dict): 분석할 zone 데이터
+        zone (dict): divide_grid_into_overlapping_zones가 만든 zone 데이터
         
     Returns:
         str: 패턴 123 그룹의 앞 2개 문자 (예: 'ba')
     """
-    patterns = get_pattern_positions()
-    group_patterns = [p for p in patterns if p['columns'][0] >= zone['start_x'] and p['columns'][1] <= zone['end_x']]
-    
-    if len(group_patterns) < 4:  # 최소 4개의 패턴이 필요
-        return ''
-        
-    # 패턴 값 추출
-    pattern_values = []
-    for pattern in group_patterns[:4]:  # 처음 4개의 패턴만 사용
-        values = []
-        for x, y in pattern['coordinates']:
-            relative_x = x - zone['start_x']
-            value = zone['zone_data'][relative_x][y]
-            if value:
-                values.append(value.upper())
-        pattern_values.append(values)
-        
-    # 패턴 123의 그룹 검색
-    groups_123 = []
-    pattern_123_valid = True
-    
-    if len(pattern_values) >= 3:
-        for i in range(3):
-            if not pattern_values[i]:
-                pattern_123_valid = False
-                break
-            group = find_pattern_group(pattern_values[i])
-            if group is None:
-                pattern_123_valid = False
-                break
-            groups_123.append(group)
-    
-    # 결과 문자열 생성 및 앞 2개 문자 반환
-    pattern_123_text = ''.join(groups_123) if pattern_123_valid and len(groups_123) == 3 else ''
+    pattern_123_text = zone['pattern_123']
     return pattern_123_text[:2] if len(pattern_123_text) >= 2 else ''
 
 def display_recent_records():
@@ -857,7 +499,7 @@ def display_recent_records():
     최근 3개의 레코드를 테이블 형태로 표시합니다.
     """
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
+        conn = get_connection()
         c = conn.cursor()
         
         # pattern_records 테이블의 최근 3개 레코드
@@ -874,8 +516,6 @@ def display_recent_records():
             ORDER BY round DESC LIMIT 3
         ''').fetchall()
         
-        conn.close()
-        
         st.markdown("### 최근 기록")
         
         # Pattern Records 표시
@@ -0,0 +1,113 @@
+import numpy as np
+
+from pattern_lookup import SEQUENCE_LENGTH, TABLE_SIZE, decode_sequence
+
+# 그룹 패턴(pattern_123 / pattern_1234 및 그 앞부분) 비트 인코딩 (a 개수를 popcount로 셈)
+GROUP_BITS = {'b': 0, 'a': 1}
+MAX_GROUP_LENGTH = 4
+
+
+def _popcount(codes):
+    """정수 배열의 원소별 1 비트 수"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(codes).astype(np.int64)
+    return np.unpackbits(codes.astype(np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int64)
+
+
+def _bit_stats(codes, length):
+    """
+    길이 length인 비트 코드 배열의 (1 개수, 0 개수, 전환 횟수)를 계산합니다.
+    전환 횟수는 코드와 한 칸 민 코드의 XOR에서 인접한 length-1 쌍에 해당하는 비트만 셉니다.
+    """
+    ones = _popcount(codes)
+    pair_mask = (1 << max(length - 1, 0)) - 1
+    transitions = _popcount((codes ^ (codes >> 1)) & pair_mask)
+    return ones, length - ones, transitions
+
+
+def _build_sequence_table():
+    """6칸 b/p 시퀀스 64개의 characteristics (update_pattern_json 형식) 테이블"""
+    codes = np.arange(TABLE_SIZE, dtype=np.uint8)
+    # pattern_lookup.CELL_BITS 인코딩: b=0, p=1
+    player_counts, banker_counts, transitions = _bit_stats(codes, SEQUENCE_LENGTH)
+
+    table = []
+    for code in range(TABLE_SIZE):
+        banker_count = int(banker_counts[code])
+        player_count = int(player_counts[code])
+        sequence = decode_sequence(code)
+        table.append({
+            "banker_count": banker_count,
+            "player_count": player_count,
+            "sequence_type": "continuous" if SEQUENCE_LENGTH in (banker_count, player_count) else "mixed",
+            "start_with": sequence[0],
+            "end_with": sequence[-1],
+            "transitions": int(transitions[code]),
+        })
+    return table
+
+
+def _build_group_stats():
+    """길이 0~MAX_GROUP_LENGTH인 모든 a/b 그룹 패턴의 (a 개수, b 개수, 전환 횟수) 테이블"""
+    letters = {bit: letter for letter, bit in GROUP_BITS.items()}
+    stats = {}
+    for length in range(MAX_GROUP_LENGTH + 1):
+        codes = np.arange(1 << length, dtype=np.uint8)
+        ones, zeros, transitions = _bit_stats(codes, length)
+        for code in range(1 << length):
+            pattern = ''.join(letters[code >> shift & 1] for shift in range(length - 1, -1, -1))
+            stats[pattern] = (int(ones[code]), int(zeros[code]), int(transitions[code]))
+    return stats
+
+
+SEQUENCE_TABLE = _build_sequence_table()
+GROUP_STATS = _build_group_stats()
+
+# 소문자 b/p 6칸 시퀀스 → 코드 (원래 계산은 소문자만 세므로 대문자 입력은 테이블 밖으로 처리)
+_SEQUENCE_CODES = {tuple(decode_sequence(code)): code for code in range(TABLE_SIZE)}
+
+
+def _count_transitions(values):
+    return sum(1 for left, right in zip(values, values[1:]) if left != right)
+
+
+def sequence_characteristics(sequence):
+    """
+    6칸 b/p 시퀀스의 characteristics를 미리 계산한 테이블에서 조회합니다.
+
+    Args:
+        sequence (list or str): 패턴의 문자 리스트 (예: ['b', 'p', 'b', 'b', 'p', 'b'])
+
+    Returns:
+        dict: banker_count, player_count, sequence_type, start_with, end_with, transitions
+    """
+    code = _SEQUENCE_CODES.get(tuple(sequence))
+    if code is not None:
+        return dict(SEQUENCE_TABLE[code])
+
+    # 테이블 밖의 입력 (길이가 다르거나 b/p 외 문자, 대문자)은 직접 계산
+    banker_count = sequence.count('b')
+    player_count = sequence.count('p')
+    return {
+        "banker_count": banker_count,
+        "player_count": player_count,
+        "sequence_type": "continuous" if len(sequence) in (banker_count, player_count) else "mixed",
+        "start_with": sequence[0],
+        "end_with": sequence[-1],
+        "transitions": _count_transitions(sequence),
+    }
+
+
+def group_pattern_stats(pattern):
+    """
+    그룹 패턴의 a/b 개수와 전환 횟수를 미리 계산한 테이블에서 조회합니다.
+
+    Returns:
+        tuple: (banker_count, player_count, transitions)
+    """
+    stats = GROUP_STATS.get(pattern)
+    if stats is not None:
+        return stats
+    if not pattern:
+        return 0, 0, 0
+    return pattern.count('a'), pattern.count('b'), _count_transitions(pattern)
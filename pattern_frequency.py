@@ -0,0 +1,108 @@
+# 예측 테이블에 표시하는 패턴 (패턴1 4개, 패턴2 8개)
+PATTERN1_KEYS = ('aa', 'ab', 'ba', 'bb')
+PATTERN2_KEYS = ('aaa', 'aab', 'aba', 'abb', 'baa', 'bab', 'bba', 'bbb')
+
+
+def _missing(value):
+    # float NaN은 자기 자신과 같지 않음 (pd.isna와 같은 판정)
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def build_outcome_table(df):
+    """
+    전이 데이터에서 패턴별 다음 결과 빈도표를 한 번의 groupby로 만듭니다.
+
+    Args:
+        df (pd.DataFrame): pattern1, result1, pattern2, result2 컬럼을 가진 전이 데이터
+
+    Returns:
+        dict: {패턴: {'total': pattern1 또는 pattern2가 패턴과 같은 행 수,
+                     'pattern1_next': {result1: 개수}, 'pattern2_next': {result2: 개수}}}
+    """
+    table = {}
+    if df is None or df.empty:
+        return table
+
+    joint = df.groupby(['pattern1', 'result1', 'pattern2', 'result2'], dropna=False, sort=False).size()
+    for (pattern1, result1, pattern2, result2), count in joint.items():
+        update_outcome_table(table, pattern1, result1, pattern2, result2, int(count))
+    return table
+
+
+def _add_count(counts, result, count):
+    value = counts.get(result, 0) + count
+    if value:
+        counts[result] = value
+    else:
+        del counts[result]
+
+
+def update_outcome_table(table, pattern1, result1, pattern2, result2, count=1):
+    """
+    빈도표에 한 행(count개)을 더하거나 count가 음수이면 뺍니다.
+    개수가 0이 된 결과 값은 지워서 build_outcome_table로 다시 만든 표와 같게 유지합니다 (이동 구간 재생용).
+    """
+    if not _missing(pattern1):
+        item = table.get(pattern1)
+        if item is None:
+            item = table[pattern1] = {'total': 0, 'pattern1_next': {}, 'pattern2_next': {}}
+        item['total'] += count
+        if not _missing(result1):
+            _add_count(item['pattern1_next'], result1, count)
+    if not _missing(pattern2):
+        item = table.get(pattern2)
+        if item is None:
+            item = table[pattern2] = {'total': 0, 'pattern1_next': {}, 'pattern2_next': {}}
+        # 한 행의 pattern1과 pattern2가 모두 같은 패턴이면 행 수는 한 번만 셈
+        if pattern2 != pattern1:
+            item['total'] += count
+        if not _missing(result2):
+            _add_count(item['pattern2_next'], result2, count)
+
+
+def predict_from_table(table, current_pattern):
+    """
+    빈도표에서 다음 패턴을 예측합니다. 결과는 기존 DataFrame 필터 방식(predict_next_pattern)과 같습니다.
+
+    Returns:
+        dict: next_pattern, confidence, method, debug_info (데이터가 없으면 None)
+    """
+    if not table or not current_pattern:
+        return None
+
+    item = table.get(current_pattern)
+    if item is None or item['total'] == 0:
+        return None
+
+    # value_counts 두 개를 합친 뒤 groupby(level=0).sum() 한 것과 같이 결과 값 순서로 정렬
+    merged = dict(item['pattern1_next'])
+    for result, count in item['pattern2_next'].items():
+        merged[result] = merged.get(result, 0) + count
+    if not merged:
+        return None
+    next_patterns = dict(sorted(merged.items()))
+
+    total_occurrences = item['total']
+    best_next = next(iter(next_patterns))
+    confidence = next_patterns[best_next] / total_occurrences
+
+    # 신뢰도가 50% 미만이면 반대 패턴이 더 높은 확률
+    if confidence < 0.5:
+        best_next = 'b' if best_next == 'a' else 'a'
+        confidence = 1 - confidence
+
+    debug_info = {
+        'pattern': current_pattern,
+        'total_matches': total_occurrences,
+        'pattern1_matches': len(item['pattern1_next']),
+        'pattern2_matches': len(item['pattern2_next']),
+        'next_patterns': next_patterns,
+        'confidence_adjusted': confidence >= 0.5
+    }
+
+    return {
+        'next_pattern': best_next,
+        'confidence': confidence,
+        'method': '빈도 기반',
+        'debug_info': debug_info
+    }
@@ -0,0 +1,384 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+# 패턴 분류 파일과 시퀀스 규격
+PATTERN_FILE = 'pattern.json'
+CLASSIFICATION_FILE = 'pattern-classification-2025-04-20 (2).json'
+INDEX_FILE = 'pattern_index.json'
+SEQUENCE_LENGTH = 6
+TABLE_SIZE = 1 << SEQUENCE_LENGTH
+
+# b/p 비트 인코딩 (첫 번째 칸이 최상위 비트)
+CELL_BITS = {'b': 0, 'p': 1}
+
+# 분류 소스: (경로, 시퀀스 키, 전체 분류 여부). 첫 번째 소스가 기준 분류입니다.
+# pattern_index.json은 일부 패턴만 있고 pattern_number가 그룹 안 정렬 순서라 그룹만 비교합니다.
+SOURCES = (
+    (PATTERN_FILE, 'sequence', True),
+    (CLASSIFICATION_FILE, 'sequence', True),
+    (INDEX_FILE, 'pattern_sequence', False),
+)
+
+# 컴파일된 분류 파일: 고정 크기 레코드 하나 (헤더 + 64칸 테이블 3개)
+ARTIFACT_PATH = 'pattern_classification.bin'
+ARTIFACT_MAGIC = b'PCLS'
+ARTIFACT_FORMAT = 1
+ARTIFACT_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('format', '<u4'),
+    ('source_digest', 'u1', 32),  # 소스 JSON 내용의 sha256 (최신 여부 판단)
+    ('checksum', 'u1', 32),  # 테이블 내용의 sha256 (분류 버전)
+    ('groups', 'u1', TABLE_SIZE),  # 0=미분류, 1=a, 2=b
+    ('pattern_numbers', 'u1', TABLE_SIZE),  # 0=없음
+    ('conflicts', 'u1', TABLE_SIZE),  # CONFLICT_* 비트
+])
+TABLE_FIELDS = ('groups', 'pattern_numbers', 'conflicts')
+
+GROUP_CODES = {'a': 1, 'b': 2}
+GROUP_VALUES = (None, 'a', 'b')
+
+# 소스 JSON 사이의 불일치 (코드별 비트 플래그)
+CONFLICT_GROUP = 1  # 소스마다 그룹이 다름
+CONFLICT_NUMBER = 2  # 전체 분류 소스 사이에 pattern_number가 다름
+CONFLICT_DUPLICATE = 4  # 한 소스 안에서 두 그룹에 모두 있음
+CONFLICT_MISSING = 8  # 전체 분류 소스 중 일부에만 있음
+CONFLICT_LABELS = {
+    CONFLICT_GROUP: '그룹 불일치',
+    CONFLICT_NUMBER: '패턴 번호 불일치',
+    CONFLICT_DUPLICATE: '두 그룹에 중복',
+    CONFLICT_MISSING: '일부 소스에 없음',
+}
+
+
+def encode_sequence(values):
+    """
+    6칸 b/p 시퀀스를 6비트 코드로 변환합니다.
+
+    Args:
+        values (list or str): 패턴의 문자 리스트 (예: ['B', 'P', 'B', 'B', 'P', 'B'])
+
+    Returns:
+        int or None: 0~63 사이의 코드, b/p 6칸이 아니면 None
+    """
+    if len(values) != SEQUENCE_LENGTH:
+        return None
+    code = 0
+    for value in values:
+        bit = CELL_BITS.get(value.lower() if value else value)
+        if bit is None:
+            return None
+        code = (code << 1) | bit
+    return code
+
+
+def decode_sequence(code):
+    """
+    6비트 코드를 b/p 문자 리스트로 되돌립니다.
+
+    Args:
+        code (int): 0~63 사이의 패턴 코드
+
+    Returns:
+        list: 패턴의 문자 리스트 (예: ['b', 'p', 'b', 'b', 'p', 'b'])
+    """
+    return ['p' if code >> shift & 1 else 'b' for shift in range(SEQUENCE_LENGTH - 1, -1, -1)]
+
+
+def source_digest(sources=SOURCES):
+    """소스 JSON 파일들의 내용으로 sha256 요약값을 만듭니다 (없는 파일도 구분해서 반영)."""
+    digest = hashlib.sha256()
+    for path, _, _ in sources:
+        digest.update(os.path.basename(path).encode() + b'\0')
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            digest.update(b'\0missing')
+        digest.update(b'\0')
+    return digest.digest()
+
+
+def _read_source(path, key):
+    """
+    분류 소스 하나를 읽어 코드별 (그룹, 패턴 번호)와 두 그룹에 모두 있는 코드를 반환합니다.
+    groupA를 먼저 읽어 기존 선형 검색과 같은 우선순위를 유지합니다.
+    """
+    with open(path, 'r') as f:
+        pattern_data = json.load(f)
+
+    table = {}
+    duplicates = set()
+    for group_name in ['groupA', 'groupB']:
+        for pattern in pattern_data['patterns'][group_name]:
+            code = encode_sequence(pattern.get(key) or [])
+            if code is None:
+                continue
+            group = str(pattern.get('group', group_name[5])).lower()
+            if code in table:
+                if table[code][0] != group:
+                    duplicates.add(code)
+                continue
+            table[code] = (group, pattern.get('pattern_number'))
+    return table, duplicates
+
+
+def _table_checksum(record):
+    return hashlib.sha256(b''.join(record[field].tobytes() for field in TABLE_FIELDS)).digest()
+
+
+def compile_classifications(sources=SOURCES, digest=None):
+    """
+    분류 소스 JSON들을 컴파일된 분류 레코드로 만듭니다.
+    그룹과 패턴 번호는 첫 번째 소스를 따르고, 소스 사이의 불일치는 conflicts에 표시합니다.
+    첫 번째 소스는 반드시 있어야 하며 나머지는 없으면 건너뜁니다.
+
+    Returns:
+        np.void: ARTIFACT_DTYPE 레코드
+    """
+    if digest is None:
+        digest = source_digest(sources)
+
+    tables = []
+    record = np.zeros((), dtype=ARTIFACT_DTYPE)
+    for i, (path, key, complete) in enumerate(sources):
+        if i and not os.path.exists(path):
+            continue
+        table, duplicates = _read_source(path, key)
+        tables.append((table, complete))
+        for code in duplicates:
+            record['conflicts'][code] |= CONFLICT_DUPLICATE
+
+    for code, (group, number) in tables[0][0].items():
+        record['groups'][code] = GROUP_CODES.get(group, 0)
+        record['pattern_numbers'][code] = number or 0
+
+    for code in range(TABLE_SIZE):
+        entries = [table.get(code) for table, _ in tables]
+        complete_entries = [table.get(code) for table, complete in tables if complete]
+        if len({entry[0] for entry in entries if entry}) > 1:
+            record['conflicts'][code] |= CONFLICT_GROUP
+        if any(complete_entries) and not all(complete_entries):
+            record['conflicts'][code] |= CONFLICT_MISSING
+        if len({entry[1] for entry in complete_entries if entry}) > 1:
+            record['conflicts'][code] |= CONFLICT_NUMBER
+
+    record['magic'] = ARTIFACT_MAGIC
+    record['format'] = ARTIFACT_FORMAT
+    record['source_digest'] = np.frombuffer(digest, dtype=np.uint8)
+    record['checksum'] = np.frombuffer(_table_checksum(record), dtype=np.uint8)
+    return record[()]
+
+
+def write_artifact(record, path=ARTIFACT_PATH):
+    """같은 디렉터리의 임시 파일에 쓴 뒤 os.replace로 교체합니다 (읽는 쪽은 항상 파일 전체만 봄)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.pattern-', suffix='.bin.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(np.asarray(record, dtype=ARTIFACT_DTYPE).tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_artifact(path=ARTIFACT_PATH):
+    """
+    컴파일된 분류 파일을 메모리 매핑해 레코드로 읽습니다 (JSON 파싱 없음).
+
+    Returns:
+        np.void: 매핑된 파일을 가리키는 ARTIFACT_DTYPE 레코드
+
+    Raises:
+        ValueError: 크기, 매직, 형식 버전 또는 체크섬이 맞지 않는 경우
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size != ARTIFACT_DTYPE.itemsize:
+            raise ValueError(f"분류 파일 크기가 올바르지 않습니다: {path}")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    record = np.frombuffer(buffer, dtype=ARTIFACT_DTYPE, count=1)[0]
+    if record['magic'] != ARTIFACT_MAGIC or record['format'] != ARTIFACT_FORMAT:
+        raise ValueError(f"분류 파일 형식이 올바르지 않습니다: {path}")
+    if record['checksum'].tobytes() != _table_checksum(record):
+        raise ValueError(f"분류 파일 체크섬이 맞지 않습니다: {path}")
+    return record
+
+
+def build_artifact(path=ARTIFACT_PATH, sources=SOURCES):
+    """소스 JSON들을 컴파일해 분류 파일로 저장하고 레코드를 반환합니다."""
+    record = compile_classifications(sources)
+    write_artifact(record, path)
+    return record
+
+
+def describe_conflicts(flags):
+    """불일치 비트 플래그를 사람이 읽을 수 있는 문자열로 바꿉니다."""
+    return ', '.join(label for flag, label in CONFLICT_LABELS.items() if flags & flag)
+
+
+class PatternIndex:
+    """
+    컴파일된 분류 파일(ARTIFACT_PATH)을 메모리 매핑해 64칸 그룹 테이블로 보관합니다.
+
+    분류 파일이 없거나 소스 JSON보다 오래되었으면 소스 요약값을 비교하고, 내용이 바뀌었을 때만
+    다시 컴파일해 저장합니다. 파일들의 mtime이 바뀐 경우에만 이 확인을 다시 합니다.
+    """
+
+    def __init__(self, path=ARTIFACT_PATH, sources=SOURCES):
+        self.path = path
+        self.sources = sources
+        self.groups = [None] * TABLE_SIZE
+        self.pattern_numbers = [None] * TABLE_SIZE
+        self.conflicts = np.zeros(TABLE_SIZE, dtype=np.uint8)
+        self.version = None
+        self._mtimes = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        mtimes = []
+        for path in [self.path] + [source[0] for source in self.sources]:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _load(self, mtimes):
+        """
+        Returns:
+            tuple: (레코드, 분류 파일을 새로 저장했는지 여부)
+        """
+        artifact_mtime, source_mtimes = mtimes[0], [mtime for mtime in mtimes[1:] if mtime is not None]
+        digest = None
+        try:
+            record = read_artifact(self.path)
+            if artifact_mtime >= max(source_mtimes, default=0):
+                return record, False
+            digest = source_digest(self.sources)
+            if record['source_digest'].tobytes() == digest:
+                return record, False
+        except (OSError, ValueError):
+            pass
+
+        record = compile_classifications(self.sources, digest)
+        try:
+            write_artifact(record, self.path)
+            return read_artifact(self.path), True
+        except OSError:
+            # 쓰기 권한이 없으면 메모리에서 컴파일한 테이블만 사용
+            return record, False
+
+    def refresh(self):
+        """분류 파일이나 소스 JSON이 변경되었으면 테이블을 다시 읽습니다."""
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+            record, written = self._load(mtimes)
+
+            self.groups = [GROUP_VALUES[group] for group in record['groups'].tolist()]
+            self.pattern_numbers = [number or None for number in record['pattern_numbers'].tolist()]
+            self.conflicts = record['conflicts']
+            self.version = record['checksum'].tobytes().hex()[:16]
+            # 다시 컴파일해 저장했으면 분류 파일의 mtime이 바뀌었으므로 새로 확인
+            self._mtimes = self._stat() if written else mtimes
+
+    def group_for_code(self, code):
+        """
+        6비트 코드의 그룹 값을 반환합니다.
+
+        Returns:
+            str or None: 'a' 또는 'b', 분류되지 않은 코드면 None
+        """
+        return self.groups[code]
+
+    def group_for(self, pattern_values):
+        """
+        패턴 문자 리스트의 그룹 값을 반환합니다.
+
+        Args:
+            pattern_values (list): 패턴의 문자 리스트 (빈 문자열은 제외됨)
+
+        Returns:
+            str or None: 'a' 또는 'b', 없으면 None
+        """
+        code = encode_sequence([v for v in pattern_values if v])
+        if code is None:
+            return None
+        return self.group_for_code(code)
+
+    def disagreements(self):
+        """
+        소스 JSON 사이에 분류가 다른 패턴 목록을 반환합니다.
+
+        Returns:
+            list: [(시퀀스 문자열, 불일치 설명), ...]
+        """
+        return [(''.join(decode_sequence(code)), describe_conflicts(int(flags)))
+                for code, flags in enumerate(self.conflicts.tolist()) if flags]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_pattern_index(path=ARTIFACT_PATH, sources=SOURCES):
+    """
+    프로세스 전체에서 공유하는 PatternIndex를 반환합니다.
+
+    Args:
+        path (str): 컴파일된 분류 파일 경로
+        sources (tuple): 분류 소스 (경로, 시퀀스 키, 전체 분류 여부) 목록
+
+    Returns:
+        PatternIndex: 최신 상태로 갱신된 인덱스
+    """
+    key = (path, sources)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.setdefault(key, PatternIndex(path, sources))
+    index.refresh()
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='패턴 분류 JSON들을 하나의 바이너리 분류 파일로 컴파일합니다.')
+    parser.add_argument('--output', default=ARTIFACT_PATH, help=f'분류 파일 경로 (기본값: {ARTIFACT_PATH})')
+    parser.add_argument('--check', action='store_true',
+                        help='컴파일하지 않고 분류 파일이 소스 JSON과 맞는지만 확인 (맞지 않으면 종료 코드 1)')
+    args = parser.parse_args(argv)
+
+    if args.check:
+        try:
+            record = read_artifact(args.output)
+        except (OSError, ValueError) as e:
+            print(f"분류 파일을 읽을 수 없습니다: {e}")
+            return 1
+        if record['source_digest'].tobytes() != source_digest():
+            print(f"{args.output}이(가) 소스 JSON보다 오래되었습니다. 다시 컴파일하세요.")
+            return 1
+    else:
+        record = build_artifact(args.output)
+
+    classified = int(np.count_nonzero(record['groups']))
+    print(f"{args.output}: {ARTIFACT_DTYPE.itemsize} bytes, 버전 {record['checksum'].tobytes().hex()[:16]}, "
+          f"분류된 패턴 {classified}/{TABLE_SIZE}")
+    for code in np.flatnonzero(record['conflicts']).tolist():
+        print(f"  불일치 {''.join(decode_sequence(code))}: {describe_conflicts(int(record['conflicts'][code]))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,28 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
-import joblib
 import os
-import requests
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import time
 
+from cache_stats import CACHE_STATS
+from feature_store import delete_orphan_features
+from hf_client import get_inference_client
+from model_registry import get_model_registry
+from model_training import MODEL_PATH, describe_model, load_training_data, predict_batch, train_model
+from pattern_frequency import PATTERN1_KEYS, PATTERN2_KEYS, build_outcome_table, predict_from_table
+from pattern_records import epoch_since, rebuild_transition_counts, recount_pattern1_transitions, records_version
+from predictors import (BACKEND_STATS, FrequencyTableBackend, FunctionBackend, HuggingFaceBackend,
+                        MLBackend, PredictorRegistry, SequenceBackend)
+from sequence_model import SequencePredictor
+from storage import get_connection, transaction
+from training_worker import STATUS_DONE, STATUS_FAILED, TrainingWorker
+
+# "DB 업데이트"에서 선택적으로 삭제할 때의 레코드 보존 기간 (일)
+RETENTION_DAYS = 30
+
 # config.json 파일에서 API 토큰 로드
 def load_api_token():
     try:
@@ -68,46 +78,67 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-def get_pattern_transitions():
+def get_records_version():
+    """
+    캐시 키로 쓰는 DB 데이터 버전을 조회합니다. 새 레코드 저장, DB 업데이트/초기화 후에만 값이 바뀝니다.
+    """
+    try:
+        return records_version(get_connection())
+    except Exception as e:
+        st.error(f"DB 버전 조회 중 오류 발생: {str(e)}")
+        return None
+
+@st.cache_data(show_spinner=False)
+def load_pattern_transitions(version):
+    """
+    가장 최근 150개의 패턴 전이 데이터를 DataFrame으로 읽습니다.
+    version(DB 데이터 버전)이 같으면 재실행/세션 사이에서 캐시된 결과를 재사용합니다.
+    """
+    CACHE_STATS.miss('transitions')
+    conn = get_connection()
+    c = conn.cursor()
+    
+    # 가장 최근 150개의 패턴 전이 데이터 조회
+    transitions = c.execute('''
+        SELECT 
+            pattern1, result1, pattern2, result2,
+            prev_pattern1, prev_pattern2, transition_type,
+            current_transition_count,
+            pattern1_banker_count, pattern1_player_count,
+            pattern2_banker_count, pattern2_player_count,
+            pattern1_transitions, pattern2_transitions,
+            timestamp
+        FROM pattern_records_counted
+        ORDER BY timestamp DESC
+        LIMIT 150
+    ''').fetchall()
+    
+    # 데이터를 원래 순서(오래된 것 -> 최신 것)로 뒤집기 (선택사항, 예측 로직에 따라 필요할 수 있음)
+    # transitions.reverse()
+    
+    # DataFrame으로 변환
+    df = pd.DataFrame(transitions, columns=[
+        'pattern1', 'result1', 'pattern2', 'result2',
+        'prev_pattern1', 'prev_pattern2', 'transition_type',
+        'transition_count',
+        'pattern1_banker_count', 'pattern1_player_count',
+        'pattern2_banker_count', 'pattern2_player_count',
+        'pattern1_transitions', 'pattern2_transitions',
+        'timestamp'
+    ])
+    
+    # timestamp 기준으로 오름차순 정렬 (예측 함수들이 시간 순서를 가정할 수 있으므로)
+    df = df.sort_values(by='timestamp', ascending=True)
+    return df
+
+def get_pattern_transitions(version):
     """
     DB에서 패턴 전이 데이터를 가져옵니다.
-    가장 최근 150개의 데이터를 조회합니다.
+    가장 최근 150개의 데이터를 조회합니다 (DB 데이터 버전별 캐시).
     """
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        c = conn.cursor()
-        
-        # 가장 최근 150개의 패턴 전이 데이터 조회
-        transitions = c.execute('''
-            SELECT 
-                pattern1, result1, pattern2, result2,
-                prev_pattern1, prev_pattern2, transition_type,
-                transition_count,
-                pattern1_banker_count, pattern1_player_count,
-                pattern2_banker_count, pattern2_player_count,
-                pattern1_transitions, pattern2_transitions,
-                timestamp
-            FROM pattern_records
-            ORDER BY timestamp DESC
-            LIMIT 150
-        ''').fetchall()
-        
-        # 데이터를 원래 순서(오래된 것 -> 최신 것)로 뒤집기 (선택사항, 예측 로직에 따라 필요할 수 있음)
-        # transitions.reverse()
-        
-        # DataFrame으로 변환
-        df = pd.DataFrame(transitions, columns=[
-            'pattern1', 'result1', 'pattern2', 'result2',
-            'prev_pattern1', 'prev_pattern2', 'transition_type',
-            'transition_count',
-            'pattern1_banker_count', 'pattern1_player_count',
-            'pattern2_banker_count', 'pattern2_player_count',
-            'pattern1_transitions', 'pattern2_transitions',
-            'timestamp'
-        ])
-        
-        # timestamp 기준으로 오름차순 정렬 (예측 함수들이 시간 순서를 가정할 수 있으므로)
-        df = df.sort_values(by='timestamp', ascending=True)
+        CACHE_STATS.lookup('transitions')
+        df = load_pattern_transitions(version)
         
         if df.empty:
             st.warning("데이터베이스에 데이터가 없습니다.")
@@ -116,64 +147,21 @@ def get_pattern_transitions():
         else:
             st.info(f"가장 최신 데이터 {len(df)}개를 사용합니다.")
             
-        conn.close()
         return df
     except Exception as e:
         st.error(f"데이터 조회 중 오류 발생: {str(e)}")
         return None
 
-def predict_next_pattern(df: pd.DataFrame, current_pattern: str) -> Optional[Dict[str, Any]]:
+def predict_next_pattern(df: pd.DataFrame, current_pattern: str, table: Optional[Dict] = None) -> Optional[Dict[str, Any]]:
     """
     현재 패턴을 기반으로 다음 패턴을 예측합니다.
+    미리 만든 빈도표(table)가 있으면 DataFrame을 다시 필터링하지 않고 표에서 바로 읽습니다.
     """
-    if df is None or df.empty or not current_pattern:
-        return None
-    
-    # 현재 패턴으로 시작하는 전이 패턴 찾기
-    pattern_data = df[
-        (df['pattern1'] == current_pattern) | 
-        (df['pattern2'] == current_pattern)
-    ]
-    
-    if pattern_data.empty:
-        return None
-    
-    # 패턴1인 경우
-    pattern1_next = pattern_data[pattern_data['pattern1'] == current_pattern]['result1'].value_counts()
-    # 패턴2인 경우
-    pattern2_next = pattern_data[pattern_data['pattern2'] == current_pattern]['result2'].value_counts()
-    
-    # 두 결과 합치기
-    next_patterns = pd.concat([pattern1_next, pattern2_next]).groupby(level=0).sum()
-    
-    if next_patterns.empty:
-        return None
-    
-    total_occurrences = len(pattern_data)
-    best_next = next_patterns.index[0]
-    confidence = next_patterns.iloc[0] / total_occurrences
-    
-    # 신뢰도가 50% 미만이면 반대 패턴이 더 높은 확률
-    if confidence < 0.5:
-        best_next = 'b' if best_next == 'a' else 'a'
-        confidence = 1 - confidence
-    
-    # 디버그 정보 추가
-    debug_info = {
-        'pattern': current_pattern,
-        'total_matches': total_occurrences,
-        'pattern1_matches': len(pattern1_next),
-        'pattern2_matches': len(pattern2_next),
-        'next_patterns': next_patterns.to_dict(),
-        'confidence_adjusted': confidence >= 0.5
-    }
-    
-    return {
-        'next_pattern': best_next,
-        'confidence': confidence,
-        'method': '빈도 기반',
-        'debug_info': debug_info
-    }
+    if table is None:
+        if df is None or df.empty:
+            return None
+        table = build_outcome_table(df)
+    return predict_from_table(table, current_pattern)
 
 def predict_next_pattern2(df, current_pattern1, current_pattern2):
     """
@@ -200,171 +188,118 @@ def predict_next_pattern2(df, current_pattern1, current_pattern2):
         'total_occurrences': len(transitions)
     }
 
-def prepare_training_data():
+def prepare_training_data(since_round=0):
     """
     ML 모델 학습을 위한 데이터를 준비합니다.
+    
+    Args:
+        since_round (int): 이 round 이후에 저장된 행만 사용 (증분 학습 워터마크)
+    
+    Returns:
+        tuple: (X, y, features, 마지막 round)
     """
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        
-        # 전체 데이터 조회
-        query = '''
-            SELECT 
-                pattern1, result1, pattern2, result2,
-                pattern1_banker_count, pattern1_player_count,
-                pattern2_banker_count, pattern2_player_count,
-                pattern1_transitions, pattern2_transitions,
-                timestamp
-            FROM pattern_records
-            ORDER BY timestamp
-        '''
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        # 특성(X)과 레이블(y) 준비
-        features = ['pattern1_banker_count', 'pattern1_player_count',
-                   'pattern1_transitions', 'pattern2_banker_count',
-                   'pattern2_player_count', 'pattern2_transitions']
-        
-        X = df[features].values
-        y = df['result1'].values  # 다음 결과 예측
-        
-        return X, y, features
+        return load_training_data(get_connection(), since_round)
     except Exception as e:
         st.error(f"학습 데이터 준비 중 오류 발생: {str(e)}")
-        return None, None, None
+        return None, None, None, None
 
-def train_ml_model():
+def train_ml_model(incremental=True):
     """
-    RandomForest 모델을 학습시킵니다.
-    """
-    X, y, features = prepare_training_data()
-    if X is None or y is None:
-        return None
-    
-    # 레이블 인코딩
-    le = LabelEncoder()
-    y_encoded = le.fit_transform(y)
-    
-    # 모델 학습
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X, y_encoded)
-    
-    # 모델 저장
-    model_path = 'pattern_prediction_model.joblib'
-    joblib.dump((model, le, features), model_path)
+    ML 모델을 현재 스레드에서 바로 학습시킵니다 (화면에서는 get_training_worker()를 사용).
     
-    return model, le, features
+    Returns:
+        tuple: (model, le, features) - 학습할 데이터가 없거나 실패하면 (None, None, None)
+    """
+    try:
+        model, le, features, _ = train_model(get_connection(), MODEL_PATH, incremental)
+        return model, le, features
+    except Exception as e:
+        st.error(f"모델 학습 중 오류 발생: {str(e)}")
+        return None, None, None
 
-def predict_with_ml(current_pattern1, current_pattern2=None):
+@st.cache_resource(show_spinner=False)
+def get_training_worker():
+    """프로세스 전체에서 공유하는 백그라운드 학습 작업 큐"""
+    return TrainingWorker(model_path=MODEL_PATH)
+
+def display_training_status():
+    """가장 최근 학습 작업 상태를 표시합니다."""
+    job = get_training_worker().latest()
+    if job is None:
+        return
+    mode = "증분" if job['incremental'] else "전체 재학습"
+    if job['status'] == STATUS_DONE:
+        elapsed = job['finished_at'] - job['started_at']
+        st.success(f"모델 학습 #{job['id']} ({mode}) 완료: {job['samples']}개 행, {elapsed:.1f}초")
+        if job['note']:
+            st.info(job['note'])
+    elif job['status'] == STATUS_FAILED:
+        st.error(f"모델 학습 #{job['id']} ({mode}) 실패: {job['error']}")
+    else:
+        st.info(f"모델 학습 #{job['id']} ({mode}) {job['status']}... 예측은 이전 모델로 계속 제공됩니다.")
+        st.button("학습 상태 새로고침", key="refresh_training_status")
+
+def predict_with_ml_batch(pairs):
     """
-    ML 모델을 사용하여 다음 패턴을 예측합니다.
+    ML 모델로 여러 (pattern1, pattern2) 쌍의 다음 패턴을 한 번에 예측합니다.
+    특성은 한 번의 쿼리로 가져오고, predict_proba도 한 번만 호출합니다.
+
+    Args:
+        pairs (list): [(pattern1, pattern2), ...] - None인 값은 조건에서 제외
+
+    Returns:
+        list: pairs 순서의 예측 결과 dict (예측할 수 없는 쌍은 None)
     """
     try:
-        # 모델 로드
-        model_path = 'pattern_prediction_model.joblib'
-        if not os.path.exists(model_path):
-            model, le, features = train_ml_model()
-        else:
-            model, le, features = joblib.load(model_path)
-        
-        # 현재 패턴의 특성 추출
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        c = conn.cursor()
-        
-        query = '''
-            SELECT 
-                pattern1_banker_count, pattern1_player_count,
-                pattern1_transitions, pattern2_banker_count,
-                pattern2_player_count, pattern2_transitions
-            FROM pattern_records
-            WHERE pattern1 = ? AND pattern2 = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        '''
-        
-        row = c.execute(query, (current_pattern1, current_pattern2 or current_pattern1)).fetchone()
-        conn.close()
-        
-        if row is None:
-            return None
-        
-        # 예측
-        X_pred = np.array(row).reshape(1, -1)
-        y_pred = model.predict_proba(X_pred)
-        
-        # 결과 변환
-        predicted_class = le.inverse_transform([np.argmax(y_pred)])[0]
-        confidence = np.max(y_pred)
-        
-        return {
-            'next_pattern': predicted_class,
-            'confidence': confidence,
-            'method': 'ML Model (RandomForest)'
-        }
+        # 모델 로드 (프로세스당 한 번, 파일이 교체된 경우에만 다시 읽음)
+        loaded = get_model_registry(MODEL_PATH).get()
+        if loaded is None:
+            # 모델이 없으면 백그라운드 학습만 시작하고, 준비될 때까지 ML 예측은 건너뜀
+            get_training_worker().submit()
+            st.info("ML 모델이 아직 없어 백그라운드 학습을 시작했습니다.")
+            return [None] * len(pairs)
+        model, le, features = loaded
+        
+        method = describe_model(model)
+        return [
+            {'next_pattern': result[0], 'confidence': result[1], 'method': method} if result else None
+            for result in predict_batch(get_connection(), model, le, features, pairs)
+        ]
         
     except Exception as e:
         st.error(f"ML 예측 중 오류 발생: {str(e)}")
-        return None
+        return [None] * len(pairs)
 
-def get_huggingface_prediction(pattern: str) -> Optional[Dict[str, Any]]:
+def predict_with_ml(current_pattern1, current_pattern2=None):
     """
-    Hugging Face API를 사용하여 패턴 예측을 수행합니다.
+    ML 모델을 사용하여 다음 패턴을 예측합니다.
+    """
+    return predict_with_ml_batch([(current_pattern1, current_pattern2 or current_pattern1)])[0]
+
+def get_huggingface_predictions(patterns: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Hugging Face API를 사용하여 여러 패턴의 예측을 한 번에 수행합니다.
+    공유 클라이언트가 연결 풀, 응답 캐시, 동시 요청을 처리합니다.
     """
     API_TOKEN = st.session_state.get("hf_api_token")
     if not API_TOKEN:
-        return None
+        return [None] * len(patterns)
 
-    # 패턴 분석용 모델 선택 (text-classification 모델 사용)
-    API_URL = "https://api-inference.huggingface.co/models/facebook/bart-large-mnli"
-    headers = {"Authorization": f"Bearer {API_TOKEN}"}
-    
-    try:
-        # 입력 데이터 구성
-        payload = {
-            "inputs": pattern,
-            "parameters": {
-                "candidate_labels": ["next_a", "next_b"]
-            }
-        }
-        
-        response = requests.post(API_URL, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            # API 응답 검증
-            if isinstance(result, dict) and 'scores' in result and 'labels' in result:
-                # 최고 확률의 예측값 선택
-                max_score_idx = result['scores'].index(max(result['scores']))
-                predicted_value = 'a' if result['labels'][max_score_idx] == 'next_a' else 'b'
-                confidence = result['scores'][max_score_idx]
-                
-                # 신뢰도가 50% 미만이면 반대 패턴 선택
-                if confidence < 0.5:
-                    predicted_value = 'b' if predicted_value == 'a' else 'a'
-                    confidence = 1 - confidence
-                
-                return {
-                    'next_pattern': predicted_value,
-                    'confidence': confidence,
-                    'method': 'Hugging Face API',
-                    'model_name': 'BART Large MNLI',
-                    'raw_predictions': {
-                        'next_a': result['scores'][result['labels'].index('next_a')],
-                        'next_b': result['scores'][result['labels'].index('next_b')]
-                    }
-                }
-            else:
-                st.error(f"예상치 못한 API 응답 형식: {result}")
-                return None
-        else:
-            st.error(f"API 오류: {response.status_code} - {response.text}")
-            return None
-            
-    except Exception as e:
-        st.error(f"API 호출 중 오류 발생: {str(e)}")
-        return None
+    predictions = []
+    # 패턴 분석용 모델 (zero-shot text-classification, 기본값 facebook/bart-large-mnli)
+    for result in HuggingFaceBackend(get_inference_client(API_TOKEN)).predict(patterns):
+        if isinstance(result, Exception):
+            st.error(str(result))
+            result = None
+        predictions.append(result)
+    return predictions
+
+def get_huggingface_prediction(pattern: str) -> Optional[Dict[str, Any]]:
+    """
+    Hugging Face API를 사용하여 패턴 예측을 수행합니다.
+    """
+    return get_huggingface_predictions([pattern])[0]
 
 def find_similar_patterns(df: pd.DataFrame, pattern: str) -> Optional[Dict[str, Any]]:
     """
@@ -396,44 +331,55 @@ def clear_database():
     데이터베이스를 초기화합니다.
     """
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        c = conn.cursor()
-        
-        # 테이블 데이터 삭제
-        c.execute('DELETE FROM pattern_records')
-        conn.commit()
-        conn.close()
+        with transaction() as conn:
+            # 테이블 데이터 삭제 (전이 카운트 요약도 함께 초기화)
+            conn.execute('DELETE FROM pattern_records')
+            conn.execute('DELETE FROM transition_counts')
+            conn.execute('DELETE FROM pattern1_counts')
+            conn.execute('DELETE FROM pattern_features')
+            conn.execute('UPDATE transition_count_state SET applied_round = 0')
+        # 전체 이력 마르코프 카운트도 삭제된 이력을 버리고 다음 조회 때 다시 만듦
+        get_sequence_predictor().reset()
         return True
     except Exception as e:
         st.error(f"DB 초기화 중 오류 발생: {str(e)}")
         return False
 
-def update_database():
+def count_expired_records(retention_days):
+    """
+    보존 기간(retention_days일)보다 오래된 레코드 수를 반환합니다 (timestamp_epoch 인덱스 조회).
+    """
+    return get_connection().execute(
+        'SELECT COUNT(*) FROM pattern_records WHERE timestamp_epoch < ?',
+        (epoch_since(days=retention_days),)
+    ).fetchone()[0]
+
+def update_database(retention_days=None):
     """
     데이터베이스를 최신 데이터로 업데이트합니다.
+
+    Args:
+        retention_days (int or None): 지정하면 이 기간보다 오래된 레코드를 삭제 (기본값: 삭제하지 않음).
+            일괄 가져오기한 과거 캡처는 파일 시각으로 저장되므로 함께 삭제됩니다.
     """
     try:
-        conn = sqlite3.connect('pattern_analysis_v2.db')
-        c = conn.cursor()
-        
-        # 오래된 데이터 삭제 (예: 30일 이상)
-        c.execute('''
-            DELETE FROM pattern_records 
-            WHERE timestamp < datetime('now', '-30 days')
-        ''')
-        
-        # 통계 업데이트
-        c.execute('''
-            UPDATE pattern_records 
-            SET transition_count = (
-                SELECT COUNT(*) 
-                FROM pattern_records pr2 
-                WHERE pr2.pattern1 = pattern_records.pattern1
-            )
-        ''')
+        with transaction() as conn:
+            c = conn.cursor()
+        
+            if retention_days is not None:
+                # 보존 기간이 지난 데이터 삭제 (사용자가 명시적으로 선택하고 확인한 경우에만)
+                c.execute('''
+                    DELETE FROM pattern_records 
+                    WHERE timestamp_epoch < ?
+                ''', (epoch_since(days=retention_days),))
+                
+                # 삭제된 행이 있으면 집계 테이블을 다시 만들고 삭제된 레코드의 특성도 지움
+                if c.rowcount > 0:
+                    rebuild_transition_counts(conn)
+                    delete_orphan_features(conn)
         
-        conn.commit()
-        conn.close()
+            # 통계 업데이트 (저장 시 갱신되는 pattern1별 개수를 바뀐 pattern1에만 반영)
+            recount_pattern1_transitions(conn)
         return True
     except Exception as e:
         st.error(f"DB 업데이트 중 오류 발생: {str(e)}")
@@ -470,197 +416,212 @@ def analyze_pattern_combination(df: pd.DataFrame, pattern1: str, pattern2: str)
         'avg_transitions': avg_transitions
     }
 
-def create_comparison_data(local_data, api_data):
-    """로컬과 API 예측을 비교하여 일치하는 항목과 차이가 있는 항목을 분리하여 반환합니다."""
-    matching_predictions = []
-    differing_predictions = []
-    
-    if not api_data:
-        return matching_predictions, differing_predictions
-        
-    local_dict = {item["패턴"]: item for item in local_data}
-    api_dict = {item["패턴"]: item for item in api_data}
-    
-    for pattern in local_dict.keys():
-        if pattern in api_dict:
-            local_pred = local_dict[pattern]
-            api_pred = api_dict[pattern]
-            comparison_item = {
-                "패턴": pattern,
-                "로컬 예측": local_pred["예측값"],
-                "로컬 신뢰도": f"{local_pred['신뢰도']:.1%}",
-                "API 예측": api_pred["예측값"],
-                "API 신뢰도": f"{api_pred['신뢰도']:.1%}"
-            }
-            if local_pred["예측값"] == api_pred["예측값"]:
-                matching_predictions.append(comparison_item)
-            else:
-                differing_predictions.append(comparison_item)
-                
-    return matching_predictions, differing_predictions
+@st.cache_data(show_spinner=False)
+def load_pattern_combination(version, pattern1, pattern2):
+    """DB 데이터 버전별로 패턴 조합 통계를 캐시합니다."""
+    CACHE_STATS.miss('combination')
+    return analyze_pattern_combination(load_pattern_transitions(version), pattern1, pattern2)
+
+@st.cache_data(show_spinner=False)
+def load_outcome_table(version):
+    """DB 데이터 버전별로 패턴별 다음 결과 빈도표를 캐시합니다."""
+    CACHE_STATS.miss('outcome_table')
+    return build_outcome_table(load_pattern_transitions(version))
+
+def get_outcome_table(version):
+    """패턴별 다음 결과 빈도표를 캐시에서 읽습니다."""
+    CACHE_STATS.lookup('outcome_table')
+    return load_outcome_table(version)
 
-def display_pattern_prediction_table(df):
+def get_pattern_combination(version, pattern1, pattern2):
+    """패턴 조합 통계를 캐시에서 읽습니다."""
+    CACHE_STATS.lookup('combination')
+    return load_pattern_combination(version, pattern1, pattern2)
+
+@st.cache_resource(show_spinner=False)
+def get_sequence_predictor():
+    """프로세스 전체에서 공유하는 가변 차수 마르코프 예측기 (전체 이력, 증분 갱신)"""
+    return SequencePredictor()
+
+def refresh_sequence_predictor():
+    """새로 저장된 그룹 시퀀스 / 패턴 레코드만 예측기에 추가합니다."""
+    try:
+        predictor = get_sequence_predictor()
+        predictor.refresh(get_connection())
+        return predictor
+    except Exception as e:
+        st.error(f"시퀀스 예측기 갱신 중 오류 발생: {str(e)}")
+        return None
+
+def display_sequence_prediction(predictor):
+    """전체 이력 기반 시퀀스 예측 결과를 표시합니다."""
+    st.markdown("### 전체 이력 기반 시퀀스 예측")
+    
+    # 최근 pattern1 흐름 다음 pattern1
+    prediction = predictor.predict_pattern1()
+    if prediction:
+        st.write(f"최근 패턴1 흐름 {' → '.join(predictor.pattern1_tail) or '-'} 다음: "
+                 f"**{prediction['next_pattern']}** ({prediction['confidence']:.1%}, "
+                 f"{prediction['method']}, 표본 {prediction['support']}개)")
+    
+    # 그룹 시퀀스(tot) 다음 그룹 값
+    sequence = st.text_input("그룹 시퀀스 입력 (예: abba)", key="sequence_input_local")
+    if sequence:
+        prediction = predictor.predict_group(sequence.strip().lower())
+        if prediction:
+            st.write(f"다음 그룹 값: **{prediction['next_pattern']}** ({prediction['confidence']:.1%}, "
+                     f"{prediction['method']}, 표본 {prediction['support']}개)")
+            with st.expander("문맥 길이별 분포"):
+                st.json(prediction['distribution'])
+        else:
+            st.warning("그룹 시퀀스 데이터가 없습니다.")
+
+def display_cache_stats():
+    """사이드바에 캐시 히트/미스 횟수를 표시합니다."""
+    with st.sidebar.expander("캐시 상태"):
+        rows = CACHE_STATS.snapshot()
+        if rows:
+            st.table(pd.DataFrame(rows))
+        else:
+            st.write("조회 기록 없음")
+
+def create_comparison_data(registry, runs, patterns, offset=0):
+    """
+    엔진별 예측을 패턴 행, 엔진 열로 모으고 엔진 간 예측 일치 여부를 표시합니다.
+
+    Args:
+        registry (PredictorRegistry): 엔진 이름 → 표시 이름 조회용
+        runs (dict): registry.run 결과
+        patterns (list): 표시할 패턴
+        offset (int): runs 결과 목록에서 patterns의 시작 위치
+    """
+    rows = []
+    for i, pattern in enumerate(patterns):
+        row = {"패턴": pattern}
+        values = set()
+        for name, run in runs.items():
+            prediction = run['results'][offset + i]
+            label = registry.label(name)
+            row[f"{label} 예측"] = prediction['next_pattern'] if prediction else '-'
+            row[f"{label} 신뢰도"] = f"{prediction['confidence']:.1%}" if prediction else '-'
+            if prediction:
+                values.add(prediction['next_pattern'])
+        row["일치"] = '-' if not values else ('일치' if len(values) == 1 else '차이')
+        rows.append(row)
+    return rows
+
+def build_predictor_registry(df, table, sequence_predictor=None):
     """
-    패턴1(4개)과 패턴2(8개)의 예측값을 테이블 형식으로 수평 배치하여 표시합니다.
+    비교 테이블에서 사용할 예측 엔진을 등록합니다. API 엔진은 토큰이 있을 때만 등록합니다.
+    엔진은 작업 스레드에서 실행되므로 Streamlit 객체(캐시 리소스 등)는 여기서 미리 꺼내 넘깁니다.
+    """
+    registry = PredictorRegistry([
+        FrequencyTableBackend(table),
+        FunctionBackend('similar', '유사 패턴', lambda pattern: find_similar_patterns(df, pattern)),
+        MLBackend(get_model_registry(MODEL_PATH), on_missing_model=get_training_worker().submit),
+    ])
+    if sequence_predictor is not None:
+        registry.register(SequenceBackend(sequence_predictor))
+    api_token = st.session_state.get("hf_api_token")
+    if api_token:
+        registry.register(HuggingFaceBackend(get_inference_client(api_token)))
+    return registry
+
+def display_backend_stats():
+    """사이드바에 예측 엔진별 누적 지연 시간과 처리량을 표시합니다."""
+    with st.sidebar.expander("예측 엔진 지연 통계"):
+        rows = BACKEND_STATS.snapshot()
+        if rows:
+            st.table(pd.DataFrame(rows))
+        else:
+            st.write("실행 기록 없음")
+
+def display_pattern_prediction_table(registry):
+    """
+    패턴1(4개)과 패턴2(8개)의 예측값을 선택한 엔진별로 나란히 표시합니다.
+    선택한 엔진은 12개 패턴 전체를 한 번에(엔진끼리는 동시에) 예측하고, 엔진별 소요 시간을 함께 표시합니다.
     """
     st.markdown("## 패턴 예측 비교 테이블")
     
     # 패턴1 (4개: aa, ab, ba, bb)
-    pattern1_list = ['aa', 'ab', 'ba', 'bb']
+    pattern1_list = list(PATTERN1_KEYS)
     
     # 패턴2 (8개: aaa, aab, aba, abb, baa, bab, bba, bbb)
-    pattern2_list = ['aaa', 'aab', 'aba', 'abb', 'baa', 'bab', 'bba', 'bbb']
-    
-    def get_api_predictions(patterns):
-        """API 예측을 수행하고 오류 발생 시 적절한 메시지를 반환합니다."""
-        api_data = []
-        api_error = None
-        if "hf_api_token" in st.session_state:
-            try:
-                for pattern in patterns:
-                    prediction = get_huggingface_prediction(pattern)
-                    if prediction:
-                        api_data.append({
-                            "패턴": pattern,
-                            "예측값": prediction['next_pattern'],
-                            "신뢰도": prediction['confidence']
-                        })
-            except Exception as e:
-                api_error = f"API 호출 중 오류 발생: {str(e)}"
-        return api_data, api_error
-    
-    def get_local_predictions(patterns, df):
-        """로컬 예측을 수행합니다."""
-        local_data = []
-        for pattern in patterns:
-            prediction = predict_next_pattern(df, pattern)
-            if prediction:
-                local_data.append({
-                    "패턴": pattern,
-                    "예측값": prediction['next_pattern'],
-                    "신뢰도": prediction['confidence']
-                })
-        return local_data
+    pattern2_list = list(PATTERN2_KEYS)
+    
+    names = registry.names()
+    selected = st.multiselect("비교할 예측 엔진", names, default=[name for name in names if name != 'similar'],
+                              format_func=registry.label, key="prediction_backends")
+    if "hf_api_token" not in st.session_state:
+        st.caption("API 토큰을 설정하면 Hugging Face API 엔진을 선택할 수 있습니다.")
+    if not selected:
+        st.info("예측 엔진을 하나 이상 선택하세요.")
+        return
+    
+    runs = registry.run(selected, pattern1_list + pattern2_list)
+    for name, run in runs.items():
+        if run['error']:
+            st.warning(f"{registry.label(name)}: {run['error']}")
     
     # 패턴1과 패턴2 예측을 수평으로 배치
     col1, col2 = st.columns([3, 3])
-    
-    # 패턴1 예측
     with col1:
         st.markdown("### 패턴1 예측 (aa, ab, ba, bb)")
-        
-        # 로컬과 API 예측을 나란히 표시
-        subcol1, subcol2 = st.columns(2)
-        
-        # 로컬 예측 (항상 표시)
-        with subcol1:
-            st.markdown("#### 로컬 기반 예측")
-            local_data1 = get_local_predictions(pattern1_list, df)
-            if local_data1:
-                st.table(pd.DataFrame([{
-                    "패턴": d["패턴"],
-                    "예측값": d["예측값"],
-                    "신뢰도": f"{d['신뢰도']:.1%}"
-                } for d in local_data1]))
-            else:
-                st.info("예측 데이터가 없습니다.")
-        
-        # API 예측
-        with subcol2:
-            st.markdown("#### API 기반 예측")
-            api_data1, api_error1 = get_api_predictions(pattern1_list)
-            if api_error1:
-                st.error(api_error1)
-            elif api_data1:
-                st.table(pd.DataFrame([{
-                    "패턴": d["패턴"],
-                    "예측값": d["예측값"],
-                    "신뢰도": f"{d['신뢰도']:.1%}"
-                } for d in api_data1]))
-            else:
-                st.info("API 토큰을 설정하세요.")
-        
-        # 예측 비교 분석 (일치/차이 분리)
-        matching1, differing1 = create_comparison_data(local_data1, api_data1)
-        
-        if matching1:
-            st.markdown("#### 예측 일치 분석 (로컬 == API)")
-            st.table(pd.DataFrame(matching1))
-        
-        if differing1:
-            st.markdown("#### 예측 차이 분석 (로컬 != API)")
-            st.table(pd.DataFrame(differing1))
-    
-    # 패턴2 예측
+        st.table(pd.DataFrame(create_comparison_data(registry, runs, pattern1_list)))
     with col2:
         st.markdown("### 패턴2 예측 (aaa ~ bbb)")
-        
-        # 로컬과 API 예측을 나란히 표시
-        subcol1, subcol2 = st.columns(2)
-        
-        # 로컬 예측 (항상 표시)
-        with subcol1:
-            st.markdown("#### 로컬 기반 예측")
-            local_data2 = get_local_predictions(pattern2_list, df)
-            if local_data2:
-                st.table(pd.DataFrame([{
-                    "패턴": d["패턴"],
-                    "예측값": d["예측값"],
-                    "신뢰도": f"{d['신뢰도']:.1%}"
-                } for d in local_data2]))
-            else:
-                st.info("예측 데이터가 없습니다.")
-        
-        # API 예측
-        with subcol2:
-            st.markdown("#### API 기반 예측")
-            api_data2, api_error2 = get_api_predictions(pattern2_list)
-            if api_error2:
-                st.error(api_error2)
-            elif api_data2:
-                st.table(pd.DataFrame([{
-                    "패턴": d["패턴"],
-                    "예측값": d["예측값"],
-                    "신뢰도": f"{d['신뢰도']:.1%}"
-                } for d in api_data2]))
-            else:
-                st.info("API 토큰을 설정하세요.")
-        
-        # 예측 비교 분석 (일치/차이 분리)
-        matching2, differing2 = create_comparison_data(local_data2, api_data2)
-        
-        if matching2:
-            st.markdown("#### 예측 일치 분석 (로컬 == API)")
-            st.table(pd.DataFrame(matching2))
-            
-        if differing2:
-            st.markdown("#### 예측 차이 분석 (로컬 != API)")
-            st.table(pd.DataFrame(differing2))
+        st.table(pd.DataFrame(create_comparison_data(registry, runs, pattern2_list, len(pattern1_list))))
+    
+    # 이번 실행의 엔진별 지연 시간과 처리량
+    patterns_count = len(pattern1_list) + len(pattern2_list)
+    st.markdown("#### 엔진별 지연 시간")
+    st.table(pd.DataFrame([{
+        "엔진": registry.label(name),
+        "지연(ms)": f"{run['seconds'] * 1000:.1f}",
+        "처리량(패턴/초)": f"{patterns_count / run['seconds']:.0f}" if run['seconds'] else '-',
+        "예측 수": sum(result is not None for result in run['results']),
+    } for name, run in runs.items()]))
 
 def main():
     st.title("패턴 분석 시스템")
     
-    # 데이터 로드
-    df = get_pattern_transitions()
+    # 데이터 로드 (DB 데이터 버전이 바뀐 경우에만 다시 조회)
+    version = get_records_version()
+    df = get_pattern_transitions(version)
     if df is None:
         return
     
     # DB 관리 버튼들
     col1, col2 = st.columns(2)
     with col1:
+        # 오래된 레코드 삭제는 기본적으로 꺼 두고, 대상 수를 보여 준 뒤 확인을 받아야 실행
+        prune_expired = st.checkbox(f"{RETENTION_DAYS}일 지난 레코드 삭제", value=False,
+                                    help="일괄 가져오기한 과거 캡처도 저장 시각 기준으로 함께 삭제됩니다.")
+        confirmed = False
+        if prune_expired:
+            expired = count_expired_records(RETENTION_DAYS)
+            st.warning(f"DB 업데이트 시 {expired}개 레코드와 그 특성/집계가 삭제됩니다.")
+            confirmed = st.checkbox("삭제를 확인했습니다", value=False)
         if st.button("DB 업데이트"):
-            if update_database():
+            if prune_expired and not confirmed:
+                st.warning("레코드 삭제를 확인하거나 삭제 옵션을 끄세요.")
+            elif update_database(RETENTION_DAYS if prune_expired else None):
                 st.success("데이터베이스가 업데이트되었습니다.")
                 st.experimental_rerun()  # 앱을 새로고침하여 변경사항 반영
     with col2:
+        full_retrain = st.checkbox("전체 재학습 (RandomForest)", value=False,
+                                   help="끄면 마지막 학습 이후 저장된 레코드만 빈도 모델에 추가 학습합니다. "
+                                        "저장된 모델이 RandomForest면 전체 재학습으로 갱신합니다.")
         if st.button("ML 모델 재학습"):
-            with st.spinner("모델 학습 중..."):
-                model, le, features = train_ml_model()
-                if model is not None:
-                    st.success("모델 학습이 완료되었습니다!")
+            # 백그라운드 작업 큐에서 학습 (화면을 막지 않음)
+            get_training_worker().submit(incremental=not full_retrain)
+        display_training_status()
+    
+    # 패턴별 다음 결과 빈도표 (DB 데이터 버전별 캐시)
+    outcome_table = get_outcome_table(version)
     
-    # 예측값 테이블 표시
-    display_pattern_prediction_table(df)
+    # 예측값 테이블 표시 (선택한 예측 엔진 비교)
+    display_pattern_prediction_table(build_predictor_registry(df, outcome_table, refresh_sequence_predictor()))
     
     st.markdown("---")
     
@@ -675,7 +636,7 @@ def main():
         # 패턴1 입력
         pattern1 = st.text_input("패턴1 입력 (예: aa, ab, ba, bb)", key="pattern1_input_local")
         if pattern1:
-            prediction1 = predict_next_pattern(df, pattern1)
+            prediction1 = predict_next_pattern(df, pattern1, outcome_table)
             if prediction1:
                 confidence_note = "직접 예측" if prediction1['debug_info']['confidence_adjusted'] else "반대 패턴 예측"
                 st.markdown(f"""
@@ -695,7 +656,7 @@ def main():
         # 패턴2 입력
         pattern2 = st.text_input("패턴2 입력 (예: aaa, aab, aba, abb)", key="pattern2_input_local")
         if pattern2:
-            prediction2 = predict_next_pattern(df, pattern2)
+            prediction2 = predict_next_pattern(df, pattern2, outcome_table)
             if prediction2:
                 st.markdown(f"""
                     <div class="prediction-text">
@@ -714,7 +675,7 @@ def main():
         # 패턴 조합 분석
         if pattern1 and pattern2:
             st.markdown("### 패턴 조합 분석")
-            combined_stats = analyze_pattern_combination(df, pattern1, pattern2)
+            combined_stats = get_pattern_combination(version, pattern1, pattern2)
             if combined_stats:
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -723,6 +684,11 @@ def main():
                     st.metric("연속 발생 확률", f"{combined_stats['sequential_probability']:.1%}")
                 with col3:
                     st.metric("평균 전환 횟수", f"{combined_stats['avg_transitions']:.1f}")
+        
+        # 전체 이력 기반 시퀀스 예측 (가변 차수 마르코프)
+        predictor = refresh_sequence_predictor()
+        if predictor:
+            display_sequence_prediction(predictor)
     
     # 오른쪽 컬럼: API 기반 분석
     with right_col:
@@ -784,6 +750,9 @@ def main():
     st.subheader("최근 패턴 전이 데이터")
     if not df.empty:
         st.dataframe(df[['pattern1', 'result1', 'pattern2', 'result2', 'transition_type', 'transition_count']])
+    
+    display_cache_stats()
+    display_backend_stats()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,407 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from pattern_characteristics import group_pattern_stats
+
+# pattern_records / group_sequences 스키마
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS pattern_records (
+        round INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        group_range TEXT,
+        pattern1 TEXT,
+        result1 TEXT,
+        pattern2 TEXT,
+        result2 TEXT,
+        prev_pattern1 TEXT,
+        prev_pattern2 TEXT,
+        transition_type TEXT,
+        transition_count INTEGER DEFAULT 1,
+        pattern1_banker_count INTEGER,
+        pattern1_player_count INTEGER,
+        pattern2_banker_count INTEGER,
+        pattern2_player_count INTEGER,
+        pattern1_transitions INTEGER,
+        pattern2_transitions INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS group_sequences (
+        round INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        tot TEXT
+    )
+    ''',
+]
+
+# 전이 유형별 최근 transition_count를 유지하는 요약 테이블
+REBUILD_TRANSITION_COUNTS = [
+    'DELETE FROM transition_counts',
+    '''
+    INSERT INTO transition_counts (transition_type, transition_count)
+    SELECT transition_type, transition_count
+    FROM pattern_records
+    WHERE round IN (
+        SELECT MAX(round) FROM pattern_records
+        WHERE transition_type IS NOT NULL
+        GROUP BY transition_type
+    )
+    ''',
+]
+
+# pattern1별 레코드 수 집계 테이블 (applied_count: 마지막 DB 업데이트에서 확정한 값)
+REBUILD_PATTERN1_COUNTS = [
+    'DELETE FROM pattern1_counts',
+    '''
+    INSERT INTO pattern1_counts (pattern1, record_count, applied_count)
+    SELECT pattern1, COUNT(*), NULL
+    FROM pattern_records
+    WHERE pattern1 IS NOT NULL
+    GROUP BY pattern1
+    ''',
+]
+
+# (user_version, 문장 목록) 순서대로 한 번씩 적용하는 마이그레이션
+MIGRATIONS = [
+    (1, [
+        '''
+        CREATE TABLE IF NOT EXISTS transition_counts (
+            transition_type TEXT PRIMARY KEY,
+            transition_count INTEGER NOT NULL
+        )
+        ''',
+    ] + REBUILD_TRANSITION_COUNTS),
+    (2, [
+        '''
+        CREATE TABLE IF NOT EXISTS pattern1_counts (
+            pattern1 TEXT PRIMARY KEY,
+            record_count INTEGER NOT NULL,
+            applied_count INTEGER
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_pattern_records_pattern1 ON pattern_records (pattern1)',
+    ] + REBUILD_PATTERN1_COUNTS),
+    (3, [
+        # 시간 구간 조회용 정수 epoch 시각 (YYMMDDHHMM 로컬 시각 → 유닉스 초)
+        'ALTER TABLE pattern_records ADD COLUMN timestamp_epoch INTEGER',
+        '''
+        UPDATE pattern_records
+        SET timestamp_epoch = CAST(strftime('%s',
+            '20' || substr(timestamp, 1, 2) || '-' || substr(timestamp, 3, 2) || '-' ||
+            substr(timestamp, 5, 2) || ' ' || substr(timestamp, 7, 2) || ':' || substr(timestamp, 9, 2),
+            'utc') AS INTEGER)
+        WHERE length(timestamp) = 10
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_pattern_records_timestamp_epoch ON pattern_records (timestamp_epoch)',
+        'CREATE INDEX IF NOT EXISTS idx_pattern_records_pattern2 ON pattern_records (pattern2)',
+        'CREATE INDEX IF NOT EXISTS idx_pattern_records_transition_type ON pattern_records (transition_type)',
+    ]),
+    (4, [
+        # 학습/추론용 특성 저장소 (feature_store.materialize_features가 round 순서로 채움)
+        '''
+        CREATE TABLE IF NOT EXISTS pattern_features (
+            round INTEGER PRIMARY KEY,
+            result1 TEXT,
+            pattern1_banker_count INTEGER,
+            pattern1_player_count INTEGER,
+            pattern1_transitions INTEGER,
+            pattern2_banker_count INTEGER,
+            pattern2_player_count INTEGER,
+            pattern2_transitions INTEGER,
+            result1_lag1 INTEGER,
+            result1_lag2 INTEGER,
+            result1_lag3 INTEGER,
+            result1_a_ratio_10 REAL,
+            result1_a_ratio_30 REAL
+        )
+        ''',
+    ]),
+    (5, [
+        # transition_count를 행마다 다시 쓰지 않고, 마지막 DB 업데이트 시점(applied_round)까지의 행은
+        # pattern1_counts.applied_count로 읽음 (0이면 모든 행이 저장 시 값을 그대로 사용)
+        '''
+        CREATE TABLE IF NOT EXISTS transition_count_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            applied_round INTEGER NOT NULL
+        )
+        ''',
+        'INSERT OR IGNORE INTO transition_count_state (id, applied_round) VALUES (1, 0)',
+        # 최근 레코드 조회(ORDER BY timestamp DESC LIMIT)가 뷰의 조인을 그 행들에만 하도록 함
+        'CREATE INDEX IF NOT EXISTS idx_pattern_records_timestamp ON pattern_records (timestamp)',
+        '''
+        CREATE VIEW IF NOT EXISTS pattern_records_counted AS
+        SELECT pattern_records.*,
+               CASE WHEN pattern_records.round <= (SELECT applied_round FROM transition_count_state)
+                    THEN IFNULL(pattern1_counts.applied_count, 0)
+                    ELSE pattern_records.transition_count
+               END AS current_transition_count
+        FROM pattern_records
+        LEFT JOIN pattern1_counts USING (pattern1)
+        ''',
+    ]),
+]
+
+INSERT_PATTERN_RECORD = '''
+    INSERT INTO pattern_records
+    (timestamp, group_range, pattern1, result1, pattern2, result2,
+     prev_pattern1, prev_pattern2, transition_type, transition_count,
+     pattern1_banker_count, pattern1_player_count, pattern2_banker_count, pattern2_player_count,
+     pattern1_transitions, pattern2_transitions, timestamp_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_GROUP_SEQUENCE = '''
+    INSERT INTO group_sequences
+    (timestamp, tot)
+    VALUES (?, ?)
+'''
+
+
+UPSERT_TRANSITION_COUNT = '''
+    INSERT INTO transition_counts (transition_type, transition_count)
+    VALUES (?, ?)
+    ON CONFLICT(transition_type) DO UPDATE SET transition_count = excluded.transition_count
+'''
+
+UPSERT_PATTERN1_COUNT = '''
+    INSERT INTO pattern1_counts (pattern1, record_count)
+    VALUES (?, ?)
+    ON CONFLICT(pattern1) DO UPDATE SET record_count = record_count + excluded.record_count
+'''
+
+# 재계산 후에는 같은 pattern1의 모든 행이 같은 값을 가지므로, 전이 유형별 최근 카운트는
+# 전이 유형의 도착 패턴('->' 뒤)에 해당하는 pattern1의 레코드 수와 같음
+SYNC_TRANSITION_COUNTS = '''
+    UPDATE transition_counts
+    SET transition_count = pattern1_counts.record_count
+    FROM pattern1_counts
+    WHERE pattern1_counts.pattern1 = substr(transition_counts.transition_type,
+                                           instr(transition_counts.transition_type, '->') + 2)
+'''
+
+
+def init_schema(conn):
+    """
+    pattern_records / group_sequences 테이블을 생성하고 (이미 존재하면 생성하지 않음)
+    PRAGMA user_version 기준으로 아직 적용되지 않은 마이그레이션을 실행합니다.
+    """
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+
+    for target, statements in MIGRATIONS:
+        # 이미 적용된 단계는 잠금 없이 건너뜀 (적용 여부는 잠금을 잡은 뒤 다시 확인)
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= target:
+            continue
+        apply_migration(conn, target, statements)
+
+
+def apply_migration(conn, target, statements):
+    """
+    마이그레이션 한 단계를 BEGIN IMMEDIATE 트랜잭션으로 적용합니다.
+
+    쓰기 잠금을 잡은 뒤 user_version을 다시 읽어 다른 프로세스가 먼저 적용했으면 건너뛰고,
+    DDL, 백필, user_version 변경을 함께 커밋합니다. 중간에 실패하면 모두 롤백되어
+    다음 시작 때 같은 단계를 처음부터 다시 적용합니다.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if conn.execute('PRAGMA user_version').fetchone()[0] < target:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {target}')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def rebuild_transition_counts(conn):
+    """pattern_records에서 transition_counts / pattern1_counts 집계 테이블을 다시 만듭니다. 커밋은 호출자가 합니다."""
+    for statement in REBUILD_TRANSITION_COUNTS + REBUILD_PATTERN1_COUNTS:
+        conn.execute(statement)
+
+
+def recount_pattern1_transitions(conn):
+    """
+    transition_count를 같은 pattern1을 가진 레코드 수로 다시 계산합니다.
+
+    레코드 행은 다시 쓰지 않습니다. 저장 시 갱신되는 pattern1_counts의 개수를 applied_count로 확정하고
+    지금까지의 레코드가 그 값을 쓰도록 applied_round를 옮기면, pattern_records_counted 뷰가
+    current_transition_count로 돌려줍니다 (pattern1이 NULL인 행은 기존 상관 서브쿼리와 같이 0).
+    커밋은 호출자가 합니다.
+
+    Returns:
+        int: 개수가 바뀐 pattern1 수
+    """
+    updated = conn.execute(
+        'UPDATE pattern1_counts SET applied_count = record_count WHERE applied_count IS NOT record_count'
+    ).rowcount
+    conn.execute(
+        'UPDATE transition_count_state SET applied_round = (SELECT IFNULL(MAX(round), 0) FROM pattern_records)'
+    )
+    conn.execute(SYNC_TRANSITION_COUNTS)
+    return updated
+
+
+# 데이터 버전: 레코드 추가(MAX), 삭제/초기화(MIN, MAX), DB 업데이트(applied_count, applied_round)가 있으면 값이 바뀜
+RECORDS_VERSION_QUERY = '''
+    SELECT
+        (SELECT MIN(round) FROM pattern_records),
+        (SELECT MAX(round) FROM pattern_records),
+        (SELECT group_concat(pattern1 || ':' || IFNULL(applied_count, '')) FROM pattern1_counts),
+        (SELECT applied_round FROM transition_count_state)
+'''
+
+
+def records_version(conn):
+    """
+    pattern_records 내용이 바뀌었는지 판단하는 버전 값을 반환합니다 (인덱스 조회만 사용).
+    캐시 키로 사용하며, 같은 값이면 같은 데이터로 간주합니다.
+    """
+    return tuple(conn.execute(RECORDS_VERSION_QUERY).fetchone())
+
+
+def format_timestamp(moment=None):
+    """시각을 YYMMDDHHMM 형식 문자열로 변환합니다 (기본값: 현재 시각)."""
+    return (moment or datetime.now()).strftime("%y%m%d%H%M")
+
+
+@lru_cache(maxsize=1024)
+def timestamp_to_epoch(timestamp):
+    """YYMMDDHHMM 형식(로컬 시각) 문자열을 유닉스 초로 변환합니다. 형식이 다르면 None."""
+    try:
+        return int(datetime.strptime(timestamp, "%y%m%d%H%M").timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def epoch_since(**delta):
+    """현재 시각에서 delta(timedelta 인자)만큼 이전 시각의 유닉스 초를 반환합니다."""
+    return int(datetime.now().timestamp() - timedelta(**delta).total_seconds())
+
+
+class TransitionState:
+    """
+    직전 레코드의 패턴과 전이 유형별 최근 transition_count를 메모리에 유지합니다.
+    레코드를 여러 개 연속으로 만들 때 행마다 DB를 다시 조회하지 않기 위해 사용합니다.
+    """
+
+    def __init__(self, prev_pattern1=None, prev_pattern2=None, transition_counts=None):
+        self.prev_pattern1 = prev_pattern1
+        self.prev_pattern2 = prev_pattern2
+        self.transition_counts = transition_counts or {}
+        self.changed_types = set()
+        self.pattern1_added = {}
+
+    @classmethod
+    def load(cls, conn):
+        """DB의 마지막 레코드와 transition_counts 요약 테이블로 상태를 초기화합니다."""
+        prev_record = conn.execute('''
+            SELECT pattern1, pattern2
+            FROM pattern_records
+            ORDER BY round DESC LIMIT 1
+        ''').fetchone()
+        transition_counts = dict(conn.execute(
+            'SELECT transition_type, transition_count FROM transition_counts'
+        ).fetchall())
+        if prev_record is None:
+            return cls(transition_counts=transition_counts)
+        return cls(prev_record[0], prev_record[1], transition_counts)
+
+    def build_row(self, timestamp, group_range, pattern_123, pattern_1234):
+        """
+        save_pattern_record와 같은 규칙으로 pattern_records 한 행을 만들고 상태를 갱신합니다.
+
+        Args:
+            timestamp (str): YYMMDDHHMM 형식 시간
+            group_range (str): 그룹 범위 (예: "1-3")
+            pattern_123 (str): 패턴 123의 그룹 값 (예: "aab")
+            pattern_1234 (str): 패턴 1234의 그룹 값 (예: "aabb")
+
+        Returns:
+            tuple: INSERT_PATTERN_RECORD 파라미터
+        """
+        prev_pattern1 = self.prev_pattern1
+        prev_pattern2 = self.prev_pattern2
+        transition_type = None
+        transition_count = 1
+
+        if prev_pattern1 and pattern_123:
+            transition_type = f"{prev_pattern1}->{pattern_123[:2]}"
+            if transition_type in self.transition_counts:
+                transition_count = self.transition_counts[transition_type] + 1
+            self.transition_counts[transition_type] = transition_count
+            self.changed_types.add(transition_type)
+
+        pattern1 = pattern_123[:2] if pattern_123 else ''
+        pattern2 = pattern_1234[:3] if pattern_1234 else ''
+        pattern1_banker_count, pattern1_player_count, pattern1_transitions = group_pattern_stats(pattern1)
+        pattern2_banker_count, pattern2_player_count, pattern2_transitions = group_pattern_stats(pattern2)
+
+        self.prev_pattern1 = pattern1
+        self.prev_pattern2 = pattern2
+        self.pattern1_added[pattern1] = self.pattern1_added.get(pattern1, 0) + 1
+
+        return (timestamp, group_range,
+                pattern1, pattern_123[2] if len(pattern_123) >= 3 else '',
+                pattern2, pattern_1234[3] if len(pattern_1234) >= 4 else '',
+                prev_pattern1, prev_pattern2, transition_type, transition_count,
+                pattern1_banker_count, pattern1_player_count, pattern2_banker_count, pattern2_player_count,
+                pattern1_transitions, pattern2_transitions, timestamp_to_epoch(timestamp))
+
+    def flush(self, conn):
+        """
+        변경된 전이 유형의 카운트와 pattern1별 추가 레코드 수를 집계 테이블에 upsert합니다.
+        커밋은 호출자가 합니다.
+        """
+        if self.changed_types:
+            conn.executemany(UPSERT_TRANSITION_COUNT,
+                             [(t, self.transition_counts[t]) for t in self.changed_types])
+            self.changed_types = set()
+        if self.pattern1_added:
+            conn.executemany(UPSERT_PATTERN1_COUNT, list(self.pattern1_added.items()))
+            self.pattern1_added = {}
+
+
+def insert_rows(conn, pattern_rows, group_rows):
+    """
+    pattern_records / group_sequences 행을 executemany로 삽입합니다. 커밋은 호출자가 합니다.
+
+    Args:
+        pattern_rows (list): TransitionState.build_row 결과 리스트
+        group_rows (list): (timestamp, tot) 튜플 리스트
+    """
+    if pattern_rows:
+        conn.executemany(INSERT_PATTERN_RECORD, pattern_rows)
+    if group_rows:
+        conn.executemany(INSERT_GROUP_SEQUENCE, group_rows)
+
+
+def save_analysis_batch(conn, timestamp, analysis_results, tot_value=None):
+    """
+    구간별 패턴 레코드와 그룹 시퀀스를 한 번에 삽입합니다.
+    이전 패턴과 transition_count는 배치 시작 시 한 번 읽고 이후에는 메모리에서 이어서 계산하며,
+    바뀐 전이 카운트는 같은 트랜잭션 안에서 transition_counts에 반영합니다.
+    커밋은 호출자가 합니다 (storage.transaction 사용).
+
+    Args:
+        timestamp (str): YYMMDDHHMM 형식 시간
+        analysis_results (list): {'group_range', 'pattern_123', 'pattern_1234'} dict 리스트
+        tot_value (str): 모든 그룹의 앞 2개 값을 연결한 문자열 (없으면 저장하지 않음)
+
+    Returns:
+        list: 삽입한 pattern_records 행 (INSERT_PATTERN_RECORD 파라미터)
+    """
+    state = TransitionState.load(conn)
+    pattern_rows = [
+        state.build_row(timestamp, result['group_range'], result['pattern_123'], result['pattern_1234'])
+        for result in analysis_results
+    ]
+    group_rows = [(timestamp, tot_value)] if tot_value else []
+    insert_rows(conn, pattern_rows, group_rows)
+    state.flush(conn)
+    return pattern_rows
@@ -0,0 +1,282 @@
+import threading
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime, timedelta
+
+from pattern_records import epoch_since
+
+# 통계 표본 기준: 최근 3시간 레코드가 RECENT_LIMIT개를 넘으면 최근 3시간, 아니면 최근 RECENT_LIMIT개
+RECENT_HOURS = 3
+RECENT_LIMIT = 100
+
+# 사이드바에 표시하는 P1 / P2 그룹
+P1_GROUPS = ('aa', 'ab', 'ba', 'bb')
+P2_GROUPS = ('bba', 'baa', 'abb', 'aab', 'aba', 'aaa', 'bbb', 'bab')
+
+# 전체 수 / 최근 3시간 수 / 선택된 표본의 (pattern1, result1, pattern2, result2) 결합 분포를 한 문장으로 조회
+# 결합 분포는 최대 수백 행이라 P1, P2 분포는 여기서 바로 합산합니다.
+STATISTICS_QUERY = '''
+    WITH window_counts AS (
+        SELECT
+            (SELECT COUNT(*) FROM pattern_records) AS total,
+            (SELECT COUNT(*) FROM pattern_records WHERE {time_column} >= :since) AS recent
+    ),
+    sample AS (
+        SELECT pattern1, result1, pattern2, result2
+        FROM pattern_records
+        WHERE (SELECT recent FROM window_counts) > :limit AND {time_column} >= :since
+        UNION ALL
+        SELECT * FROM (
+            SELECT pattern1, result1, pattern2, result2
+            FROM pattern_records
+            WHERE (SELECT recent FROM window_counts) <= :limit
+            ORDER BY round DESC
+            LIMIT :limit
+        )
+    ),
+    distribution AS (
+        SELECT pattern1 || result1 AS p1r1, result1, pattern2 || result2 AS p2r2, result2, COUNT(*) AS count
+        FROM sample
+        GROUP BY pattern1, result1, pattern2, result2
+    )
+    SELECT window_counts.total, window_counts.recent, p1r1, result1, p2r2, result2, count
+    FROM window_counts LEFT JOIN distribution
+'''
+
+
+def recent_text_timestamp(hours=RECENT_HOURS):
+    """YYMMDDHHMM 텍스트 timestamp와 비교할 최근 N시간 시작 시각 (YYMMDDHH 형식)"""
+    return (datetime.now() - timedelta(hours=hours)).strftime("%y%m%d%H")
+
+
+def group_outcome_counts(counts, groups, prefix_length):
+    """
+    패턴+결과별 개수를 그룹별로 묶고, 그룹 안에서 가장 많은 개수 기준으로 그룹을 정렬합니다.
+
+    Args:
+        counts (dict): {패턴+결과: 개수} (예: {'aab': 3})
+        groups (tuple): 그룹 이름들 (예: P1_GROUPS)
+        prefix_length (int): 그룹 이름 길이
+
+    Returns:
+        list: [(그룹, [(패턴+결과, 개수), ...]), ...] - 그룹 내부는 개수 내림차순
+    """
+    grouped = {group: [] for group in groups}
+    for pattern, count in counts.items():
+        if len(pattern) >= prefix_length:
+            group_key = pattern[:prefix_length].lower()
+            if group_key in grouped:
+                grouped[group_key].append((pattern, count))
+
+    for patterns in grouped.values():
+        patterns.sort(key=lambda item: (-item[1], item[0]))
+    return sorted(grouped.items(), key=lambda item: item[1][0][1] if item[1] else 0, reverse=True)
+
+
+def query_pattern_statistics(conn, time_column, since, limit=RECENT_LIMIT):
+    """
+    패턴 통계를 쿼리 한 번으로 계산합니다.
+
+    최근 3시간(time_column >= since) 레코드가 limit개를 넘으면 그 레코드를,
+    아니면 최근 limit개 레코드를 표본으로 P1(pattern1+result1), P2(pattern2+result2) 분포를 구합니다.
+
+    Args:
+        conn (sqlite3.Connection): DB 연결
+        time_column (str): 시간 구간 비교에 쓸 컬럼 (예: 'timestamp_epoch')
+        since: 최근 3시간 시작 시각 (time_column과 같은 형식)
+        limit (int): 표본 기준 레코드 수
+
+    Returns:
+        dict: total_records, sample_size, p1_groups, p2_groups
+    """
+    rows = conn.execute(STATISTICS_QUERY.format(time_column=time_column),
+                        {'since': since, 'limit': limit}).fetchall()
+
+    total_records, recent_count = rows[0][0], rows[0][1]
+    p1_counts, p2_counts = {}, {}
+    for _, _, p1r1, result1, p2r2, result2, count in rows:
+        if not count:
+            continue
+        if result1 and p1r1:
+            p1_counts[p1r1] = p1_counts.get(p1r1, 0) + count
+        if result2 and p2r2:
+            p2_counts[p2r2] = p2_counts.get(p2r2, 0) + count
+
+    return {
+        'total_records': total_records,
+        'sample_size': recent_count if recent_count > limit else min(total_records, limit),
+        'p1_groups': group_outcome_counts(p1_counts, P1_GROUPS, 2),
+        'p2_groups': group_outcome_counts(p2_counts, P2_GROUPS, 3),
+    }
+
+
+# 롤링 통계의 기준점: 레코드가 추가/삭제되었는지 round 범위로 확인 (rowid 조회 두 번)
+ROUND_BOUNDS_QUERY = '''
+    SELECT (SELECT MIN(round) FROM pattern_records), (SELECT MAX(round) FROM pattern_records)
+'''
+
+
+def _outcomes(pattern1, result1, pattern2, result2):
+    """SQL의 pattern1 || result1 (result1 != '') 규칙과 같게 P1, P2 결과 키를 만듭니다."""
+    p1r1 = pattern1 + result1 if pattern1 is not None and result1 else None
+    p2r2 = pattern2 + result2 if pattern2 is not None and result2 else None
+    return p1r1, p2r2
+
+
+def _count(counts, key, delta):
+    if key is None:
+        return
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        del counts[key]
+
+
+class RollingPatternStatistics:
+    """
+    최근 limit개 레코드와 최근 hours시간 레코드의 P1/P2 결과 개수를 메모리에 유지합니다.
+
+    DB에서 한 번 채운 뒤에는 저장할 때 add()로 추가하고 읽을 때 오래된 레코드만 만료시키므로,
+    사이드바는 Streamlit 재실행마다 DB를 다시 집계하지 않습니다.
+    다른 프로세스가 레코드를 추가/삭제해 round 범위가 달라지면 다음 조회 때 DB에서 다시 채웁니다.
+    """
+
+    def __init__(self, limit=RECENT_LIMIT, hours=RECENT_HOURS):
+        self.limit = limit
+        self.hours = hours
+        self._lock = threading.Lock()
+        self.invalidate()
+
+    def invalidate(self):
+        """다음 조회 때 DB에서 다시 채우도록 표시합니다."""
+        self.seeded = False
+        self.total_records = 0
+        self.first_round = None
+        self.last_round = None
+        self.latest = deque()   # (p1r1, p2r2) - round 순서
+        self.latest_p1, self.latest_p2 = {}, {}
+        self.recent = deque()   # (timestamp_epoch, p1r1, p2r2) - 시각 순서
+        self.recent_p1, self.recent_p2 = {}, {}
+
+    def _push_latest(self, p1r1, p2r2):
+        self.latest.append((p1r1, p2r2))
+        _count(self.latest_p1, p1r1, 1)
+        _count(self.latest_p2, p2r2, 1)
+        if len(self.latest) > self.limit:
+            old_p1, old_p2 = self.latest.popleft()
+            _count(self.latest_p1, old_p1, -1)
+            _count(self.latest_p2, old_p2, -1)
+
+    def _push_recent(self, epoch, p1r1, p2r2):
+        if self.recent and epoch < self.recent[-1][0]:
+            # 시각이 뒤섞여 들어온 경우 (드묾)
+            index = bisect_right([item[0] for item in self.recent], epoch)
+            self.recent.insert(index, (epoch, p1r1, p2r2))
+        else:
+            self.recent.append((epoch, p1r1, p2r2))
+        _count(self.recent_p1, p1r1, 1)
+        _count(self.recent_p2, p2r2, 1)
+
+    def _evict(self, since):
+        while self.recent and self.recent[0][0] < since:
+            _, old_p1, old_p2 = self.recent.popleft()
+            _count(self.recent_p1, old_p1, -1)
+            _count(self.recent_p2, old_p2, -1)
+
+    def _seed(self, conn, since):
+        self.invalidate()
+        # 세 조회가 같은 스냅샷을 보도록 읽기 트랜잭션으로 묶음
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute('BEGIN')
+        try:
+            self.first_round, self.last_round = conn.execute(ROUND_BOUNDS_QUERY).fetchone()
+            self.total_records = conn.execute('SELECT COUNT(*) FROM pattern_records').fetchone()[0]
+            latest = conn.execute('''
+                SELECT pattern1, result1, pattern2, result2
+                FROM pattern_records
+                ORDER BY round DESC
+                LIMIT ?
+            ''', (self.limit,)).fetchall()
+            recent = conn.execute('''
+                SELECT timestamp_epoch, pattern1, result1, pattern2, result2
+                FROM pattern_records
+                WHERE timestamp_epoch >= ?
+                ORDER BY timestamp_epoch, round
+            ''', (since,)).fetchall()
+        finally:
+            if own_transaction:
+                conn.commit()
+
+        for row in reversed(latest):
+            self._push_latest(*_outcomes(*row))
+        for epoch, *row in recent:
+            self._push_recent(epoch, *_outcomes(*row))
+        self.seeded = True
+
+    def add(self, pattern_rows, last_round):
+        """
+        방금 저장한 레코드를 반영합니다.
+
+        Args:
+            pattern_rows (list): TransitionState.build_row 결과 (INSERT_PATTERN_RECORD 파라미터)
+            last_round (int): 저장 후 pattern_records의 MAX(round)
+        """
+        with self._lock:
+            if not self.seeded:
+                return
+            if self.last_round is None or last_round - len(pattern_rows) != self.last_round:
+                # 사이에 다른 곳에서 저장된 레코드가 있음
+                self.invalidate()
+                return
+
+            for row in pattern_rows:
+                # row[2:6] = pattern1, result1, pattern2, result2 / row[16] = timestamp_epoch
+                p1r1, p2r2 = _outcomes(*row[2:6])
+                self._push_latest(p1r1, p2r2)
+                if row[16] is not None:
+                    self._push_recent(row[16], p1r1, p2r2)
+            self.total_records += len(pattern_rows)
+            self.last_round = last_round
+
+    def statistics(self, conn, since=None):
+        """
+        query_pattern_statistics와 같은 형식의 통계를 메모리의 카운터로 계산합니다.
+
+        Args:
+            conn (sqlite3.Connection): DB 연결 (round 범위 확인 / 처음 채울 때만 사용)
+            since (int): 최근 구간 시작 시각 (유닉스 초, 기본값: 현재 - hours)
+        """
+        if since is None:
+            since = epoch_since(hours=self.hours)
+        with self._lock:
+            bounds = tuple(conn.execute(ROUND_BOUNDS_QUERY).fetchone())
+            if not self.seeded or bounds != (self.first_round, self.last_round):
+                self._seed(conn, since)
+            self._evict(since)
+
+            recent_count = len(self.recent)
+            if recent_count > self.limit:
+                p1_counts, p2_counts, sample_size = self.recent_p1, self.recent_p2, recent_count
+            else:
+                p1_counts, p2_counts, sample_size = self.latest_p1, self.latest_p2, len(self.latest)
+
+            return {
+                'total_records': self.total_records,
+                'sample_size': sample_size,
+                'p1_groups': group_outcome_counts(p1_counts, P1_GROUPS, 2),
+                'p2_groups': group_outcome_counts(p2_counts, P2_GROUPS, 3),
+            }
+
+    def check(self, conn, since=None):
+        """
+        일관성 검사: 롤링 통계와 SQL 집계 결과를 비교합니다.
+
+        Returns:
+            tuple: (일치 여부, SQL 집계 결과)
+        """
+        if since is None:
+            since = epoch_since(hours=self.hours)
+        expected = query_pattern_statistics(conn, 'timestamp_epoch', since, self.limit)
+        return self.statistics(conn, since) == expected, expected
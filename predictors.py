@@ -0,0 +1,217 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from hf_client import HFClientError, parse_prediction
+from model_training import describe_model, predict_batch
+from pattern_frequency import predict_from_table
+from storage import DB_PATH, get_connection
+
+# 예측 엔진을 동시에 실행하는 스레드 수
+MAX_WORKERS = 8
+
+
+class PredictorBackend(ABC):
+    """
+    예측 엔진 공통 인터페이스입니다.
+
+    predict(patterns)는 패턴 목록을 받아 같은 순서의 결과 목록을 반환합니다.
+    각 결과는 next_pattern, confidence, method를 가진 dict이며, 예측할 수 없으면 None,
+    해당 패턴만 실패했으면 예외 객체입니다. 엔진 전체가 실패하면 예외를 발생시킵니다.
+    Streamlit 작업 스레드 밖에서 실행되므로 st.* 를 호출하지 않습니다.
+    """
+
+    name = ''
+    label = ''
+
+    @abstractmethod
+    def predict(self, patterns):
+        pass
+
+
+class FrequencyTableBackend(PredictorBackend):
+    """패턴별 다음 결과 빈도표 (predict_next_pattern과 같은 결과)"""
+
+    name = 'frequency'
+    label = '빈도표'
+
+    def __init__(self, table):
+        self.table = table
+
+    def predict(self, patterns):
+        return [predict_from_table(self.table, pattern) for pattern in patterns]
+
+
+class SequenceBackend(PredictorBackend):
+    """전체 그룹 시퀀스 이력의 가변 차수 마르코프 예측 (패턴을 그룹 값 문맥으로 사용)"""
+
+    name = 'markov'
+    label = '마르코프'
+
+    def __init__(self, predictor, min_support=5):
+        self.predictor = predictor
+        self.min_support = min_support
+
+    def predict(self, patterns):
+        return [self.predictor.predict_group(pattern, self.min_support) for pattern in patterns]
+
+
+class MLBackend(PredictorBackend):
+    """
+    저장된 ML 모델의 일괄 예측. 길이 2 패턴은 pattern1, 길이 3 패턴은 pattern2가 같은 최신 레코드의 특성을 사용합니다.
+    """
+
+    name = 'ml'
+    label = 'ML 모델'
+
+    def __init__(self, registry, db_path=DB_PATH, on_missing_model=None):
+        self.registry = registry
+        self.db_path = db_path
+        self.on_missing_model = on_missing_model
+
+    def predict(self, patterns):
+        loaded = self.registry.get()
+        if loaded is None:
+            if self.on_missing_model is not None:
+                self.on_missing_model()
+            raise LookupError("ML 모델이 아직 없습니다 (백그라운드 학습 중).")
+        model, le, features = loaded
+        pairs = [(pattern, None) if len(pattern) == 2 else (None, pattern) for pattern in patterns]
+        method = describe_model(model)
+        return [
+            {'next_pattern': result[0], 'confidence': result[1], 'method': method} if result else None
+            for result in predict_batch(get_connection(self.db_path), model, le, features, pairs)
+        ]
+
+
+class HuggingFaceBackend(PredictorBackend):
+    """Hugging Face zero-shot 분류 API (연결 풀, 응답 캐시, 동시 요청은 InferenceClient가 처리)"""
+
+    name = 'huggingface'
+    label = 'Hugging Face API'
+
+    def __init__(self, client):
+        self.client = client
+
+    def predict(self, patterns):
+        results = []
+        for result in self.client.classify_many(patterns):
+            if isinstance(result, HFClientError):
+                results.append(result)
+                continue
+            try:
+                results.append(parse_prediction(result))
+            except ValueError as e:
+                results.append(e)
+        return results
+
+
+class FunctionBackend(PredictorBackend):
+    """패턴 하나씩 예측하는 함수(func(pattern) -> dict 또는 None)를 엔진으로 감쌉니다."""
+
+    def __init__(self, name, label, func):
+        self.name = name
+        self.label = label
+        self.func = func
+
+    def predict(self, patterns):
+        return [self.func(pattern) for pattern in patterns]
+
+
+class BackendStats:
+    """
+    엔진별 호출 횟수, 처리한 패턴 수, 지연 시간, 오류 횟수를 누적합니다.
+    CACHE_STATS와 같이 재실행과 세션 사이에서 유지되도록 모듈 인스턴스(BACKEND_STATS)에 보관합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, patterns, seconds, failed):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'calls': 0, 'patterns': 0, 'seconds': 0.0,
+                                                  'last': 0.0, 'errors': 0})
+            stats['calls'] += 1
+            stats['patterns'] += patterns
+            stats['seconds'] += seconds
+            stats['last'] = seconds
+            stats['errors'] += int(failed)
+
+    def snapshot(self):
+        """
+        Returns:
+            list: [{'엔진', '호출', '패턴 수', '최근 지연(ms)', '평균 지연(ms)', '처리량(패턴/초)', '오류'}, ...]
+        """
+        with self._lock:
+            rows = []
+            for name, stats in sorted(self._stats.items()):
+                rows.append({
+                    '엔진': name,
+                    '호출': stats['calls'],
+                    '패턴 수': stats['patterns'],
+                    '최근 지연(ms)': round(stats['last'] * 1000, 1),
+                    '평균 지연(ms)': round(stats['seconds'] / stats['calls'] * 1000, 1),
+                    '처리량(패턴/초)': round(stats['patterns'] / stats['seconds'], 1) if stats['seconds'] else '-',
+                    '오류': stats['errors'],
+                })
+            return rows
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+BACKEND_STATS = BackendStats()
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='predictor')
+
+
+class PredictorRegistry:
+    """이름별 예측 엔진 모음입니다. run()으로 원하는 엔진들을 동시에 실행합니다."""
+
+    def __init__(self, backends=()):
+        self._backends = {}
+        for backend in backends:
+            self.register(backend)
+
+    def register(self, backend):
+        if not isinstance(backend, PredictorBackend):
+            raise TypeError(f"PredictorBackend가 아닙니다: {backend!r}")
+        self._backends[backend.name] = backend
+        return backend
+
+    def names(self):
+        return list(self._backends)
+
+    def label(self, name):
+        return self._backends[name].label
+
+    def _run_one(self, backend, patterns):
+        start = time.perf_counter()
+        results, error = [None] * len(patterns), None
+        try:
+            results = list(backend.predict(patterns))
+        except Exception as e:
+            error = str(e)
+        seconds = time.perf_counter() - start
+
+        # 패턴별 실패는 None으로 바꾸고 첫 오류 메시지를 보고
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                error = error or str(result)
+                results[i] = None
+        BACKEND_STATS.record(backend.name, len(patterns), seconds, error is not None)
+        return {'results': results, 'seconds': seconds, 'error': error}
+
+    def run(self, names, patterns):
+        """
+        선택한 엔진들로 같은 패턴 목록을 동시에 예측합니다.
+
+        Returns:
+            dict: 엔진 이름 → {'results': 패턴 순서의 결과, 'seconds': 소요 시간, 'error': 오류 메시지 또는 None}
+        """
+        patterns = list(patterns)
+        futures = {name: _executor.submit(self._run_one, self._backends[name], patterns) for name in names}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,176 @@
+import threading
+
+# 최대 문맥 길이 (k)
+MAX_ORDER = 6
+
+
+class _Node:
+    """문맥 노드: 이 문맥 뒤에 나온 다음 기호별 개수와, 한 칸 더 앞의 기호로 내려가는 자식"""
+
+    __slots__ = ('children', 'counts', 'total')
+
+    def __init__(self):
+        self.children = {}
+        self.counts = {}
+        self.total = 0
+
+
+class CountTrie:
+    """
+    가변 차수 마르코프 모델용 카운트 트라이입니다.
+
+    루트에서 최근 기호부터 거꾸로 내려가며(문맥의 역순) 노드를 두므로,
+    길이 1..k 문맥의 다음 기호 분포를 한 번의 O(k) 탐색으로 모두 구할 수 있습니다.
+    기호는 해시 가능한 값이면 됩니다 (예: 'a', 'aa').
+    """
+
+    def __init__(self, max_order=MAX_ORDER):
+        self.max_order = max_order
+        self.root = _Node()
+
+    def add(self, history, symbol):
+        """history(이전 기호들) 다음에 symbol이 나왔음을 길이 0..k 문맥 모두에 기록합니다. O(k)"""
+        node = self.root
+        depth = 0
+        while True:
+            node.counts[symbol] = node.counts.get(symbol, 0) + 1
+            node.total += 1
+            if depth == self.max_order or depth == len(history):
+                break
+            depth += 1
+            context_symbol = history[-depth]
+            child = node.children.get(context_symbol)
+            if child is None:
+                child = node.children[context_symbol] = _Node()
+            node = child
+
+    def add_sequence(self, symbols):
+        """독립된 시퀀스 하나를 추가합니다 (시퀀스 경계를 넘는 문맥은 만들지 않음)."""
+        symbols = list(symbols)
+        for i, symbol in enumerate(symbols):
+            self.add(symbols[max(0, i - self.max_order):i], symbol)
+
+    def distributions(self, context):
+        """
+        문맥 길이 0..min(k, len(context))별 다음 기호 분포를 반환합니다. O(k)
+
+        Returns:
+            list: [(문맥 길이, 표본 수, {기호: 확률}), ...] - 짧은 문맥부터
+        """
+        result = []
+        node = self.root
+        depth = 0
+        while node is not None and node.total:
+            result.append((depth, node.total,
+                           {symbol: count / node.total for symbol, count in node.counts.items()}))
+            if depth == self.max_order or depth == len(context):
+                break
+            depth += 1
+            node = node.children.get(context[-depth])
+        return result
+
+    def predict(self, context, min_support=5):
+        """
+        표본 수가 min_support 이상인 가장 긴 문맥으로 다음 기호를 예측합니다 (짧은 문맥으로 백오프).
+
+        Returns:
+            dict: next_pattern, confidence, order, support, distribution (데이터가 없으면 None)
+        """
+        candidates = self.distributions(context)
+        if not candidates:
+            return None
+        supported = [item for item in candidates if item[1] >= min_support]
+        order, support, distribution = (supported or candidates[:1])[-1]
+        best = max(sorted(distribution), key=distribution.get)
+        return {
+            'next_pattern': best,
+            'confidence': distribution[best],
+            'order': order,
+            'support': support,
+            'distribution': distribution,
+            'method': f'가변 차수 마르코프 ({order}차)'
+        }
+
+
+class SequencePredictor:
+    """
+    DB 전체 이력으로 만든 두 개의 카운트 트라이를 유지합니다.
+
+    - tot: group_sequences.tot 문자열 (그룹 값 'a'/'b' 시퀀스, 저장 건마다 독립 시퀀스)
+    - pattern1: pattern_records의 pattern1 흐름 (round 순서, 'aa'/'ab'/'ba'/'bb')
+
+    마지막으로 읽은 round를 기억해 refresh() 때 새로 저장된 행만 추가합니다.
+    """
+
+    def __init__(self, max_order=MAX_ORDER):
+        self.max_order = max_order
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.tot = CountTrie(self.max_order)
+        self.pattern1 = CountTrie(self.max_order)
+        self.pattern1_tail = []
+        self.tot_round = 0
+        self.pattern1_round = 0
+        # 처음 읽은 round (이 값이 바뀌면 앞쪽 행이 삭제된 것)
+        self.tot_first = None
+        self.pattern1_first = None
+
+    def reset(self):
+        """읽은 이력을 모두 버립니다 (DB 초기화 후 호출). 다음 refresh()에서 처음부터 다시 읽습니다."""
+        with self._lock:
+            self._reset()
+
+    def refresh(self, conn):
+        """
+        마지막으로 읽은 round 이후의 group_sequences / pattern_records 행을 추가합니다.
+
+        Returns:
+            int: 새로 추가한 행 수
+        """
+        with self._lock:
+            # 읽은 행이 삭제되었으면 처음부터 다시 만듦: 마지막 round가 워터마크보다 작아졌거나
+            # (초기화) 첫 round가 바뀐 경우 (초기화 후 워터마크를 넘게 다시 채워졌거나 오래된 행 삭제)
+            tot_min, tot_max, pattern1_min, pattern1_max = conn.execute('''
+                SELECT (SELECT MIN(round) FROM group_sequences), (SELECT MAX(round) FROM group_sequences),
+                       (SELECT MIN(round) FROM pattern_records), (SELECT MAX(round) FROM pattern_records)
+            ''').fetchone()
+            if ((tot_max or 0) < self.tot_round or (pattern1_max or 0) < self.pattern1_round
+                    or self.tot_first not in (None, tot_min) or self.pattern1_first not in (None, pattern1_min)):
+                self._reset()
+
+            tot_rows = conn.execute(
+                'SELECT round, tot FROM group_sequences WHERE round > ? ORDER BY round',
+                (self.tot_round,)
+            ).fetchall()
+            if tot_rows and self.tot_first is None:
+                self.tot_first = tot_rows[0][0]
+            for round_id, tot in tot_rows:
+                if tot:
+                    self.tot.add_sequence(tot)
+                self.tot_round = round_id
+
+            pattern_rows = conn.execute(
+                'SELECT round, pattern1 FROM pattern_records WHERE round > ? ORDER BY round',
+                (self.pattern1_round,)
+            ).fetchall()
+            if pattern_rows and self.pattern1_first is None:
+                self.pattern1_first = pattern_rows[0][0]
+            for round_id, pattern1 in pattern_rows:
+                if pattern1:
+                    self.pattern1.add(self.pattern1_tail, pattern1)
+                    self.pattern1_tail = (self.pattern1_tail + [pattern1])[-self.max_order:]
+                self.pattern1_round = round_id
+            return len(tot_rows) + len(pattern_rows)
+
+    def predict_group(self, context, min_support=5):
+        """그룹 값 시퀀스(예: 'abba') 다음 그룹 값을 예측합니다."""
+        with self._lock:
+            return self.tot.predict(list(context), min_support)
+
+    def predict_pattern1(self, context=None, min_support=5):
+        """pattern1 흐름 다음 pattern1을 예측합니다. context가 없으면 DB의 최근 흐름을 사용합니다."""
+        with self._lock:
+            context = list(context) if context is not None else list(self.pattern1_tail)
+            return self.pattern1.predict(context, min_support)
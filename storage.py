@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+from pattern_records import init_schema
+
+DB_PATH = 'pattern_analysis_v2.db'
+
+# 연결마다 한 번 적용하는 PRAGMA
+# WAL: 읽기가 쓰기를 막지 않음 / synchronous=NORMAL: WAL에서 안전한 수준으로 fsync 감소
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-16000',      # 약 16MB 페이지 캐시
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000',
+)
+
+# 연결별로 유지할 준비된(prepared) 문장 수
+CACHED_STATEMENTS = 256
+
+_local = threading.local()
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+
+def _close_all(connections, pid):
+    # fork된 자식 프로세스에서는 부모의 연결을 닫지 않음
+    if os.getpid() == pid:
+        for conn in connections.values():
+            conn.close()
+    connections.clear()
+
+
+class _ThreadConnections:
+    """
+    스레드 하나가 연 연결들입니다. 스레드가 끝나 스레드 로컬 값이 사라지면
+    (Streamlit 재실행 스레드, 작업 스레드 등) 그 스레드의 연결도 함께 닫습니다.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.connections = {}
+        # 닫는 쪽이 다른 스레드일 수 있으므로 연결은 check_same_thread=False로 열고, 사용은 이 스레드만 함
+        self.close = weakref.finalize(self, _close_all, self.connections, self.pid)
+
+
+def _open_connection(db_path):
+    conn = sqlite3.connect(db_path, timeout=5, cached_statements=CACHED_STATEMENTS,
+                           check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+    # 스키마 생성은 프로세스당 DB 파일마다 한 번만
+    with _initialized_lock:
+        if db_path not in _initialized:
+            init_schema(conn)
+            _initialized.add(db_path)
+    return conn
+
+
+def get_connection(db_path=DB_PATH):
+    """
+    현재 스레드 전용 SQLite 연결을 반환합니다. 스레드마다 한 번만 열고 스레드가 끝날 때까지 재사용합니다.
+    스레드마다 연결이 따로 있으므로 다른 스레드의 커밋되지 않은 쓰기를 보지 않고,
+    WAL 모드에서 읽기가 다른 스레드의 쓰기를 기다리지 않습니다.
+
+    Args:
+        db_path (str): DB 파일 경로
+
+    Returns:
+        sqlite3.Connection: WAL 모드와 PRAGMA가 적용된 연결 (닫지 말 것, 쓰기는 transaction() 사용)
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None or connections.pid != os.getpid():
+        # fork된 자식 프로세스는 부모의 연결을 물려받지 않음
+        connections = _local.connections = _ThreadConnections()
+
+    conn = connections.connections.get(db_path)
+    if conn is None:
+        conn = connections.connections[db_path] = _open_connection(db_path)
+    return conn
+
+
+@contextmanager
+def transaction(db_path=DB_PATH):
+    """
+    하나의 트랜잭션으로 묶어 실행합니다. 정상 종료 시 커밋, 예외 시 롤백합니다.
+    다른 연결의 쓰기 트랜잭션은 BEGIN IMMEDIATE에서 busy_timeout만큼 기다립니다.
+
+    사용 예:
+        with transaction() as conn:
+            conn.execute(...)
+    """
+    conn = get_connection(db_path)
+    with conn:
+        # 조회 후 삽입하는 쓰기도 원자적으로 처리되도록 시작 시점에 쓰기 잠금 확보
+        if not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE')
+        yield conn
+
+
+def close_connections():
+    """현재 스레드가 연 연결을 모두 닫습니다."""
+    connections = getattr(_local, 'connections', None)
+    if connections is not None:
+        connections.close()
+    _local.connections = None
@@ -1,6 +1,8 @@
 import streamlit as st
-from bs4 import BeautifulSoup
-import json
+
+from bead_grid import BeadGrid
+from bead_road import iter_bead_road_cells, iter_bead_road_cells_soup
+from pattern_lookup import encode_sequence, get_pattern_index
 
 """
 Original table input processing code is commented out for future reference
@@ -9,28 +11,12 @@ def parse_table_html(html_content):
     pass
 """
 
-def parse_bead_road_svg(svg_code):
-    soup = BeautifulSoup(svg_code, 'html.parser')
-    
-    # Initialize 6x15 grid with empty strings
-    grid = [['' for _ in range(15)] for _ in range(6)]
-    
-    # Find all coordinate elements
-    coordinates = soup.find_all('svg', attrs={'data-type': 'coordinates'})
+def parse_bead_road_svg(svg_code, streaming=True):
+    # Stream coordinate cells (x, y, B/P/T) straight into a 15x6 BeadGrid;
+    # streaming=False falls back to the BeautifulSoup tree walk
+    cells = iter_bead_road_cells(svg_code) if streaming else iter_bead_road_cells_soup(svg_code)
     
-    for coord in coordinates:
-        # Get x, y coordinates
-        x = int(float(coord.get('data-x', 0)))
-        y = int(float(coord.get('data-y', 0)))
-        
-        # Find the result text (B, P, or T)
-        text_elem = coord.find('text')
-        if text_elem and text_elem.string:
-            result = text_elem.string.strip()
-            if 0 <= y < 6 and 0 <= x < 15:  # Ensure within grid bounds
-                grid[y][x] = result.lower()
-    
-    return grid
+    return BeadGrid.from_cells(cells, width=15, height=6)
 
 def display_grid(grid):
     # CSS for the grid
@@ -71,9 +57,10 @@ def display_grid(grid):
     
     # Display the grid with container
     html_table = ['<div class="grid-container" style="max-width: 100%; overflow-x: auto;">']
-    for y, row in enumerate(grid):  # Still iterate by rows for display
+    for y in range(grid.height):  # Still iterate by rows for display
         html_table.append('<div class="grid-row">')
-        for x, cell in enumerate(row[:15]):  # Show up to 15 columns
+        for x in range(min(grid.width, 15)):  # Show up to 15 columns
+            cell = grid.cell(x, y)
             css_class = ''
             if cell == 'b':
                 css_class = 'banker'
@@ -105,10 +92,9 @@ Original table grid view and export code is commented out for future reference
 """
 
 def load_pattern_classifications():
-    """Load pattern classifications from JSON file"""
+    """Load the compiled pattern classification table (rebuilt only when the source JSONs change)"""
     try:
-        with open('pattern-classification-2025-04-20 (2).json', 'r') as f:
-            return json.load(f)
+        return get_pattern_index()
     except Exception as e:
         st.error(f"Error loading pattern classifications: {str(e)}")
         return None
@@ -137,15 +123,9 @@ def analyze_zones(grid):
     """
     # Load pattern classifications
     classifications = load_pattern_classifications()
-    if not classifications:
+    if classifications is None:
         return [], []
     
-    # Create pattern lookup dictionaries
-    group_a_patterns = {sequence_to_string(p['sequence']): p['pattern_number'] 
-                       for p in classifications['patterns']['groupA']}
-    group_b_patterns = {sequence_to_string(p['sequence']): p['pattern_number'] 
-                       for p in classifications['patterns']['groupB']}
-    
     zones = []
     zone_stats = []
     
@@ -173,8 +153,8 @@ def analyze_zones(grid):
             
             # Get values for this pattern using the coordinates directly
             for y, x in indices:
-                if y < len(grid) and x < len(grid[0]):
-                    cell = grid[y][x].upper() if grid[y][x] else ' '
+                if y < grid.height and x < grid.width:
+                    cell = grid.cell(x, y).upper() or ' '
                     sequence.append(cell)
                 else:
                     sequence.append(' ')
@@ -194,13 +174,11 @@ def analyze_zones(grid):
                     'classification_number': None
                 }
                 
-                # Check if pattern matches any classification
-                if pattern_str in group_a_patterns:
-                    pattern_info['group'] = 'A'
-                    pattern_info['classification_number'] = group_a_patterns[pattern_str]
-                elif pattern_str in group_b_patterns:
-                    pattern_info['group'] = 'B'
-                    pattern_info['classification_number'] = group_b_patterns[pattern_str]
+                # Check if pattern matches any classification (6-bit code lookup)
+                code = encode_sequence(sequence)
+                if code is not None and classifications.group_for_code(code):
+                    pattern_info['group'] = classifications.group_for_code(code).upper()
+                    pattern_info['classification_number'] = classifications.pattern_numbers[code]
                 
                 found_patterns.append(pattern_info)
         
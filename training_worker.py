@@ -0,0 +1,88 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from model_training import MODEL_PATH, train_model
+from online_model import FrequencyClassifier
+from storage import DB_PATH, get_connection
+
+# 작업 상태
+STATUS_QUEUED = '대기'
+STATUS_RUNNING = '학습 중'
+STATUS_DONE = '완료'
+STATUS_FAILED = '실패'
+
+
+class TrainingWorker:
+    """
+    모델 학습을 스레드 하나짜리 작업 큐에서 실행합니다.
+
+    학습 결과는 model_training.save_model로 원자적으로 교체되므로, 학습 중에도
+    예측은 이전 모델 파일을 계속 사용합니다. 같은 방식의 학습이 이미 대기/진행 중이면
+    새 작업을 만들지 않고 그 작업을 돌려줍니다.
+    """
+
+    def __init__(self, db_path=DB_PATH, model_path=MODEL_PATH):
+        self.db_path = db_path
+        self.model_path = model_path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-training')
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.jobs = []
+
+    def submit(self, incremental=True):
+        """
+        학습 작업을 큐에 넣습니다.
+
+        Returns:
+            dict: 작업 상태 (id, incremental, status, submitted_at, started_at, finished_at, samples, error, note)
+        """
+        with self._lock:
+            for job in self.jobs:
+                if job['incremental'] == incremental and job['status'] in (STATUS_QUEUED, STATUS_RUNNING):
+                    return dict(job)
+            job = {
+                'id': next(self._ids),
+                'incremental': incremental,
+                'status': STATUS_QUEUED,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'samples': None,
+                'error': None,
+                'note': None,
+            }
+            self.jobs.append(job)
+        self._executor.submit(self._run, job)
+        return dict(job)
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.update(changes)
+
+    def _run(self, job):
+        self._update(job, status=STATUS_RUNNING, started_at=time.time())
+        try:
+            # 작업 스레드 전용 연결 (storage가 스레드별로 열고, 스레드가 끝나면 닫음)
+            conn = get_connection(self.db_path)
+            model, _, _, samples = train_model(conn, self.model_path, job['incremental'])
+            if model is None:
+                raise ValueError("학습할 데이터가 없습니다.")
+            note = None
+            if job['incremental'] and not isinstance(model, FrequencyClassifier):
+                # train_model이 저장된 RandomForest를 덮어쓰지 않고 전체 재학습으로 갱신한 경우
+                note = "저장된 모델이 RandomForest라 증분 학습 대신 전체 재학습으로 갱신했습니다."
+            self._update(job, status=STATUS_DONE, samples=samples, finished_at=time.time(), note=note)
+        except Exception as e:
+            self._update(job, status=STATUS_FAILED, error=str(e), finished_at=time.time())
+
+    def latest(self):
+        """가장 최근 작업 상태 (없으면 None)"""
+        with self._lock:
+            return dict(self.jobs[-1]) if self.jobs else None
+
+    def busy(self):
+        """대기/진행 중인 작업이 있으면 True"""
+        with self._lock:
+            return any(job['status'] in (STATUS_QUEUED, STATUS_RUNNING) for job in self.jobs)
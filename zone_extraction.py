@@ -0,0 +1,117 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bead_grid import CODE_BANKER, CODE_PLAYER
+from pattern_lookup import TABLE_SIZE
+
+# 그룹(zone) 정의: 겹치는 3열 구간, 각 구간은 앞 두 열의 위/아래 2x3 패턴 4개를 사용
+ZONE_WIDTH = 3
+PATTERN_WIDTH = 2
+PATTERN_HEIGHT = 3
+PATTERNS_PER_ZONE = 4
+
+# b/p 6칸이 아닌 패턴 (빈칸이나 T 포함)
+INVALID_CODE = TABLE_SIZE
+
+
+def extract_pattern_codes(cells, zone_width=ZONE_WIDTH):
+    """
+    그리드(또는 그리드 묶음)의 모든 구간/패턴 슬롯을 6비트 코드로 한 번에 계산합니다.
+
+    Args:
+        cells (np.ndarray): (..., width, 6) uint8 셀 코드 배열 (BeadGrid.cells 또는 그 묶음)
+        zone_width (int): 구간 너비 (3 이상)
+
+    Returns:
+        tuple: (codes, active)
+            codes (np.ndarray): (..., 구간 수, 4) uint8, 패턴 코드 또는 INVALID_CODE
+            active (np.ndarray): (..., 구간 수) bool, B/P/T 셀이 있는 구간 여부
+    """
+    if zone_width < PATTERN_WIDTH + 1:
+        raise ValueError(f"zone_width는 {PATTERN_WIDTH + 1} 이상이어야 합니다: {zone_width}")
+
+    cells = np.asarray(cells, dtype=np.uint8)
+    width, height = cells.shape[-2:]
+    n_zones = width - zone_width + 1
+
+    # 열마다 위(0~2행)/아래(3~5행) 3칸을 3비트로 인코딩 (첫 칸이 최상위 비트, p=1)
+    halves = cells.reshape(cells.shape[:-1] + (height // PATTERN_HEIGHT, PATTERN_HEIGHT))
+    bits = (halves == CODE_PLAYER).astype(np.uint8)
+    half_codes = (bits[..., 0] << 2) | (bits[..., 1] << 1) | bits[..., 2]
+    half_valid = ((halves == CODE_BANKER) | (halves == CODE_PLAYER)).all(axis=-1)
+
+    # 인접한 두 열을 이어 붙여 2x3 패턴 코드 생성: (..., width-1, 위/아래)
+    window_codes = (half_codes[..., :-1, :] << PATTERN_HEIGHT) | half_codes[..., 1:, :]
+    window_valid = half_valid[..., :-1, :] & half_valid[..., 1:, :]
+    window_codes = np.where(window_valid, window_codes, INVALID_CODE).astype(np.uint8)
+
+    # 구간 s의 슬롯: [s열 위, s열 아래, s+1열 위, s+1열 아래]
+    codes = np.concatenate(
+        [window_codes[..., :n_zones, :], window_codes[..., 1:n_zones + 1, :]], axis=-1
+    )
+
+    occupied = (cells != 0).any(axis=-1)
+    active = sliding_window_view(occupied, zone_width, axis=-1).any(axis=-1)
+    return codes, active
+
+
+def group_lookup_table(groups):
+    """
+    64칸 그룹 목록에 INVALID_CODE 자리를 더해 코드로 바로 인덱싱할 수 있는 배열을 만듭니다.
+
+    Args:
+        groups (list): PatternIndex.groups ('a', 'b' 또는 None)
+    """
+    table = np.full(TABLE_SIZE + 1, '', dtype='<U1')
+    for code, group in enumerate(groups):
+        if group:
+            table[code] = group
+    return table
+
+
+def classify_pattern_codes(codes, groups):
+    """
+    패턴 코드 배열을 그룹 문자 배열로 변환합니다 (분류되지 않으면 '').
+
+    Args:
+        codes (np.ndarray): extract_pattern_codes의 codes
+        groups (list): PatternIndex.groups
+    """
+    return group_lookup_table(groups)[codes]
+
+
+def group_text(zone_groups, count):
+    """앞 count개 슬롯이 모두 분류된 경우 그룹 문자열을, 아니면 ''를 반환합니다."""
+    selected = zone_groups[:count]
+    return ''.join(selected) if all(selected) else ''
+
+
+def extract_zones(grid, groups, zone_width=ZONE_WIDTH):
+    """
+    그리드의 겹치는 구간과 패턴 그룹 결과를 한 번에 계산합니다.
+
+    Args:
+        grid (BeadGrid): 전체 그리드
+        groups (list or None): PatternIndex.groups, None이면 모두 미분류
+        zone_width (int): 구간 너비
+
+    Returns:
+        list: 구간 dict 리스트
+            zone_data (BeadGrid): 구간 뷰, start_x/end_x: 시작/끝 열,
+            pattern_codes (tuple): 슬롯별 코드, pattern_123/pattern_1234 (str): 그룹 문자열
+    """
+    codes, active = extract_pattern_codes(grid.cells, zone_width)
+    zone_groups = classify_pattern_codes(codes, groups or []).tolist()
+    codes = codes.tolist()
+
+    zones = []
+    for start_x in np.flatnonzero(active).tolist():
+        zones.append({
+            'zone_data': grid.zone(start_x, start_x + zone_width),
+            'start_x': start_x,
+            'end_x': start_x + zone_width - 1,
+            'pattern_codes': tuple(codes[start_x]),
+            'pattern_123': group_text(zone_groups[start_x], 3),
+            'pattern_1234': group_text(zone_groups[start_x], PATTERNS_PER_ZONE),
+        })
+    return zones